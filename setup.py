@@ -33,7 +33,7 @@ setup(
         'Pillow',
         'python-docx',
         'pyquery',
-        'pycurl',
+        'requests',
         'pandas',
         'numpy',
         'scipy',
@@ -43,7 +43,8 @@ setup(
         'matplotlib-venn',
         'pyupset',
         'dask',
-        'psutil'
+        'psutil',
+        'pyarrow'
     ],
 
     test_suite='nose.collector',
@@ -8,7 +8,6 @@ Primary module for generating release notes from Jira
 """
 import os
 import re
-import requests
 import shutil
 from collections import namedtuple
 from datetime import datetime
@@ -73,6 +72,9 @@ class ReleaseInstructions(object):
         """
         Triggers a pipeline on Jenkins
 
+        Uses the connections shared through the project manager so that
+        pipelines on the same server reuse a warm connection.
+
         FUTURE - move out to Jenkins API wrapper
         """
         replacements = Replacements()
@@ -82,9 +84,10 @@ class ReleaseInstructions(object):
             pipeline = matches.groups(0)[0].rstrip('/')
         Logger().info('Triggering pipeline {0}'.format(pipeline))
         params = {}
-        auth = (self._configuration.jenkins.user, self._configuration.jenkins.password)
+        session = self._document_controller.threadmanager.projectmanager.session
+        session.credentials(pipeline, (self._configuration.jenkins.user, self._configuration.jenkins.password))
         pipeline = '{0}/{1}'.format(pipeline, replacements.replace('{TRIGGER_URI}'))
-        response = requests.post(pipeline, auth=auth, params=params, verify=False)
+        response = session.post(pipeline, params=params, verify=False)
         if response.status_code != 200:
             Logger().error(
                 'Error whilst triggering pipeline - server returned status {0}'.format(
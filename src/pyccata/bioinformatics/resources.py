@@ -16,6 +16,17 @@ class BedFileItem(ResultListItemAbstract):
     # Instead, all attributes are public
 
     DELIMITER = '\t'
+    SCHEMA = {
+        'read_count': 'int32',
+        'chromosome': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'strand': 'category',
+        'peak_score': 'float32',
+        'focus_ratio': 'float32',
+        'distance_to_tss': 'float32',
+        'gene_type': 'category'
+    }
 
     _series_frame = None
     def __init__(self):
@@ -71,6 +82,14 @@ class BayesFileItem(ResultListItemAbstract):
     """
     # pylint: disable=too-many-instance-attributes
     DELIMITER = '\t'
+    SCHEMA = {
+        'chromosome': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'width': 'int32',
+        'peak_score': 'float32',
+        'distance_to_tss': 'float32'
+    }
 
     _series_frame = None
     def __init__(self):
@@ -115,6 +134,14 @@ class GeneFileItem(ResultListItemAbstract):
     """
     # pylint: disable=too-many-instance-attributes
     DELIMITER = '\t'
+    SCHEMA = {
+        'chromasone': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'distance_to_tss': 'float32',
+        'read_count': 'int32',
+        'input_count': 'int32'
+    }
 
     _series_frame = None
     def __init__(self):
@@ -160,6 +187,13 @@ class TxtFileItem(ResultListItemAbstract):
     """
     # pylint: disable=too-many-instance-attributes
     DELIMITER = '\t'
+    SCHEMA = {
+        'chromosome': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'read_count': 'int32',
+        'distance_to_tss': 'float32'
+    }
 
     _series_frame = None
     def __init__(self):
@@ -195,6 +229,12 @@ class BedxFileItem(ResultListItemAbstract):
     """
     # pylint: disable=too-many-instance-attributes
     DELIMITER = '\t'
+    SCHEMA = {
+        'chromosome': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'strand': 'category'
+    }
 
     _series_frame = None
     def __init__(self):
@@ -236,6 +276,12 @@ class FlattenedFileItem(ResultListItemAbstract):
     """
     # pylint: disable=too-many-instance-attributes
     DELIMITER = '\t'
+    SCHEMA = {
+        'chromosome': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'read_count': 'int32'
+    }
     _series_frame = None
     def __init__(self):
         """
@@ -266,6 +312,16 @@ class AnnotatedFileItem(ResultListItemAbstract):
     """
     # pylint: disable=too-many-instance-attributes
     DELIMITER = '\t'
+    SCHEMA = {
+        'chromosome': 'category',
+        'start': 'int32',
+        'end': 'int32',
+        'strand': 'category',
+        'peak_score': 'float32',
+        'focus_ratio': 'float32',
+        'distance_to_tss': 'float32',
+        'gene_type': 'category'
+    }
     _series_frame = None
     def __init__(self):
         self.chromosome = None
@@ -145,6 +145,18 @@ class ThreadableDocument(Threadable):
         """ Get the current loaded threadmanager """
         return self._thread_manager
 
+    @property
+    def reads(self):
+        """
+        Get the attributes this part reads from the results of the threads it depends on
+
+        @return list (thread, list|None) pairs. None where any attribute may be read
+
+        Searches which are only read by parts naming their attributes are
+        narrowed to the fields holding them, see ``QueryManager.project``.
+        """
+        return [(thread, None) for thread in self.dependencies]
+
     @abstractmethod
     def render(self, report):
         """
@@ -168,6 +180,12 @@ class ManagableAbstract(object):
 
     MAX_RESULTS = 50
 
+    # may the ProjectManager cache search results from this client
+    CACHEABLE = False
+
+    # may the QueryManager merge searches against this client, see pyccata.core.managers.query.Clause
+    COALESCE = False
+
     @property
     def configuration(self):
         """
@@ -0,0 +1,309 @@
+"""
+On-disk cache of search results
+
+Each search is stored in its own file, named from a hash of the query, so
+that repeated runs of a report against an unchanged back-end are answered
+locally. Entries expire after ``ttl`` seconds and the least recently used are
+removed once the cache grows beyond ``max_size`` bytes.
+
+@package pyccata.core
+"""
+import os
+import re
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+from threading import Lock
+from pyccata.core.decorators import accepts
+from pyccata.core.log import Logger
+from pyccata.core.resources import ResultList
+from pyccata.core.resources import ResultListItemAbstract
+
+class CachedResource(object):
+    """
+    Detached copy of a back-end resource such as a Jira user or status
+
+    Live resources hold a reference to the session which fetched them so
+    cannot be stored. Their raw JSON is stored instead and the attributes are
+    rebuilt from it when the entry is read.
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, raw):
+        """
+        @param raw dict
+        """
+        self.raw = raw
+        for key, value in raw.items():
+            setattr(self, key, CachedResource._rebuild(value))
+
+    @staticmethod
+    def _rebuild(value):
+        """ Convert nested dictionaries to resources """
+        if isinstance(value, dict):
+            return CachedResource(value)
+        if isinstance(value, list):
+            return [CachedResource._rebuild(item) for item in value]
+        return value
+
+    def __reduce__(self):
+        return (CachedResource, (self.raw,))
+
+class ResultCache(object):
+    """
+    Size bounded, time limited store of ResultList objects
+
+    Safe to use from many threads and processes; entries are written to a
+    temporary file and moved into place.
+    """
+    SUFFIX = '.cache'
+    KEYWORDS = ('AND', 'OR', 'NOT', 'IN', 'IS', 'WAS', 'CHANGED', 'ORDER', 'BY', 'ASC', 'DESC', 'EMPTY', 'NULL')
+    _TOKENS = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|!=|>=|<=|!~|[=~<>(),]|[^\s"\'=!~<>(),]+')
+
+    _path = None
+    _ttl = 0
+    _max_size = 0
+    _lock = None
+
+    @accepts(str, (int, float), int)
+    def __init__(self, path, ttl, max_size):
+        """
+        @param path     string Directory to store entries in. Created if missing
+        @param ttl      float  Seconds an entry remains valid for
+        @param max_size int    Bytes. The least recently used entries are removed beyond this
+        """
+        self._path = os.path.expanduser(path)
+        self._ttl = float(ttl)
+        self._max_size = max_size
+        self._lock = Lock()
+        os.makedirs(self._path, exist_ok=True)
+
+    @property
+    def path(self):
+        """ Get the directory entries are stored in """
+        return self._path
+
+    @staticmethod
+    @accepts(str)
+    def normalize(search_query):
+        """
+        Get a canonical form of a query so that trivially different spellings share an entry
+
+        @param search_query string
+
+        @return string
+
+        Whitespace outside quoted values is collapsed and keywords are upper cased.
+        Values are left alone as they may be case sensitive.
+        """
+        return ' '.join(ResultCache.tokenize(search_query))
+
+    @staticmethod
+    @accepts(str)
+    def tokenize(search_query):
+        """
+        Split a query into quoted values, operators, parentheses and words
+
+        @param search_query string
+
+        @return list Keywords are upper cased
+        """
+        tokens = []
+        for token in ResultCache._TOKENS.findall(search_query):
+            tokens.append(token.upper() if token.upper() in ResultCache.KEYWORDS else token)
+        return tokens
+
+    @staticmethod
+    def key(scope, search_query, max_results, fields, group_by):
+        """
+        Get the cache key for a search
+
+        @param scope        string     Identifies the back-end, for example its server address
+        @param search_query string
+        @param max_results  int|bool
+        @param fields       list|None
+        @param group_by     string|None
+
+        @return string
+        """
+        document = json.dumps([
+            scope,
+            ResultCache.normalize(search_query),
+            max_results if max_results is not True else 1,
+            sorted(set(fields)) if fields is not None else None,
+            group_by
+        ])
+        return hashlib.sha256(document.encode('utf8')).hexdigest()
+
+    def _file(self, key):
+        """ Get the path of the entry for a key """
+        return os.path.join(self._path, key + ResultCache.SUFFIX)
+
+    @accepts(str)
+    def get(self, key):
+        """
+        Get the cached results for a key
+
+        @param key string
+
+        @return ResultList|None None if there is no entry or it has expired
+        """
+        path = self._file(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self._ttl:
+                ResultCache._remove(path)
+                return None
+            with open(path, 'rb') as entry:
+                rows = pickle.load(entry)
+            # reading counts as use for the purposes of eviction but does not extend the lifetime
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exception:
+            Logger().warning('Discarding unreadable cache entry \'{0}\''.format(path))
+            Logger().warning(exception)
+            ResultCache._remove(path)
+            return None
+
+        results = ResultList()
+        results.total = rows['total']
+        for classname, attributes in rows['items']:
+            item = classname.__new__(classname)
+            results.append(item.from_dict(attributes))
+        return results
+
+    @accepts(str, ResultList)
+    def put(self, key, results):
+        """
+        Store results against a key
+
+        @param key     string
+        @param results ResultList
+
+        Only flat lists of result items are stored. Anything else is ignored.
+        """
+        if not all(isinstance(item, ResultListItemAbstract) for item in results):
+            return
+        # pylint: disable=protected-access
+        # items may hold their attributes in slots rather than a dictionary
+        rows = {
+            'total': results.total,
+            'items': [(item.__class__, ResultCache._detach(item._values())) for item in results]
+        }
+        handle, temporary = tempfile.mkstemp(dir=self._path, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry:
+                pickle.dump(rows, entry, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._file(key))
+        except (pickle.PicklingError, TypeError, AttributeError) as exception:
+            Logger().warning('Results cannot be cached')
+            Logger().warning(exception)
+            ResultCache._remove(temporary)
+            return
+        except BaseException:
+            ResultCache._remove(temporary)
+            raise
+        self._evict()
+
+    def clear(self):
+        """ Remove every entry """
+        with self._lock:
+            for name in os.listdir(self._path):
+                if name.endswith(ResultCache.SUFFIX):
+                    ResultCache._remove(os.path.join(self._path, name))
+
+    def _evict(self):
+        """ Remove expired entries, then the least recently used until the cache fits in max_size """
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self._path):
+                if not name.endswith(ResultCache.SUFFIX):
+                    continue
+                path = os.path.join(self._path, name)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if now - status.st_mtime > self._ttl:
+                    ResultCache._remove(path)
+                else:
+                    entries.append((status.st_atime, status.st_size, path))
+
+            size = sum([entry[1] for entry in entries])
+            for _, length, path in sorted(entries):
+                if size <= self._max_size:
+                    break
+                ResultCache._remove(path)
+                size -= length
+
+    @staticmethod
+    def _detach(value):
+        """ Replace live resources with CachedResource copies of their raw JSON """
+        raw = getattr(value, 'raw', None)
+        if isinstance(raw, dict):
+            return CachedResource(raw)
+        if isinstance(value, dict):
+            return dict((key, ResultCache._detach(item)) for key, item in value.items())
+        if isinstance(value, list):
+            return [ResultCache._detach(item) for item in value]
+        if isinstance(value, tuple) and not hasattr(value, '_fields'):
+            return tuple(ResultCache._detach(item) for item in value)
+        return value
+
+    @staticmethod
+    def _remove(path):
+        """ Delete a file which may already have gone """
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class IssueStore(ResultCache):
+    """
+    Local copies of the issues matching each query, kept up to date by the client
+
+    Entries never expire but the least recently used are still removed beyond
+    ``max_size``. The modification time of each entry records when the issues
+    in it were last brought up to date.
+    """
+
+    @accepts(str, int)
+    def __init__(self, path, max_size):
+        """
+        @param path     string Directory to store entries in. Created if missing
+        @param max_size int    Bytes
+        """
+        super().__init__(path, float('inf'), max_size)
+
+    @accepts(str)
+    def synced(self, key):
+        """
+        Get when the entry for a key was last brought up to date
+
+        @param key string
+
+        @return float|None A ``time.time()`` value or None if there is no entry
+        """
+        try:
+            return os.path.getmtime(self._file(key))
+        except FileNotFoundError:
+            return None
+
+    @accepts(str, ResultList, float)
+    def save(self, key, results, synced):
+        """
+        Store the issues for a key
+
+        @param key     string
+        @param results ResultList
+        @param synced  float      The ``time.time()`` at which the issues were fetched
+        """
+        self.put(key, results)
+        try:
+            os.utime(self._file(key), (synced, synced))
+        except FileNotFoundError:
+            pass
+
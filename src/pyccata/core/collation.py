@@ -117,7 +117,7 @@ def sum_total(results, collation):
 
                 # pylint: disable=protected-access
                 return_results._name = '_'.join([name.name for name in results])
-            data[collation.field][index] = item.dataframe.sum(axis=0)[collation.field]
+            data[collation.field][index] = item.dataframe[collation.field].sum()
             data['name'][index] = item.name
             index += 1
         else:
@@ -142,7 +142,11 @@ def sum_outer(results, collation):
     return_results._group_by = results.group_by
     return_results._field = collation.field
 
-    results = [item.dataframe.groupby(results.group_by, as_index=False).sum() for item in results]
+    # typed columns such as categories cannot be summed so only numbers are
+    results = [
+        item.dataframe.groupby(results.group_by, as_index=False, observed=True).sum(numeric_only=True)
+        for item in results
+    ]
     data = None
     for index, dataframe in enumerate(results):
         if index == 0:
@@ -168,7 +172,7 @@ def _merge(results, collation):
     results = [dd.dataframe(item.dataframe, npartitions=collation.partitions) for item in results]
 
     Logger().info('Creating merge table')
-    merge_start = time.clock()
+    merge_start = time.perf_counter()
     for index, item in enumerate(results):
         columns = [
             column
@@ -193,7 +197,7 @@ def _merge(results, collation):
             )
     Logger().info(
         'Merge table created in {0} seconds. ({1} rows)'.format(
-            time.clock() - merge_start,
+            time.perf_counter() - merge_start,
             len(data.index)
         )
     )
@@ -264,7 +268,7 @@ def combinatorics(results, collation):
             "exclusive_query": ""
         }
     """
-    method_start = time.clock()
+    method_start = time.perf_counter()
     parser = LanguageParser()
     extractor = DataExtraction(unique_keys=collation.join.column)
     sizes = {}
@@ -283,8 +287,10 @@ def combinatorics(results, collation):
     extractor.search(queries, results, collation.join.column)
     while not extractor.complete:
         time.sleep(Threadable.THREAD_SLEEP)
+    if extractor.failure is not None:
+        raise extractor.failure
     extractor.set_results(queries, collation.join.column)
 
-    Logger().info('Collation completed in {0} seconds'.format((time.clock() - method_start)))
+    Logger().info('Collation completed in {0} seconds'.format((time.perf_counter() - method_start)))
     results.dataframe = (extractor, None)
     return extractor
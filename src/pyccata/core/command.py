@@ -8,6 +8,9 @@ Create threadable calls to the shell
 import os
 import re
 import shlex
+import signal
+from functools import partial
+from threading import Timer
 from subprocess import Popen
 from pyccata.core.log import Logger
 from pyccata.core.decorators import accepts
@@ -32,6 +35,7 @@ class ThreadableCommand(Threadable):
     # accessor methods.
 
     MAX_PRIORITY = 10000
+    KILL_GRACE = 5.0
     PRIORITY = 0
     _redirect_regex = None
     _commands = None
@@ -118,7 +122,9 @@ class ThreadableCommand(Threadable):
         )
 
         self._build_command(command)
-        self._block = wait_for
+        self._block = self.threadmanager.find(wait_for) if isinstance(wait_for, str) else wait_for
+        if self._block is not None:
+            self.depends_on(self._block)
 
     @accepts(str)
     def _build_command(self, command_string):
@@ -169,18 +175,31 @@ class ThreadableCommand(Threadable):
         Executes the current thread
         """
         processes = []
+        # each process leads its own group so cancelling the thread also stops anything it spawned
+        self.token.on_cancel(partial(ThreadableCommand._terminate, processes))
         for command in self._commands:
+            if self.cancelled:
+                break
             last_pipe = processes[-1].stdout if len(processes) > 0 else None
             processes.append(
                 Popen(
                     [command.command] + command.arguments,
                     stdin=last_pipe,
                     stdout=command.stdout,
-                    stderr=command.stderr
+                    stderr=command.stderr,
+                    start_new_session=True
                 )
             )
             command.return_code = processes[-1].poll()
 
+        if self.cancelled:
+            # the token may have fired before the last process was started
+            ThreadableCommand._terminate(processes)
+            for process in processes:
+                process.communicate()
+            self.failure = self.token.reason
+            return
+
         if processes[-1].stdout is not None and hasattr(processes[-1].stdout, 'readline'):
             for line in iter(processes[-1].stdout.readline, b''):
                 item = CommandLineResultItem()
@@ -192,10 +211,34 @@ class ThreadableCommand(Threadable):
             for line in iter(processes[-1].stderr.readline, b''):
                 stderr.append(line.decode('utf8').strip())
         processes[-1].communicate()
+        if self.cancelled:
+            self.failure = self.token.reason
+            return
         if len(stderr) != 0:
             self.failure = ThreadFailedError(stderr)
         self._complete = True
 
+    @staticmethod
+    def _terminate(processes, sig=signal.SIGTERM):
+        """
+        Signal the process group of every process still running
+
+        @param processes list
+        @param sig       int
+
+        Processes still running ``KILL_GRACE`` seconds after SIGTERM are sent SIGKILL.
+        """
+        running = [process for process in processes if process.poll() is None]
+        for process in running:
+            try:
+                os.killpg(process.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                pass
+        if len(running) > 0 and sig != signal.SIGKILL:
+            escalate = Timer(ThreadableCommand.KILL_GRACE, ThreadableCommand._terminate, (running, signal.SIGKILL))
+            escalate.daemon = True
+            escalate.start()
+
     @staticmethod
     def replacements(string_to_search):
         """
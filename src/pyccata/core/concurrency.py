@@ -0,0 +1,220 @@
+"""
+Adapts how many threads of each class the ThreadManager runs at once
+
+@package pyccata.core
+"""
+from threading import Lock
+from time import monotonic
+import psutil
+from pyccata.core.decorators import accepts
+from pyccata.core.exceptions import InvalidQueryError
+
+class AdaptiveLimit(object):
+    """
+    Additive increase, multiplicative decrease limit on the number of threads in flight
+
+    Whilst the limit is being reached and run times stay close to the best
+    seen, the limit grows by one for every ``limit`` threads which finish.
+    Until the first back-off it grows by one for every thread which finishes.
+    This doubles it each round, so the right level is found quickly.
+
+    Failures halve the limit. Run times beyond ``tolerance`` times the best
+    seen cut it by a tenth. Either backs off at most once for every ``limit``
+    threads which finish, so a burst of slow or failed threads backs off once.
+    """
+    # pylint: disable=too-many-instance-attributes
+    TOLERANCE = 2.0
+    FAILURE_BACKOFF = 0.5
+    LATENCY_BACKOFF = 0.9
+    SMOOTHING = 0.2
+
+    _limit = 1.0
+    _minimum = 1
+    _maximum = 1
+    _in_flight = 0
+    _baseline = None
+    _average = None
+    _since_decrease = 0
+    _slow_start = True
+
+    @accepts(int, int, int)
+    def __init__(self, initial, minimum, maximum):
+        """
+        @param initial int The limit to start from
+        @param minimum int The limit never falls below this
+        @param maximum int The limit never rises above this
+        """
+        self._minimum = max(minimum, 1)
+        self._maximum = max(maximum, self._minimum)
+        self._limit = float(min(max(initial, self._minimum), self._maximum))
+        self._in_flight = 0
+        self._baseline = None
+        self._average = None
+        self._since_decrease = self.limit
+        self._slow_start = True
+
+    @property
+    def limit(self):
+        """ Get the number of threads which may currently be in flight """
+        return int(self._limit)
+
+    @property
+    def in_flight(self):
+        """ Get the number of threads currently in flight """
+        return self._in_flight
+
+    @property
+    def available(self):
+        """ May another thread start? """
+        return self._in_flight < self.limit
+
+    def acquire(self):
+        """ Record that a thread has started """
+        self._in_flight += 1
+
+    def release(self, latency, failed):
+        """
+        Record that a thread has finished and adjust the limit
+
+        @param latency float|None Seconds the thread spent running
+        @param failed  bool       Did the thread fail in a way which suggests overload?
+        """
+        saturated = self._in_flight >= self.limit
+        self._in_flight = max(self._in_flight - 1, 0)
+        self._since_decrease += 1
+        if failed:
+            self._decrease(AdaptiveLimit.FAILURE_BACKOFF)
+            return
+        if latency is None:
+            return
+
+        # the baseline follows the fastest run but drifts up so a permanently slower back-end is re-learnt
+        if self._baseline is None or latency < self._baseline:
+            self._baseline = latency
+        else:
+            self._baseline += (latency - self._baseline) * 0.01
+        if self._average is None:
+            self._average = latency
+        else:
+            self._average += (latency - self._average) * AdaptiveLimit.SMOOTHING
+
+        if self._average > self._baseline * AdaptiveLimit.TOLERANCE:
+            self._decrease(AdaptiveLimit.LATENCY_BACKOFF)
+        elif saturated:
+            step = 1.0 if self._slow_start else 1.0 / self._limit
+            self._limit = min(self._limit + step, float(self._maximum))
+
+    def _decrease(self, factor):
+        """ Shrink the limit, at most once for each round of threads """
+        if self._since_decrease < self.limit:
+            return
+        self._since_decrease = 0
+        self._slow_start = False
+        self._limit = max(self._limit * factor, float(self._minimum))
+
+class ConcurrencyController(object):
+    """
+    Decides whether a thread may be dispatched based on the observed behaviour of its class
+
+    Each Threadable class gets its own AdaptiveLimit so that throttled network
+    queries and memory hungry merges each find their own level. Whilst free
+    memory is below ``headroom`` of the total, nothing new is started unless
+    nothing is running at all.
+    """
+    MEMORY_CHECK_INTERVAL = 0.5
+
+    _initial = 1
+    _maximum = 1
+    _headroom = 0.0
+    _limits = None
+    _in_flight = 0
+    _memory_checked = 0.0
+    _memory_low = False
+    _lock = None
+
+    @accepts(int, int, float)
+    def __init__(self, initial, maximum, headroom):
+        """
+        @param initial  int   The starting limit for each class
+        @param maximum  int   The largest limit any class may reach
+        @param headroom float Fraction of total memory which must remain available to start more threads
+        """
+        self._initial = initial
+        self._maximum = maximum
+        self._headroom = headroom
+        self._limits = {}
+        self._in_flight = 0
+        self._memory_checked = 0.0
+        self._memory_low = False
+        self._lock = Lock()
+
+    @property
+    def limits(self):
+        """ Get the current limit for each class of thread which has run """
+        with self._lock:
+            return dict((name, limit.limit) for name, limit in self._limits.items())
+
+    def _limit(self, thread):
+        """ Get the limit for the class of a thread. Must be called with the lock held """
+        name = thread.__class__.__name__
+        if name not in self._limits:
+            self._limits[name] = AdaptiveLimit(self._initial, 1, self._maximum)
+        return self._limits[name]
+
+    @property
+    def memory_low(self):
+        """
+        Is available memory below the headroom?
+
+        Only re-checked every ``MEMORY_CHECK_INTERVAL`` seconds.
+        """
+        now = monotonic()
+        if now - self._memory_checked >= ConcurrencyController.MEMORY_CHECK_INTERVAL:
+            memory = psutil.virtual_memory()
+            self._memory_low = memory.available < memory.total * self._headroom
+            self._memory_checked = now
+        return self._memory_low
+
+    def allow(self, thread):
+        """
+        May the thread be dispatched now?
+
+        @param thread Threadable
+
+        @return bool
+        """
+        with self._lock:
+            if self._in_flight == 0:
+                return True
+            if not self._limit(thread).available:
+                return False
+            return not self.memory_low
+
+    def started(self, thread):
+        """
+        Record that a thread has been dispatched
+
+        @param thread Threadable
+        """
+        with self._lock:
+            self._limit(thread).acquire()
+            self._in_flight += 1
+
+    def finished(self, thread, latency):
+        """
+        Record that a dispatched thread has finished
+
+        @param thread  Threadable
+        @param latency float|None Seconds spent running
+        """
+        # a bad query says nothing about how loaded the back-end is
+        failed = thread.failed and not isinstance(thread.failure, InvalidQueryError)
+        with self._lock:
+            self._limit(thread).release(latency, failed)
+            self._in_flight = max(self._in_flight - 1, 0)
+
+    def clear(self):
+        """ Forget everything learnt """
+        with self._lock:
+            self._limits.clear()
+            self._in_flight = 0
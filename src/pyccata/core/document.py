@@ -26,6 +26,9 @@ class DocumentController(ControllerAbstract):
         for section in self.configuration.report.sections:
             self._sections.append(self.partfactory.section(self.threadmanager, section))
 
+        # only fetch the fields the sections read
+        self.threadmanager.querymanager.project(list(self.threadmanager))
+
         # main build of document data
         self.threadmanager.start()
 
@@ -0,0 +1,188 @@
+"""
+Resumable downloads which never disturb a file that is already complete
+
+A download is written to ``<file>.part`` and only moved over the file once
+every byte has arrived. The size and SHA-256 of each finished file are kept
+beside it in ``.<file>.download`` so that a later run can tell the file is
+complete and skip it. An interrupted download is resumed from the end of its
+part file with a Range request, provided the server answers from that byte.
+
+@package pyccata.core
+"""
+import os
+import re
+import json
+import hashlib
+from pyccata.core.decorators import accepts
+from pyccata.core.log import Logger
+
+class Download(object):
+    """
+    A single file fetched over a PooledSession
+    """
+    CHUNK_SIZE = 64 * 1024
+    PART = '.part'
+    MANIFEST = '.download'
+    TIMEOUT = 60
+    CONTENT_RANGE = re.compile(r'^\s*bytes\s+(\d+)-')
+
+    _url = None
+    _path = None
+    _size = None
+    _timeout = None
+
+    @accepts(str, str, size=(None, int), timeout=(None, int, float))
+    def __init__(self, url, path, size=None, timeout=None):
+        """
+        @param url     string
+        @param path    string         Where the file is saved
+        @param size    int|None       Bytes the file should have, when the server has said
+        @param timeout int|float|None Seconds to wait for the server to connect or send more
+        """
+        self._url = url
+        self._path = path
+        self._size = size
+        self._timeout = timeout
+
+    @property
+    def timeout(self):
+        """ Get the seconds to wait for the server to connect or send more """
+        return self._timeout if self._timeout is not None else Download.TIMEOUT
+
+    @property
+    def path(self):
+        """ Get where the file is saved """
+        return self._path
+
+    @property
+    def partial(self):
+        """ Get where the file is written whilst it downloads """
+        return self._path + Download.PART
+
+    @property
+    def manifest(self):
+        """ Get where the size and checksum of the finished file are recorded """
+        directory, filename = os.path.split(self._path)
+        return os.path.join(directory, '.' + filename + Download.MANIFEST)
+
+    @property
+    def complete(self):
+        """
+        Is the file already downloaded?
+
+        True when the file has the size and checksum recorded when it finished
+        downloading, and that size is the one the server reports.
+        """
+        try:
+            with open(self.manifest, 'r') as manifest_file:
+                manifest = json.load(manifest_file)
+            if os.path.getsize(self._path) != manifest['size']:
+                return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if self._size is not None and self._size != manifest['size']:
+            return False
+        checksum = hashlib.sha256()
+        with open(self._path, 'rb') as existing:
+            for chunk in iter(lambda: existing.read(Download.CHUNK_SIZE), b''):
+                checksum.update(chunk)
+        return checksum.hexdigest() == manifest.get('sha256')
+
+    def fetch(self, session):
+        """
+        Download the file unless it is already complete
+
+        @param session PooledSession
+
+        @return bool True if the file is complete afterwards
+
+        Failures are logged and leave any part file in place to be resumed. When
+        the server answers a Range request from any byte but the end of the part
+        file, the part file is dropped and the whole file downloaded again.
+        """
+        if self.complete:
+            Logger().info('Skipping \'{0}\', already downloaded'.format(os.path.basename(self._path)))
+            return True
+
+        checksum = hashlib.sha256()
+        offset = self._resume(checksum)
+        headers = {'Range': 'bytes={0}-'.format(offset)} if offset > 0 else {}
+        response = session.get(self._url, stream=True, headers=headers, timeout=self.timeout)
+        try:
+            if response.status_code == 416 and offset > 0 and self._size in (None, offset):
+                return self._finish(checksum, offset)
+            if response.status_code == 416:
+                os.remove(self.partial)
+            if response.status_code not in (200, 206):
+                Logger().error(
+                    'Error in downloading attachments. Got response code {0}'.format(response.status_code)
+                )
+                return False
+            if response.status_code == 200 and offset > 0:
+                # the server ignored the range so starts again from the beginning
+                checksum = hashlib.sha256()
+                offset = 0
+            if response.status_code == 206 and Download._range_start(response) != offset:
+                Logger().warning(
+                    'Server did not resume \'{0}\' from byte {1}, downloading again'.format(
+                        os.path.basename(self._path), offset
+                    )
+                )
+                response.close()
+                os.remove(self.partial)
+                return self.fetch(session)
+
+            with open(self.partial, 'ab' if offset > 0 else 'wb') as part_file:
+                for chunk in response.iter_content(chunk_size=Download.CHUNK_SIZE):
+                    part_file.write(chunk)
+                    checksum.update(chunk)
+                    offset += len(chunk)
+        finally:
+            response.close()
+        return self._finish(checksum, offset)
+
+    @staticmethod
+    def _range_start(response):
+        """
+        Get the first byte a partial response holds
+
+        @param response requests.Response
+
+        @return int|None None when the response does not say
+        """
+        match = Download.CONTENT_RANGE.match(response.headers.get('Content-Range', ''))
+        return int(match.group(1)) if match is not None else None
+
+    def _resume(self, checksum):
+        """
+        Get the number of bytes already in the part file, adding them to the checksum
+
+        @param checksum hashlib object
+        """
+        try:
+            offset = os.path.getsize(self.partial)
+        except OSError:
+            return 0
+        if offset == 0 or (self._size is not None and offset > self._size):
+            return 0
+        with open(self.partial, 'rb') as part_file:
+            for chunk in iter(lambda: part_file.read(Download.CHUNK_SIZE), b''):
+                checksum.update(chunk)
+        return offset
+
+    def _finish(self, checksum, size):
+        """
+        Move a finished part file into place and record its size and checksum
+
+        @param checksum hashlib object
+        @param size     int    Bytes received
+
+        @return bool False if the file is shorter or longer than the server said
+        """
+        if self._size is not None and size != self._size:
+            Logger().error('Download of \'{0}\' has {1} bytes, expected {2}'.format(self._path, size, self._size))
+            return False
+        os.replace(self.partial, self._path)
+        with open(self.manifest, 'w') as manifest_file:
+            json.dump({'size': size, 'sha256': checksum.hexdigest()}, manifest_file)
+        return True
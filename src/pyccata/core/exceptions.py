@@ -2,6 +2,10 @@
 Application package exceptions
 
 """
+from datetime import datetime
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+
 class ArgumentMismatchError(ValueError):
     """
     Raised when loading ThreadableDocument if init kwargs to not match setup kwargs
@@ -81,6 +85,17 @@ class InvalidModuleError(ValueError):
     def __str__(self):
         return self.error
 
+class InvalidFieldMapError(ValueError):
+    """
+    Raised when an entry of a field map asks for a transform which does not exist
+    """
+    def __init__(self, attribute, transform):
+        self.error = 'Invalid transform \'{0}\' for field \'{1}\''.format(transform, attribute)
+        super().__init__(self.error)
+
+    def __str__(self):
+        return self.error
+
 class InvalidConnectionError(Exception):
     """
     Raised whilst trying to set up a connection to a 3rd party service
@@ -92,6 +107,55 @@ class InvalidConnectionError(Exception):
         self._headers = headers
         super().__init__(self._error)
 
+    @property
+    def code(self):
+        """ Get the HTTP status code returned by the service """
+        return self._code
+
+    @property
+    def server(self):
+        """ Get the address of the service """
+        return self._server
+
+    @property
+    def retryable(self):
+        """
+        Is the failure one which may go away if the request is made again?
+
+        Throttling (429), timeouts (408), server errors and failures without a
+        response are. Anything else, such as bad credentials, will not.
+        """
+        try:
+            code = int(self._code)
+        except (TypeError, ValueError):
+            return True
+        return code in (0, 408, 429) or code >= 500
+
+    @property
+    def retry_after(self):
+        """
+        Get the number of seconds the service asked us to wait in its ``Retry-After`` header
+
+        @return float|None None if the header is missing or cannot be read
+        """
+        value = None
+        for name, header in dict(self._headers or {}).items():
+            if name.lower() == 'retry-after':
+                value = str(header).strip()
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
     def __str__(self):
         message = "Recieved HTTP/{code} whilst establishing connection to {server}\n\n".format(
             code=self._code,
@@ -123,6 +187,14 @@ class ThreadNotStartedError(RuntimeError):
     """ Called when a thread has not been started """
     pass
 
+class ThreadCancelledError(RuntimeError):
+    """ Raised when a thread is stopped before it could finish """
+    pass
+
+class ThreadTimeoutError(ThreadCancelledError):
+    """ Raised when a thread is stopped because it ran out of time """
+    pass
+
 class InvalidFilenameError(ValueError):
     """ Called when the filename provided does not match a specific format """
     def __init__(self, message):
@@ -5,8 +5,11 @@ Contains helper classes for working within the collation / correlation engine
 import os
 import math
 import time
+import tempfile
+from collections import OrderedDict
 import psutil
 import numpy as np
+import pyarrow
 from pyupset import DataExtractor
 from pyccata.core.interface import ResultListItemInterface
 from pyccata.core.threading import Threadable
@@ -38,6 +41,84 @@ class PartitionSet(object):
         self._right = right_frame
 
 
+class SharedFrame(object):
+    """
+    Writes a dataframe to a memory mapped Arrow IPC file so that worker
+    processes can read it by path instead of having it pickled to them.
+
+    The parent process keeps hold of the original dataframe.
+
+    Each worker process keeps the last ``CACHE_SIZE`` frames it has loaded so
+    every query against the same merge table shares a single copy.
+    """
+    CACHE_SIZE = 2
+    _loaded = OrderedDict()
+    _path = None
+    _dataframe = None
+
+    def __init__(self, dataframe):
+        """
+        :param pandas.DataFrame: dataframe
+
+        :raises: pyarrow.ArrowException if the dataframe cannot be converted,
+                 for example object columns holding mixed types.
+        """
+        self._dataframe = dataframe
+        handle, self._path = tempfile.mkstemp(prefix='pyccata-', suffix='.arrow')
+        os.close(handle)
+        try:
+            table = pyarrow.Table.from_pandas(dataframe, preserve_index=True)
+            with pyarrow.OSFile(self._path, 'wb') as sink:
+                with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        except Exception:
+            self.release()
+            raise
+
+    @property
+    def path(self):
+        """ Get the path to the Arrow file """
+        return self._path
+
+    @property
+    def dataframe(self):
+        """ Get the dataframe held by the parent process """
+        return self._dataframe
+
+    @staticmethod
+    def load(path):
+        """
+        Open a shared frame from a worker process
+
+        :param string: path
+
+        :return: pandas.DataFrame
+
+        Column buffers are read directly from the memory map. Numeric columns
+        without nulls are used in place rather than copied.
+        """
+        status = os.stat(path)
+        key = (path, status.st_ino, status.st_mtime_ns)
+        if key in SharedFrame._loaded:
+            SharedFrame._loaded.move_to_end(key)
+            return SharedFrame._loaded[key]
+
+        source = pyarrow.memory_map(path, 'r')
+        dataframe = pyarrow.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+        SharedFrame._loaded[key] = dataframe
+        while len(SharedFrame._loaded) > SharedFrame.CACHE_SIZE:
+            SharedFrame._loaded.popitem(last=False)
+        return dataframe
+
+    def release(self):
+        """
+        Remove the Arrow file. Workers which still have the file mapped are unaffected.
+        """
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+        self._path = None
+        self._dataframe = None
+
 class Partition(object):
     """
     Given a pandas dataframe, will split the index into n parts of size x
@@ -89,6 +170,7 @@ class PartitionRunner(Threadable):
     """
     # pylint: disable=too-many-instance-attributes
     PRIORITY = 1200
+    EXECUTOR = Threadable.THREAD
     PARTITION_SIZE = 1
     MAX_THRESHOLD = 16
 
@@ -245,7 +327,7 @@ class PartitionRunner(Threadable):
         Run the quries over the merge table inside a thread
         """
         # pylint: disable=too-many-locals
-        loop_start = time.clock()
+        loop_start = time.perf_counter()
         partitions = []
         for item in self._results:
             partitions.append(
@@ -256,6 +338,8 @@ class PartitionRunner(Threadable):
 
         index = 0
         while index < self.PARTITION_SIZE:
+            if self.abandon():
+                return
             merge_sets = []
             combination = ['\033[1m{0}\033[0m'.format(self._mappings[self._primary_dataset])]
             for partition in partitions:
@@ -273,12 +357,14 @@ class PartitionRunner(Threadable):
             )
 
             for size in range(self.PARTITION_SIZE):
+                if self.abandon():
+                    return
                 self._running = []
-                q_start = time.clock()
+                q_start = time.perf_counter()
                 merge_table = self.merge(
                     merge_sets + [{'name': primary_dataset.name, 'data': primary_dataset.next()}]
                 )
-                m_end = '{0:.2f}'.format(float(time.clock() - q_start))
+                m_end = '{0:.2f}'.format(float(time.perf_counter() - q_start))
                 Logger().debug(
                     'Combination {0} merge table completed in {1} seconds ({2} rows)'.format(
                         ''.join(combination),
@@ -286,12 +372,29 @@ class PartitionRunner(Threadable):
                         len(merge_table.index)
                     )
                 )
-                for query in self._queries:
-                    self._running.append(
-                        DataThreader(merge_table, query, self._unique_columns)
-                    )
+                # worker processes read the merge table from a memory map rather than a pickle
+                shared = merge_table
+                if DataThreader.EXECUTOR == Threadable.PROCESS:
+                    try:
+                        shared = SharedFrame(merge_table)
+                    except (pyarrow.ArrowException, OSError) as exception:
+                        Logger().warning('Cannot share merge table with worker processes. Querying in process')
+                        Logger().warning(exception)
+                try:
+                    for query in self._queries:
+                        self._running.append(
+                            DataThreader(shared, query, self._unique_columns)
+                        )
+                    self.monitor()
+                finally:
+                    if isinstance(shared, SharedFrame):
+                        shared.release()
+
+                if self.failed:
+                    Logger().error('Data extraction failed for combination {0}'.format(''.join(combination)))
+                    Logger().error(self.failure)
+                    return
 
-                self.monitor()
                 times = [item.duration for item in self._running]
                 message = '{4}\n    Combination {0}, Index {5}/{1}'
                 message += ', merge_table size: {2}.\n    Average time per query {3}'
@@ -309,7 +412,7 @@ class PartitionRunner(Threadable):
                 del merge_table
                 del self._running
 
-            end_time = math.floor(time.clock() - loop_start)
+            end_time = math.floor(time.perf_counter() - loop_start)
             Logger().info('=========================================================================================')
             Logger().info(
                 'Completed partition {0} in {1} seconds. {2} queries, combination: {3}'.format(
@@ -328,23 +431,29 @@ class PartitionRunner(Threadable):
 
     def monitor(self):
         """
-        Wait for all child threads to complete
+        Wait for all child threads to complete or fail
+
+        The first failure is passed up to this runner. Cancelling the runner cancels its queries.
         """
         while True:
+            if self.cancelled:
+                for thread in self._running:
+                    thread.cancel(self.token.reason)
             complete = True
             for thread in self._running:
-                if not thread.complete:
+                if not (thread.complete or thread.failed):
                     complete = False
-
-                if thread.complete:
+                elif thread.ident is not None:
                     thread.join()
-                elif thread.failed:
-                    pass
 
             if complete:
                 break
             time.sleep(Threadable.THREAD_SLEEP)
 
+        for thread in self._running:
+            if thread.failed and not self.failed:
+                self.failure = thread.failure
+
 class DataThreader(Threadable):
     """
     A high priority threading interface for executing searches
@@ -352,6 +461,7 @@ class DataThreader(Threadable):
     """
 
     PRIORITY = 1500
+    EXECUTOR = Threadable.PROCESS
     _query = None
     _data = None
     _results = None
@@ -383,7 +493,7 @@ class DataThreader(Threadable):
         """
         Set up a new data-filter as a threaded object
 
-        :param merge_table: pandas.DataFrame object
+        :param merge_table: pandas.DataFrame|SharedFrame object
         :param query: string
         """
         # pylint: disable=arguments-differ
@@ -391,30 +501,85 @@ class DataThreader(Threadable):
         self._data = merge_table
         self._query = query
         self._unique_columns = unique_columns
+        if self.EXECUTOR == Threadable.PROCESS and not isinstance(merge_table, SharedFrame):
+            # the table could not be shared so query it in this process
+            self.EXECUTOR = Threadable.CPU
         ThreadManager().append(self)
 
-    def run(self):
+    @staticmethod
+    def extract(data, inclusive, exclusive, in_sets, unique_columns):
         """
-        Execute filter
+        Filter the merge table down to the columns of the sets in the query
+
+        :param pandas.DataFrame|string: data The merge table or the path to a SharedFrame
+        :param string: inclusive
+        :param string: exclusive
+        :param list: in_sets
+        :param list|string: unique_columns
+
+        :return: pandas.DataFrame
         """
-        if self._query is None:
-            raise ThreadFailedError('No query specified for thread \'{0}\''.format(self.name))
+        if isinstance(data, str):
+            data = SharedFrame.load(data)
 
-        self._start_time = time.clock()
-        interim = self._data.query(self._query.query.inclusive)
-        results = interim if self._query.query.exclusive is None else interim.query(self._query.query.exclusive)
+        interim = data.query(inclusive)
+        results = interim if exclusive is None else interim.query(exclusive)
 
-        columns = [self._unique_columns]
-        for dataframe in self._query.in_sets:
+        columns = [unique_columns]
+        for dataframe in in_sets:
             for column in results.columns:
                 if column.endswith(dataframe):
                     columns.append(column)
+        return results[columns]
 
-        self._query.append_results(results[columns])
-        del results
-        self._end_time = time.clock()
+    def task(self):
+        """
+        Execute the filter in a worker process against the shared merge table
+        """
+        if self._query is None:
+            raise ThreadFailedError('No query specified for thread \'{0}\''.format(self.name))
+
+        self._start_time = time.perf_counter()
+        return (
+            DataThreader.extract,
+            (
+                self._data.path if isinstance(self._data, SharedFrame) else self._data,
+                self._query.query.inclusive,
+                self._query.query.exclusive,
+                list(self._query.in_sets),
+                self._unique_columns
+            )
+        )
+
+    def collect(self, result):
+        """
+        Store the results returned from the worker process against the query
+        """
+        # results which arrive after cancellation are dropped
+        if self.abandon():
+            return
+        self._query.append_results(result)
+        self._end_time = time.perf_counter()
         self._complete = True
 
+    def run(self):
+        """
+        Execute filter
+        """
+        if self._query is None:
+            raise ThreadFailedError('No query specified for thread \'{0}\''.format(self.name))
+
+        self._start_time = time.perf_counter()
+        self.collect(
+            DataThreader.extract(
+                self._data.dataframe if isinstance(self._data, SharedFrame) else self._data,
+                self._query.query.inclusive,
+                self._query.query.exclusive,
+                self._query.in_sets,
+                self._unique_columns
+            )
+        )
+
 class DataExtraction(DataExtractor):
     """
     Override for wrapping combinatorics data
@@ -476,13 +641,23 @@ class DataExtraction(DataExtractor):
     @property
     def complete(self):
         """
-        Has the current thread pool completed
+        Has the current thread pool completed or failed
         """
         for runner in self._runners:
-            if not runner.complete:
+            if not (runner.complete or runner.failed):
                 return False
         return True
 
+    @property
+    def failure(self):
+        """
+        Get the first failure raised by a partition runner, if any
+        """
+        for runner in self._runners:
+            if runner.failed:
+                return runner.failure
+        return None
+
     def set_results(self, results, unique_keys):
         """
         Set the results of the extraction
@@ -0,0 +1,256 @@
+"""
+Declarative mapping of back-end fields onto Issue attributes
+
+Each entry names an ``Issue`` attribute, the id of the field it is read from
+and an optional transform. The map is compiled once into a list of
+extractors which read a page of issues one column at a time, straight from
+the JSON returned by the back-end, rather than probing every attribute of
+every issue.
+
+@package pyccata.core
+"""
+import os
+from collections import OrderedDict
+import pandas as pd
+from pyccata.core.decorators import accepts
+from pyccata.core.exceptions import InvalidFieldMapError
+from pyccata.core.resources import Issue
+from pyccata.core.resources import Attachment
+
+class RawResource(object):
+    """
+    Attribute access onto a JSON object returned by the back-end
+
+    Nested objects are wrapped as they are read so that ``issue.status.name``
+    works as it does for the resources of the client library, without
+    building the whole tree up front.
+    """
+    # pylint: disable=too-few-public-methods
+    __slots__ = ('raw',)
+
+    # The same preference the client library uses when printing a resource
+    READABLE = ('displayName', 'key', 'name', 'filename', 'value', 'scope', 'votes', 'id', 'mimeType', 'closed')
+
+    def __init__(self, raw):
+        """
+        @param raw dict
+        """
+        self.raw = raw
+
+    def __getattr__(self, name):
+        # raw itself is missing whilst the object is being copied or unpickled
+        if name == 'raw':
+            raise AttributeError(name)
+        try:
+            return wrap(self.raw[name])
+        except KeyError:
+            raise AttributeError(name)
+
+    def __str__(self):
+        for name in RawResource.READABLE:
+            if name in self.raw:
+                return str(self.raw[name])
+        return repr(self)
+
+    def __reduce__(self):
+        return (RawResource, (self.raw,))
+
+def wrap(value):
+    """
+    Wrap JSON objects in RawResource so their keys may be read as attributes
+
+    @param value mixed
+
+    Anything which is not a JSON object, or a list of them, is returned as is.
+    """
+    if isinstance(value, dict):
+        return RawResource(value)
+    if isinstance(value, list):
+        return [wrap(item) for item in value]
+    return value
+
+def _attribute(value, name):
+    """ Read a key of a JSON object, or an attribute of any other object """
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+def _pluck(name):
+    """
+    Get a transform which keeps a single attribute of a value, or of each item of a list
+
+    @param name string
+    """
+    def transform(value):
+        """ Keep ``name`` from the value """
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return [_attribute(item, name) for item in value]
+        return _attribute(value, name)
+    return transform
+
+def _attachments(value):
+    """ Convert attachment metadata into ``pyccata.core.resources.Attachment`` objects """
+    result_set = []
+    for attachment in value if value is not None else []:
+        item = Attachment()
+        item.filename = _attribute(attachment, 'filename')
+        item.attachment_id = _attribute(attachment, 'id')
+        item.mime_type = _attribute(attachment, 'mimeType')
+        item.size = _attribute(attachment, 'size')
+        item.extension = os.path.splitext(item.filename or '')[1][1:].strip()
+        result_set.append(item)
+    return result_set
+
+class _Attributes(object):
+    """ Gives issues built as objects rather than JSON the ``get`` of a dictionary """
+    # pylint: disable=too-few-public-methods
+    __slots__ = ('_fields',)
+
+    def __init__(self, fields):
+        self._fields = fields
+
+    def get(self, name):
+        """ Get an attribute of the fields, None if it is missing """
+        return getattr(self._fields, name, None)
+
+class FieldMap(object):
+    """
+    Compiled extractor from back-end issues to ``pyccata.core.resources.Issue``
+
+    Standard Jira fields are always mapped. Configured entries are added to
+    them and replace any standard entry for the same attribute.
+    """
+    # (Issue attribute, field id, transform)
+    STANDARD = [
+        ('summary', 'summary', None),
+        ('issuetype', 'issuetype', None),
+        ('created', 'created', None),
+        ('updated', 'updated', None),
+        ('priority', 'priority', None),
+        ('description', 'description', None),
+        ('status', 'status', None),
+        ('project', 'project', None),
+        ('fixVersions', 'fixVersions', None),
+        ('resolution', 'resolution', None),
+        ('resolutiondate', 'resolutiondate', None),
+        ('creator', 'creator', None),
+        ('assignee', 'assignee', None),
+        ('attachments', 'attachment', 'attachments')
+    ]
+
+    TRANSFORMS = {
+        'value': _pluck('value'),
+        'name': _pluck('name'),
+        'key': _pluck('key'),
+        'id': _pluck('id'),
+        'displayName': _pluck('displayName'),
+        'attachments': _attachments
+    }
+
+    _extractors = None
+    _template = None
+
+    @accepts(list)
+    def __init__(self, entries):
+        """
+        @param entries list Entries with ``identifier``, ``mapto`` and optionally ``transform``
+
+        @raise InvalidFieldMapError if an entry names an unknown transform
+        """
+        mapping = OrderedDict((attribute, (field, transform)) for attribute, field, transform in FieldMap.STANDARD)
+        for entry in entries:
+            mapping[entry.identifier] = (entry.mapto, getattr(entry, 'transform', None))
+
+        self._extractors = []
+        for attribute, (field, transform) in mapping.items():
+            if transform is not None and transform not in FieldMap.TRANSFORMS:
+                raise InvalidFieldMapError(attribute, transform)
+            self._extractors.append(
+                (attribute, field, FieldMap.TRANSFORMS[transform] if transform is not None else wrap)
+            )
+        self._template = Issue().__dict__
+
+    @property
+    def fields(self):
+        """ Get the ids of every field the map reads """
+        return [field for _, field, _ in self._extractors]
+
+    @accepts(list)
+    def project(self, attributes):
+        """
+        Get the fields holding some Issue attributes
+
+        @param attributes list Attribute names, compared without case and with spaces read as underscores
+
+        @return list|None The field ids, always with ``key``. None if any attribute is not mapped
+        """
+        names = dict((attribute.lower(), field) for attribute, field, _ in self._extractors)
+        fields = ['key']
+        for attribute in attributes:
+            name = str(attribute).replace(' ', '_').lower()
+            if name == 'key':
+                continue
+            if name not in names:
+                return None
+            fields.append(names[name])
+        return sorted(set(fields), key=fields.index)
+
+    @accepts(list)
+    def columns(self, issues):
+        """
+        Extract every mapped field of a page of issues
+
+        @param issues list JSON issues, or objects with ``key`` and ``fields`` attributes
+
+        @return OrderedDict A list of values for ``key`` and each mapped attribute
+        """
+        documents = [FieldMap._document(issue) for issue in issues]
+        columns = OrderedDict()
+        columns['key'] = [key for key, _ in documents]
+        for attribute, field, transform in self._extractors:
+            columns[attribute] = [transform(fields.get(field)) for _, fields in documents]
+        return columns
+
+    @accepts(list)
+    def issues(self, issues):
+        """
+        Convert a page of issues
+
+        @param issues list
+
+        @return list of ``pyccata.core.resources.Issue``
+        """
+        columns = self.columns(issues)
+        names = list(columns.keys())
+        converted = []
+        for values in zip(*columns.values()):
+            item = Issue.__new__(Issue)
+            attributes = dict(self._template)
+            attributes.update(zip(names, values))
+            item.__dict__ = attributes
+            converted.append(item)
+        return converted
+
+    @accepts(list)
+    def frame(self, issues):
+        """
+        Convert a page of issues into a pandas DataFrame with a column for each mapped attribute
+
+        @param issues list
+
+        @return pandas.DataFrame
+        """
+        return pd.DataFrame(self.columns(issues))
+
+    @staticmethod
+    def _document(issue):
+        """ Get the key and the fields of an issue """
+        if not isinstance(issue, dict):
+            raw = getattr(issue, 'raw', None)
+            if not isinstance(raw, dict):
+                fields = getattr(issue, 'fields', None)
+                return getattr(issue, 'key', None), _Attributes(fields)
+            issue = raw
+        return issue.get('key'), issue.get('fields') or {}
@@ -37,6 +37,10 @@ class Filter(Threadable):
     _projectmanager = None
     _observing = False
     _group_by = None
+    _predicates = None
+    _search_query = None
+    _search_fields = None
+    _fetched = None
 
     @property
     def projectmanager(self):
@@ -54,6 +58,57 @@ class Filter(Threadable):
         """ Get the query defined within this object """
         return self._query
 
+    @property
+    def search_query(self):
+        """ Get the query sent to the project manager, which may be wider than ``query`` """
+        return self._search_query if self._search_query is not None else self._query
+
+    @property
+    def search_fields(self):
+        """ Get the fields requested from the project manager """
+        return self._search_fields if self._search_query is not None else self._fields
+
+    @property
+    def predicates(self):
+        """ Get the conditions results must meet locally, None unless the filter shares a search """
+        return self._predicates
+
+    @predicates.setter
+    @accepts(list)
+    def predicates(self, predicates):
+        """
+        Set the conditions results must meet locally
+
+        @param predicates list of objects with a ``matches(item)`` method
+        """
+        self._predicates = predicates
+
+    @accepts(str, (None, list))
+    def widen(self, query, fields):
+        """
+        Search with a wider query than this filter needs so others can share the results
+
+        @param query  string
+        @param fields list|None
+        """
+        self._search_query = query
+        self._search_fields = fields
+
+    def _select(self, results):
+        """
+        Get the results which meet the local conditions of this filter
+
+        @param results ResultList
+        """
+        if self._predicates is None:
+            return results
+        return [item for item in results if all(predicate.matches(item) for predicate in self._predicates)]
+
+    @property
+    def collation(self):
+        """ Get the collation applied to the results, None if they are not collated """
+        return self._results.collation if self._results is not None else None
+
     @property
     def group_by(self):
         """ Get the clause to group results by """
@@ -151,9 +206,15 @@ class Filter(Threadable):
                 )
             )
             for observer in self._observers:
-                observer.notify(self._results.copy())
+                # observers sharing a wider search select their own results from everything fetched
+                coalesced = self._fetched is not None and getattr(observer, 'predicates', None) is not None
+                observer.notify((self._fetched if coalesced else self._results).copy())
         else:
-            self._results = results
+            if self._predicates is not None:
+                # keep the collation of this filter and only the results it asked for
+                self._results.extend(self._select(results))
+            else:
+                self._results = results
             self._complete = True
 
     def run(self):
@@ -165,11 +226,13 @@ class Filter(Threadable):
         """
         try:
             assert self.projectmanager is not None
+            if self.cancelled:
+                raise self.token.reason
             if not self._complete:
                 results = self.projectmanager.search_issues(
-                    search_query=self.query,
+                    search_query=self.search_query,
                     max_results=self.max_results,
-                    fields=self.fields,
+                    fields=self.search_fields,
                     group_by=self.group_by
                 )
                 if isinstance(results, MultiResultList):
@@ -184,8 +247,12 @@ class Filter(Threadable):
                     results._subquery = self._results._subquery
                     self._results = results
                 else:
-                    self._results.extend(results)
+                    self._fetched = results
+                    self._results.extend(self._select(results))
 
+            # a search which outlived its timeout is not passed on to observers
+            if self.cancelled:
+                raise self.token.reason
             self.notify(False)
             self._complete = True
         # pylint: disable=broad-except
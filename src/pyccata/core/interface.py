@@ -113,6 +113,28 @@ class ObservableInterface(metaclass=ABCMeta):
         """
         raise NotImplementedError('Method must be implemented by a child')
 
+class ExecutorInterface(metaclass=ABCMeta):
+    """
+    Interface for back-ends which execute Threadable objects
+    """
+
+    @abstractmethod
+    def submit(self, thread, callback):
+        """
+        Execute the run method of a Threadable object
+
+        @param thread   Threadable
+        @param callback function Called with the thread once its run method has exited
+        """
+        raise NotImplementedError('Method must be implemented by a child')
+
+    @abstractmethod
+    def shutdown(self):
+        """
+        Release any resources held by the executor
+        """
+        raise NotImplementedError('Method must be implemented by a child')
+
 class ReportingInterface(metaclass=ABCMeta):
     """
     Interface for implementing Report rendering types
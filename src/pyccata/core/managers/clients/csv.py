@@ -2,15 +2,23 @@
 Module for using CSV files as a manager
 """
 
+import io
 import os
+import re
+import json
+import math
+import tempfile
 from time import sleep
+from threading import Lock
 import pandas as pd
+import pyarrow
 from pyccata.core.abstract import ManagableAbstract
 from pyccata.core.decorators import accepts
 from pyccata.core.log import Logger
 from pyccata.core.resources import ResultList
 from pyccata.core.resources import MultiResultList
 from pyccata.core.threading import Threadable
+from pyccata.core.threading import ProcessExecutor
 from pyccata.core.exceptions import ThreadNotStartedError
 from pyccata.core.parser import LanguageParser
 from pyccata.core.helpers import resource
@@ -52,6 +60,13 @@ class Csv(ManagableAbstract):
         """
         self.client.threadmanager = threadmanager
 
+    @property
+    def sources(self):
+        """
+        Get the CSVFile threads loading the input files
+        """
+        return list(self.client)
+
     @property
     def client(self):
         """
@@ -63,11 +78,29 @@ class Csv(ManagableAbstract):
             if hasattr(self.configuration.csv, 'namespace')
             else self.configuration.NAMESPACE
         )
+        chunk_size = (
+            self.configuration.csv.chunk_size
+            if hasattr(self.configuration.csv, 'chunk_size')
+            else None
+        )
+        cache = (
+            self.configuration.csv.cache
+            if hasattr(self.configuration.csv, 'cache')
+            else False
+        )
+        split_size = (
+            self.configuration.csv.split_size
+            if hasattr(self.configuration.csv, 'split_size')
+            else None
+        )
         if not self._client or self._client is None:
             self._client = CSVClient(
                 self.configuration.csv.input_files,
                 datapath=self.configuration.csv.datapath,
-                namespace=namespace
+                namespace=namespace,
+                chunk_size=chunk_size,
+                cache=cache,
+                split_size=split_size
             )
         return self._client
 
@@ -87,11 +120,121 @@ class Csv(ManagableAbstract):
             results.combine = self.configuration.csv.combine_results
         return results
 
+    @accepts(str, fields=(None, list), columns=(None, list))
+    def anticipate(self, search_query, fields=None, columns=None):
+        """
+        Load only the columns which searches will use. See ``CSVClient.anticipate``
+        """
+        self.client.anticipate(search_query, fields=fields, columns=columns)
+
     def projects(self):
         """ Get a list of all files in use within the client """
         # pylint: disable=no-self-use
         return self.configuration.csv.input_files
 
+class FrameCache(object):
+    """
+    Sidecar file holding the parsed contents of a CSV file in Arrow IPC format
+
+    The cache for ``<path>/<file>`` is kept in ``<path>/.<file>.arrow`` and
+    records the path, size and modification time of the file and the
+    description of how it was parsed. It is only used whilst all of those are
+    unchanged, and is memory mapped rather than read.
+    """
+    VERSION = 1
+    SUFFIX = '.arrow'
+    METADATA = b'pyccata'
+
+    _source = None
+    _description = None
+
+    @accepts(str, dict)
+    def __init__(self, source, description):
+        """
+        @param source      string The CSV file
+        @param description dict   Anything which changes how the file is parsed, such as its columns and schema
+        """
+        self._source = os.path.abspath(source)
+        self._description = description
+
+    @property
+    def path(self):
+        """ Get where the cache is kept """
+        directory, filename = os.path.split(self._source)
+        return os.path.join(directory, '.' + filename + FrameCache.SUFFIX)
+
+    @property
+    def key(self):
+        """
+        Get what the cache must have been written from to be used
+
+        @return string
+        """
+        status = os.stat(self._source)
+        return json.dumps({
+            'version': FrameCache.VERSION,
+            'source': self._source,
+            'size': status.st_size,
+            'mtime': status.st_mtime_ns,
+            'description': self._description
+        }, sort_keys=True)
+
+    def load(self, columns=None):
+        """
+        Get the cached contents of the file
+
+        @param columns list|None The columns to get, or every column
+
+        @return pandas.DataFrame|None None if there is no cache, or it is stale or unreadable
+
+        Columns which are not asked for are never read from the memory map.
+        """
+        try:
+            source = pyarrow.memory_map(self.path, 'r')
+            table = pyarrow.ipc.open_file(source).read_all()
+            metadata = table.schema.metadata or {}
+            if metadata.get(FrameCache.METADATA, b'').decode('utf8') != self.key:
+                Logger().info('Cache of \'{0}\' is out of date'.format(self._source))
+                return None
+            if columns is not None:
+                table = table.select(columns)
+            return table.to_pandas(split_blocks=True)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, pyarrow.ArrowException) as exception:
+            Logger().warning('Cache of \'{0}\' cannot be read'.format(self._source))
+            Logger().warning(exception)
+            return None
+
+    def save(self, dataframe):
+        """
+        Replace the cache with the contents of the file
+
+        @param dataframe pandas.DataFrame
+
+        @return bool False if the cache could not be written, for example to a read-only data directory
+        """
+        handle, temporary = None, None
+        try:
+            key = self.key
+            table = pyarrow.Table.from_pandas(dataframe, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[FrameCache.METADATA] = key.encode('utf8')
+            table = table.replace_schema_metadata(metadata)
+            handle, temporary = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+            os.close(handle)
+            with pyarrow.OSFile(temporary, 'wb') as sink:
+                with pyarrow.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temporary, self.path)
+        except (OSError, ValueError, TypeError, pyarrow.ArrowException) as exception:
+            Logger().warning('Failed to cache \'{0}\''.format(self._source))
+            Logger().warning(exception)
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+            return False
+        return True
+
 class CSVFile(Threadable):
     """
     Thread load a CSV file and return it's contents as a ResultList
@@ -109,26 +252,141 @@ class CSVFile(Threadable):
         csvfile._dataframe.plot(kind='line', x='start', y='end').get_figure().savefig('test.png')
     """
     PRIORITY = 1001 # This must have a higher priority than a filter
+    EXECUTOR = Threadable.CPU
     _filename = None
     _namespace = None
     _dataframe = None
     _delimiter = ','
     _columns = None
+    _schema = None
+    _chunk_size = None
+    _cache = None
+    _split_size = None
+    _processes = None
+    _required = None
+    _fetch_lock = None
+
+    LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'')
+    NAME = re.compile(r'`([^`]+)`|([A-Za-z_]\w*)')
 
     added = False
 
-    @accepts(str, str, list)
-    def setup(self, filename, delimiter, columns):
+    @accepts(
+        str, str, list,
+        schema=(None, dict), chunk_size=(None, int), cache=bool, split_size=(None, int), processes=(None, ProcessExecutor)
+    )
+    def setup(self, filename, delimiter, columns, schema=None, chunk_size=None, cache=False, split_size=None,
+              processes=None):
         """
         Set up the CSVFile object
+
+        @param filename   string
+        @param delimiter  string
+        @param columns    list   The name of each column, in order
+        @param schema     dict   The pandas type of any column, keyed by name
+        @param chunk_size int    Rows read at a time when searching. The file is not loaded if set
+        @param cache      bool   Keep the parsed file in a FrameCache beside it
+        @param split_size int    Files larger than this many bytes are parsed in pieces by worker processes
+        @param processes  ProcessExecutor The worker processes which parse the pieces
         """
-        # pylint: disable=arguments-differ
+        # pylint: disable=arguments-differ,too-many-arguments
         # Parent method is *args **kwargs
         self._filename = filename
         assert os.stat(self.filename).st_size > 0
 
         self._delimiter = delimiter
         self._columns = columns
+        self._schema = schema
+        self._chunk_size = chunk_size
+        self._split_size = split_size
+        self._processes = processes
+        self._fetch_lock = Lock()
+        if cache:
+            self._cache = FrameCache(
+                filename,
+                {'delimiter': delimiter, 'columns': columns, 'schema': schema}
+            )
+
+    @property
+    def streaming(self):
+        """
+        Is the file read a chunk at a time by each search rather than loaded?
+
+        @return bool
+        """
+        return self._chunk_size is not None
+
+    @accepts((None, list))
+    def require(self, columns):
+        """
+        Declare columns a search of the file will use, before it is loaded
+
+        @param columns list|None None if the search may use every column
+
+        Until anything is declared every column is loaded. Afterwards only the
+        columns declared are, and any others are loaded by the first search
+        which needs them.
+        """
+        if columns is None or self._required is False:
+            self._required = False
+            return
+        required = self._required or []
+        self._required = required + [
+            column for column in self._columns if column in columns and column not in required
+        ]
+
+    @property
+    def required(self):
+        """
+        Get the columns which are loaded before any search
+
+        @return list|None None for every column
+        """
+        if not self._required:
+            return None
+        return [column for column in self._columns if column in self._required]
+
+    @accepts((None, str))
+    def referenced(self, query):
+        """
+        Get the columns a parsed query refers to
+
+        @param query string|None A query as given to ``DataFrame.query``
+
+        @return list Names inside quoted values are not columns so are ignored
+        """
+        if not query:
+            return []
+        names = set()
+        for quoted, name in CSVFile.NAME.findall(CSVFile.LITERAL.sub('', query)):
+            names.add(quoted or name)
+        return [column for column in self._columns if column in names]
+
+    def _needs(self, query, fields):
+        """
+        Get the columns a search uses
+
+        @param query  string|None
+        @param fields list|None
+
+        @return list|None None if the results hold every column
+        """
+        if not isinstance(fields, list) or len(fields) == 0:
+            return None
+        return self.referenced(query) + [field for field in fields if field in self._columns]
+
+    @property
+    def dtypes(self):
+        """
+        Get the types the schema gives columns, keyed by the position of the column
+
+        @return dict|None
+        """
+        if not self._schema:
+            return None
+        return dict(
+            (self._columns.index(column), dtype) for column, dtype in self._schema.items() if column in self._columns
+        )
 
     @property
     def filename(self):
@@ -148,20 +406,267 @@ class CSVFile(Threadable):
         """
         Loads the CSV file in a separate thread
         """
+        if self.streaming:
+            Logger().info('Streaming file \'{0}\' in chunks of {1} rows'.format(self._filename, self._chunk_size))
+            self._complete = True
+            return
+
         Logger().info('Loading file \'{0}\''.format(self._filename))
         try:
-            self._dataframe = pd.read_csv(
-                self._filename,
-                delimiter=self._delimiter,
-                header=None
-            )
-            self._dataframe.columns = self._columns
+            self._dataframe = self._load(self.required)
             self._complete = True
         # pylint: disable=broad-except
         # Any failure of the thread should be trapped and assigned to thread-failure state
         except Exception as exception:
             self.failure = exception
 
+    def _load(self, columns):
+        """
+        Get columns of the file, from its cache where it has one
+
+        @param columns list|None The columns to get, or every column
+
+        @return pandas.DataFrame
+        """
+        if self._cache is None:
+            return self._parse(columns)
+
+        dataframe = self._cache.load(columns)
+        if dataframe is not None:
+            Logger().info('Loaded file \'{0}\' from its cache'.format(self._filename))
+            return dataframe
+        # the cache holds every column so that it serves any later projection
+        dataframe = self._parse(None)
+        self._cache.save(dataframe)
+        return dataframe if columns is None else dataframe[columns]
+
+    def _parse(self, columns):
+        """
+        Parse columns of the file with the types of the schema, or untyped if it does not match
+
+        @param columns list|None The columns to parse, or every column
+
+        @return pandas.DataFrame
+        """
+        usecols = self._usecols(columns)
+        try:
+            dataframe = self._read(self._dtypes(usecols), usecols=usecols)
+        except (ValueError, TypeError) as exception:
+            if self.dtypes is None:
+                raise
+            # a blank or malformed value in a typed column
+            Logger().warning('File \'{0}\' does not match its schema. Loading untyped'.format(self._filename))
+            Logger().warning(exception)
+            dataframe = self._read(None, usecols=usecols)
+        dataframe.columns = self._names(usecols)
+        return dataframe
+
+    def _usecols(self, columns):
+        """
+        Get the positions of columns in the file
+
+        @param columns list|None
+
+        @return list|None None for every column
+        """
+        positions = sorted(set(self._columns.index(column) for column in columns or []))
+        if columns is None or len(positions) == len(self._columns):
+            return None
+        return positions
+
+    def _names(self, usecols):
+        """
+        Get the names of the columns at some positions in the file
+
+        @param usecols list|None None for every column
+        """
+        return self._columns if usecols is None else [self._columns[position] for position in usecols]
+
+    def _dtypes(self, usecols):
+        """
+        Get the types the schema gives some columns, keyed by position
+
+        @param usecols list|None None for every column
+
+        @return dict|None
+        """
+        dtypes = self.dtypes
+        if dtypes is None or usecols is None:
+            return dtypes
+        return dict((position, dtype) for position, dtype in dtypes.items() if position in usecols)
+
+    def _read(self, dtypes, chunksize=None, usecols=None):
+        """
+        Parse the file
+
+        @param dtypes    dict|None The type of columns, keyed by position
+        @param chunksize int|None  Rows to parse at a time
+        @param usecols   list|None Positions of the columns to parse, or every column
+
+        @return pandas.DataFrame|pandas.io.parsers.TextFileReader An iterator of frames if chunksize is given
+        """
+        ranges = self._ranges() if chunksize is None else None
+        if ranges is not None and len(ranges) > 1:
+            return self._read_ranges(ranges, dtypes, usecols)
+        return pd.read_csv(
+            self._filename,
+            delimiter=self._delimiter,
+            header=None,
+            dtype=dtypes,
+            chunksize=chunksize,
+            usecols=usecols
+        )
+
+    def _ranges(self):
+        """
+        Split the file into pieces which each begin at the start of a line
+
+        @return list|None (start, end) byte offsets of each piece, None if the file is not to be split
+
+        There is a piece for each worker process at most, and none is smaller
+        than the split size. Lines are assumed not to contain quoted newlines.
+        """
+        if self._split_size is None or self._processes is None:
+            return None
+        size = os.path.getsize(self._filename)
+        pieces = min(self._processes.workers, int(math.ceil(size / max(self._split_size, 1))))
+        if pieces < 2:
+            return None
+
+        offsets = [0]
+        with open(self._filename, 'rb') as csvfile:
+            for piece in range(1, pieces):
+                csvfile.seek(max(size * piece // pieces - 1, offsets[-1]))
+                csvfile.readline()
+                offsets.append(min(csvfile.tell(), size))
+        offsets.append(size)
+        return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+    def _read_ranges(self, ranges, dtypes, usecols=None):
+        """
+        Parse pieces of the file in the worker processes
+
+        @param ranges  list      (start, end) byte offsets of each piece
+        @param dtypes  dict|None The type of columns, keyed by position
+        @param usecols list|None Positions of the columns to parse, or every column
+
+        @return pandas.DataFrame The pieces in the order they appear in the file
+        """
+        Logger().info('Parsing file \'{0}\' in {1} pieces'.format(self._filename, len(ranges)))
+        futures = [
+            self._processes.executor.submit(
+                CSVFile.parse, self._filename, start, end, self._delimiter, dtypes, usecols
+            )
+            for start, end in ranges
+        ]
+        try:
+            dataframe = pd.concat([future.result() for future in futures], ignore_index=True)
+        finally:
+            for future in futures:
+                future.cancel()
+        return self._categorise(dataframe, dtypes)
+
+    @staticmethod
+    def parse(filename, start, end, delimiter, dtypes, usecols=None):
+        """
+        Parse one piece of a file. Runs in a worker process
+
+        @param filename  string
+        @param start     int       Offset of the first byte of the piece
+        @param end       int       Offset of the byte after the piece
+        @param delimiter string
+        @param dtypes    dict|None The type of columns, keyed by position
+        @param usecols   list|None Positions of the columns to parse, or every column
+
+        @return pandas.DataFrame
+        """
+        # pylint: disable=too-many-arguments
+        with open(filename, 'rb') as csvfile:
+            csvfile.seek(start)
+            piece = csvfile.read(end - start)
+        return pd.read_csv(io.BytesIO(piece), delimiter=delimiter, header=None, dtype=dtypes, usecols=usecols)
+
+    def _categorise(self, dataframe, dtypes):
+        """
+        Make categorical again the columns of a frame built from pieces parsed apart
+
+        @param dataframe pandas.DataFrame Columns are named, or numbered in file order
+        @param dtypes    dict|None        The types the pieces were parsed with
+
+        Categories are those of each piece, so concatenated columns fall back to object.
+        """
+        if dtypes is None:
+            return dataframe
+        for position, column in enumerate(self._columns):
+            name = column if column in dataframe.columns else position
+            if self._schema.get(column) == 'category' and name in dataframe.columns \
+                    and str(dataframe[name].dtype) != 'category':
+                dataframe[name] = dataframe[name].astype('category')
+        return dataframe
+
+    def _stream(self, query, max_results, fields):
+        """
+        Search the file a chunk at a time, keeping only the matching rows of each
+
+        @param query       string|None
+        @param max_results bool|int
+        @param fields      list|None
+
+        @return pandas.DataFrame
+
+        Only one chunk and the rows matched so far are held in memory at once.
+        """
+        usecols = self._usecols(self._needs(query, fields))
+        try:
+            return self._stream_chunks(self._dtypes(usecols), usecols, query, max_results, fields)
+        except (ValueError, TypeError) as exception:
+            if self.dtypes is None:
+                raise
+            Logger().warning('File \'{0}\' does not match its schema. Streaming untyped'.format(self._filename))
+            Logger().warning(exception)
+            return self._stream_chunks(None, usecols, query, max_results, fields)
+
+    def _stream_chunks(self, dtypes, usecols, query, max_results, fields):
+        """
+        Read the chunks of the file with the given types and columns, see ``_stream``
+        """
+        # pylint: disable=too-many-arguments
+        matches = []
+        found = 0
+        with self._read(dtypes, chunksize=self._chunk_size, usecols=usecols) as reader:
+            for chunk in reader:
+                chunk.columns = self._names(usecols)
+                results = chunk if query is None else chunk.query(query)
+                if isinstance(fields, list) and len(fields) != 0:
+                    results = results[fields]
+                if len(results) > 0 or len(matches) == 0:
+                    # the first chunk is kept even when empty so the columns of the result are known
+                    matches.append(results if len(matches) > 0 else results.copy())
+                found += len(results)
+                if max_results is not False and found >= max_results:
+                    break
+
+        if len(matches) == 0:
+            return pd.DataFrame(columns=fields if fields else self._names(usecols))
+        results = pd.concat(matches, ignore_index=True) if len(matches) > 1 else matches[0]
+        return self._categorise(results, dtypes)
+
+    def _fetch(self, columns):
+        """
+        Load columns a search needs which were not declared before the file was loaded
+
+        @param columns list|None None for every column
+        """
+        with self._fetch_lock:
+            missing = [
+                column for column in (columns or self._columns) if column not in self._dataframe.columns
+            ]
+            if len(missing) == 0:
+                return
+            Logger().info('Loading columns {0} of file \'{1}\''.format(', '.join(missing), self._filename))
+            dataframe = pd.concat([self._dataframe, self._load(missing)], axis=1)
+            self._dataframe = dataframe[[column for column in self._columns if column in dataframe.columns]]
+
     @accepts(str, max_results=(bool, int), fields=(None, list), group_by=(None, str))
     def search(self, query, max_results=False, fields=None, group_by=None):
         """
@@ -171,12 +676,17 @@ class CSVFile(Threadable):
         @param max_results int
         @param fields      list
         """
-        if self.dataframe is None:
+        loaded = self.complete if self.streaming else self.dataframe is not None
+        if not loaded:
             raise ThreadNotStartedError('Waiting for dataframe to load')
         query = query if query != '' else None
 
         Logger().info('Executing query "{0}" on file "{1}"'.format(query, self._filename))
-        results = self.dataframe if query is None else self.dataframe.query(query)
+        if self.streaming:
+            results = self._stream(query, max_results, fields)
+        else:
+            self._fetch(self._needs(query, fields))
+            results = self.dataframe if query is None else self.dataframe.query(query)
         Logger().debug('Got {0} results for query {1}'.format(len(results), query))
 
         if isinstance(fields, list) and len(fields) != 0:
@@ -197,15 +707,21 @@ class CSVClient(list):
     _input_files = None
     _threadmanager = None
     _language_parser = None
+    _chunk_size = None
+    _cache = False
+    _split_size = None
 
-    @accepts((str, list), namespace=str, datapath=str)
-    def __init__(self, input_files, namespace='', datapath=''):
+    @accepts((str, list), namespace=str, datapath=str, chunk_size=(None, int), cache=bool, split_size=(None, int))
+    def __init__(self, input_files, namespace='', datapath='', chunk_size=None, cache=False, split_size=None):
         """
         Create a new client in the current namespace
 
         @param input_files string|list
         @param namespace   string
         @param datapath    string
+        @param chunk_size  int    Search files a chunk of this many rows at a time instead of loading them
+        @param cache       bool   Keep each parsed file in a binary cache beside it for later loads
+        @param split_size  int    Parse files larger than this many bytes in pieces on the worker processes
 
         Namespace should be the name of the module containing CSV structures
         to be loaded by the client.
@@ -214,6 +730,9 @@ class CSVClient(list):
         """
         self._namespace = namespace
         self._datapath = datapath
+        self._chunk_size = chunk_size
+        self._cache = cache
+        self._split_size = split_size
         self._language_parser = LanguageParser()
 
         super().__init__()
@@ -269,16 +788,56 @@ class CSVClient(list):
         """
         csvfile = None
         try:
+            item = self._get_item(source)
             csvfile = CSVFile(
                 os.path.join(self._datapath, source),
-                self._get_item(source).DELIMITER,
-                self._get_item(source).keys()
+                item.DELIMITER,
+                item.keys(),
+                schema=item.SCHEMA,
+                chunk_size=self._chunk_size,
+                cache=self._cache,
+                split_size=self._split_size,
+                processes=self._processes
             )
             self.append(csvfile)
         except (OSError, ValueError) as exception:
             Logger().error('Failed to load file \'{0}\''.format(source))
             Logger().error(exception)
 
+    @accepts(str, fields=(None, list), columns=(None, list))
+    def anticipate(self, query, fields=None, columns=None):
+        """
+        Declare a search which will be made, so each file loads only the columns searches use
+
+        @param query   string    The query as it will be searched for
+        @param fields  list|None The fields it will ask for. None or empty for every column
+        @param columns list|None Other columns the results are read by, such as those they are grouped or joined on
+        """
+        for item in self:
+            if not fields:
+                item.require(None)
+                continue
+            try:
+                parsed = self._language_parser.parse(query, self._get_item(os.path.basename(item.filename)).keys())
+            # pylint: disable=broad-except
+            # A query which cannot be parsed fails when it is searched for. Until then nothing is left out
+            except Exception:
+                item.require(None)
+                continue
+            item.require(item.referenced(parsed) + fields + (columns or []))
+
+    @property
+    def _processes(self):
+        """
+        Get the worker processes of the thread manager, if files are to be parsed in pieces
+
+        @return ProcessExecutor|None
+        """
+        if self._split_size is None:
+            return None
+        processes = self.threadmanager.executors.get(Threadable.PROCESS)
+        return processes if isinstance(processes, ProcessExecutor) else None
+
     def clear(self):
         for item in self:
             item.added = False
@@ -315,6 +874,9 @@ class CSVClient(list):
     def _wait_for_load(self):
         """
         Pauses the client until all child threads have completed
+
+        Filters scheduled by the ThreadManager depend on the CSVFile threads so
+        will find them loaded. This only waits for searches made outside of it.
         """
         Logger().debug('Waiting for CSV client items to load')
         while True:
@@ -1,16 +1,21 @@
 """ Wrapper class onto python-jira """
-import os
 import re
+import math
+import time
 import urllib.parse
 from collections import namedtuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pyccata.core.decorators import accepts
 from pyccata.core.abstract import ManagableAbstract
 from pyccata.core.log import Logger
 from pyccata.core.exceptions import InvalidConnectionError
 from pyccata.core.exceptions import InvalidQueryError
 from pyccata.core.resources import ResultList
-from pyccata.core.resources import Issue
-from pyccata.core.resources import Attachment
+from pyccata.core.fieldmap import FieldMap
+from pyccata.core.session import PooledSession
+from pyccata.core.cache import ResultCache
+from pyccata.core.cache import IssueStore
 
 from jira.client import JIRA
 from jira.exceptions import JIRAError
@@ -25,6 +30,16 @@ class Jira(ManagableAbstract):
         'password'
     ]
 
+    PAGE_WORKERS = 4
+    CACHEABLE = True
+    COALESCE = True
+    SYNC_PATH = '~/.cache/pyccata/sync'
+    SYNC_MAX_SIZE = 1024 * 1024 * 1024
+    FULL_SYNC = 86400
+
+    _field_map = None
+    _session = None
+
     def __init__(self):
         """ Initialise Jira """
         Logger().info('Initialising Jira interface')
@@ -62,8 +77,10 @@ class Jira(ManagableAbstract):
                     basic_auth=(
                         self.configuration.jira.username,
                         self.configuration.jira.password
-                    )
+                    ),
+                    timeout=self._setting('timeout', None)
                 )
+                self._share_session()
                 Logger().info('Connection success')
             except JIRAError as exception:
                 Logger().error(
@@ -81,16 +98,83 @@ class Jira(ManagableAbstract):
                 )
         return self._client
 
+    @property
+    def session(self):
+        """
+        Get the shared pool of HTTP connections, None until the ProjectManager provides one
+        """
+        return self._session
+
+    @session.setter
+    @accepts(PooledSession)
+    def session(self, session):
+        """
+        Send requests through a shared pool and register the Jira credentials with it
+
+        @param session PooledSession
+        """
+        self._session = session
+        session.credentials(
+            self._options['server'],
+            (self.configuration.jira.username, self.configuration.jira.password)
+        )
+        if self._client is not None:
+            self._share_session()
+
+    def _share_session(self):
+        """ Make the python-jira session use the connections of the shared pool """
+        client_session = getattr(self._client, '_session', None)
+        if self._session is not None and client_session is not None:
+            self._session.mount(client_session)
+
+    @property
+    def field_map(self):
+        """
+        Get the map of Jira fields onto Issue attributes, compiled from ``jira.customfields`` on first use
+
+        @return FieldMap
+        """
+        if self._field_map is None:
+            self._field_map = FieldMap(list(self._setting('customfields', None) or []))
+        return self._field_map
+
+    @accepts(list)
+    def projection(self, attributes):
+        """
+        Get the fields to search for so that issues hold some attributes
+
+        @param attributes list Attributes of pyccata.core.resources.Issue
+
+        @return list|None None if an attribute is not mapped from any field
+        """
+        return self.field_map.project(attributes)
+
+    def _setting(self, name, default):
+        """
+        Get an optional value from the ``jira`` block of the configuration
+
+        @param name    string
+        @param default mixed  Returned when the value is not configured
+        """
+        try:
+            return getattr(self.configuration.jira, name)
+        except AttributeError:
+            return default
+
     @accepts(search_query=str, max_results=(bool, int), fields=(None, list), group_by=(None, str))
     def search_issues(self, search_query='', max_results=0, fields=None, group_by=None):
         """
         Search for issues in JIRA
 
         @param search_query string     A JQL formatted query
-        @param max_results  [int|bool] If false will load all issues in batches of 50
+        @param max_results  [int|bool] If false will load all issues in pages of ``jira.page_size``
         @param fields       list       A list of fields to include in the results
 
         @return ResultSet
+
+        Searches for more than one page of results are paged, see ``_search_pages``.
+        With ``jira.incremental`` set, searches for every issue only fetch what has
+        changed since they last ran, see ``_search_incremental``.
         """
         # pylint: disable=unused-argument
         # The group_by argument is required by other clients
@@ -98,10 +182,17 @@ class Jira(ManagableAbstract):
         try:
             if isinstance(fields, list):
                 fields = ','.join(fields)
+            page_size = self._setting('page_size', Jira.MAX_RESULTS)
+            if max_results is False and self._setting('incremental', False):
+                return self._search_incremental(search_query, fields, page_size)
+            if max_results is False or max_results > page_size:
+                return self._search_pages(search_query, max_results, fields, page_size)
             max_results = max_results if max_results != 0 else Jira.MAX_RESULTS
-            results = self.client.search_issues(search_query, maxResults=max_results, fields=fields)
+            results = self._convert_results(
+                self.client.search_issues(search_query, maxResults=max_results, fields=fields, json_result=True)
+            )
             Logger().debug('Got \'' + str(len(results)) + '\' results for query ' + search_query)
-            return Jira._convert_results(results)
+            return results
         except JIRAError as exception:
             expression = '.*Error in the JQL Query.*'
             if exception.status_code == 400 and re.match(expression, exception.text):
@@ -113,6 +204,134 @@ class Jira(ManagableAbstract):
                 exception.headers
             )
 
+    def _search_pages(self, search_query, max_results, fields, page_size):
+        """
+        Fetch a search one page at a time, the first page alone and the rest concurrently
+
+        @param search_query string
+        @param max_results  int|bool   False for every issue matching the query
+        @param fields       string|None
+        @param page_size    int        Issues to ask for in each request
+
+        @return ResultList
+
+        The first page gives the total, from which the ``startAt`` of every other
+        page is known. Those are requested over at most ``jira.page_workers``
+        connections and converted in order as they arrive. Jira may return fewer
+        issues per page than were asked for, so the size of the first page is
+        used for the rest.
+        """
+        first, total = Jira._page(
+            self.client.search_issues(search_query, startAt=0, maxResults=page_size, fields=fields, json_result=True)
+        )
+        limit = total if max_results is False else min(total, max_results)
+        result_set = ResultList()
+        result_set.total = total
+        self._convert_results(first, result_set=result_set)
+
+        size = len(first)
+        if size == 0 or size >= limit:
+            return result_set
+
+        starts = list(range(size, limit, size))
+        Logger().debug('Fetching {0} issues in {1} pages for query {2}'.format(limit, len(starts) + 1, search_query))
+        workers = min(self._setting('page_workers', Jira.PAGE_WORKERS), len(starts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jira-search') as pool:
+            pages = [
+                pool.submit(
+                    self.client.search_issues,
+                    search_query,
+                    startAt=start,
+                    maxResults=min(size, limit - start),
+                    fields=fields,
+                    json_result=True
+                )
+                for start in starts
+            ]
+            try:
+                for page in pages:
+                    self._convert_results(page.result(), result_set=result_set)
+            except BaseException:
+                for page in pages:
+                    page.cancel()
+                raise
+        Logger().debug('Got \'' + str(len(result_set)) + '\' results for query ' + search_query)
+        return result_set
+
+    def _search_incremental(self, search_query, fields, page_size):
+        """
+        Bring the local copy of a search up to date, fetching only issues updated since it was last brought up to date
+
+        @param search_query string
+        @param fields       string|None
+        @param page_size    int
+
+        @return ResultList
+
+        The first search, and any search not brought up to date for ``jira.full_sync``
+        seconds, fetches everything. Otherwise issues matching the query and updated
+        since the last sync replace their stored copies. The window is given relative
+        to the server clock so that the two clocks need not agree.
+
+        Issues which have been deleted or changed so that they no longer match the
+        query never appear in the changes. When the number stored differs from the
+        total on the server, or new issues arrived for a query with an ORDER BY, the
+        keys alone are fetched to drop what has gone and restore the order.
+        """
+        store = IssueStore(
+            self._setting('sync_path', Jira.SYNC_PATH),
+            self._setting('sync_max_size', Jira.SYNC_MAX_SIZE)
+        )
+        # search_issues has joined the fields, the key is made from their names
+        key = ResultCache.key(
+            self._options['server'], search_query, False, fields.split(',') if fields is not None else None, None
+        )
+        started = time.time()
+        synced = store.synced(key)
+        stored = store.get(key) if synced is not None else None
+        if stored is None or started - synced > self._setting('full_sync', Jira.FULL_SYNC):
+            results = self._search_pages(search_query, False, fields, page_size)
+            store.save(key, results, started)
+            return results
+
+        query, order = Jira._split_order(search_query)
+        # JQL only has minute precision, so overlap the previous sync by a minute
+        window = 'updated >= "-{0}m"'.format(int(math.ceil((started - synced) / 60.0)) + 1)
+        changes = '({0}) AND {1}'.format(query, window) if query != '' else window
+        merged = OrderedDict((issue.key, issue) for issue in stored)
+        added = False
+        for issue in self._search_pages(changes + order, False, fields, page_size):
+            added = added or issue.key not in merged
+            merged[issue.key] = issue
+
+        _, total = Jira._page(self.client.search_issues(search_query, maxResults=0, fields='key', json_result=True))
+        if len(merged) != total or (added and order != ''):
+            listing = self._search_pages(search_query, False, 'key', page_size)
+            merged = OrderedDict((issue.key, merged[issue.key]) for issue in listing if issue.key in merged)
+
+        Logger().debug('Synchronised {0} issues for query {1}'.format(len(merged), search_query))
+        results = ResultList()
+        results.total = len(merged)
+        for issue in merged.values():
+            results.append(issue)
+        store.save(key, results, started)
+        return results
+
+    @staticmethod
+    @accepts(str)
+    def _split_order(search_query):
+        """
+        Separate the ORDER BY clause from a query so that further conditions can be added
+
+        @param search_query string
+
+        @return tuple (query, order) where order is empty or begins with a space
+        """
+        match = re.search(r'\s*\bORDER\s+BY\b(?=(?:[^"]*"[^"]*")*[^"]*$)', search_query, re.IGNORECASE)
+        if match is None:
+            return search_query.strip(), ''
+        return search_query[:match.start()].strip(), ' ' + search_query[match.start():].strip()
+
     @accepts((str, int), str)
     def _attachment_url(self, attachment_id, filename):
         """
@@ -132,79 +351,34 @@ class Jira(ManagableAbstract):
         return self.client.projects()
 
     @staticmethod
-    @accepts(list)
-    def _convert_results(results):
+    def _page(response):
         """
-        Converts a ``jira.client.ResultList`` of ``jira.resources.Issues`` into a
-        ``pyccata.core.resources.ResultList`` of ``pyccata.core.resources.Issues``
+        Get the issues in a response to a search and the total number matching it
+
+        @param response dict|list The JSON of the response, or a list of issue resources
+
+        @return tuple (list, int)
         """
-        result_set = ResultList()
-        result_set.total = results.total if hasattr(results, 'total') else len(results)
-        for issue in results:
-            item = Issue()
-            item.key = getattr(issue, 'key') if hasattr(issue, 'key') else None
-            item.summary = getattr(issue.fields, 'summary') if hasattr(issue.fields, 'summary') else None
-            item.issuetype = getattr(issue.fields, 'issuetype') if hasattr(issue.fields, 'issuetype') else None
-            item.created = getattr(issue.fields, 'created') if hasattr(issue.fields, 'created') else None
-            item.updated = getattr(issue.fields, 'updated') if hasattr(issue.fields, 'updated') else None
-            item.priority = getattr(issue.fields, 'priority') if hasattr(issue.fields, 'priority') else None
-            item.description = getattr(issue.fields, 'description') if hasattr(issue.fields, 'description') else None
-            item.status = getattr(issue.fields, 'status') if hasattr(issue.fields, 'status') else None
-            item.project = getattr(issue.fields, 'project') if hasattr(issue.fields, 'project') else None
-            item.fixVersions = getattr(issue.fields, 'fixVersions') if hasattr(issue.fields, 'fixVersions') else None
-            item.resolution = getattr(
-                issue.fields, 'resolution'
-            ) if hasattr(issue.fields, 'resolution') else None
-            item.resolutiondate = getattr(
-                issue.fields, 'resolutiondate'
-            ) if hasattr(issue.fields, 'resolutiondate') else None
-            item.creator = getattr(issue.fields, 'creator') if hasattr(issue.fields, 'creator') else None
-            item.assignee = getattr(issue.fields, 'assignee') if hasattr(issue.fields, 'assignee') else None
-            item.attachments = Jira._get_attachments(
-                getattr(issue.fields, 'attachment') if hasattr(issue.fields, 'attachment') else None
-            )
-            item.release_text = getattr(
-                issue.fields, 'customfield_10600'
-            ) if hasattr(
-                issue.fields, 'customfield_10600'
-            ) else None
-            item.business_representative = getattr(
-                issue.fields, 'customfield_10700'
-            ) if hasattr(
-                issue.fields, 'customfield_10700'
-            ) else None
-            item.rollout_instructions = getattr(
-                issue.fields, 'customfield_10800'
-            ) if hasattr(
-                issue.fields, 'customfield_10800'
-            ) else None
-            item.rollback_instructions = getattr(
-                issue.fields, 'customfield_10801'
-            ) if hasattr(
-                issue.fields, 'customfield_10801'
-            ) else None
-
-            if hasattr(issue.fields, 'customfield_10802'):
-                item.pipelines = [item.value for item in getattr(issue.fields, 'customfield_10802')]
+        if isinstance(response, dict):
+            issues = response.get('issues', [])
+            return issues, response.get('total', len(issues))
+        return response, response.total if hasattr(response, 'total') else len(response)
 
-            result_set.append(item)
-        return result_set
+    @accepts((list, dict), result_set=(None, ResultList))
+    def _convert_results(self, results, result_set=None):
+        """
+        Converts a page of Jira issues into a
+        ``pyccata.core.resources.ResultList`` of ``pyccata.core.resources.Issues``
 
-    @staticmethod
-    @accepts((list, None))
-    def _get_attachments(attachments):
-        """
-        Formats the Jira attachments into pyccata.core attachment type
-
-        @param attachments list
-        """
-        result_set = []
-        if attachments is not None:
-            for attachment in attachments:
-                item = Attachment()
-                item.filename = attachment.filename
-                item.attachment_id = attachment.id
-                item.mime_type = attachment.mimeType
-                item.extension = os.path.splitext(attachment.filename)[1][1:].strip()
-                result_set.append(item)
+        @param results    dict|list  The JSON of a search, or a list of ``jira.resources.Issues``
+        @param result_set ResultList [optional] Append to this list rather than a new one
+
+        Fields are read by ``field_map``, straight from the JSON where it is available.
+        """
+        issues, total = Jira._page(results)
+        if result_set is None:
+            result_set = ResultList()
+            result_set.total = total
+        for item in self.field_map.issues(list(issues)):
+            result_set.append(item)
         return result_set
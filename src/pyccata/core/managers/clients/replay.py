@@ -0,0 +1,401 @@
+"""
+Jira stand-in which serves searches and attachments recorded from a real server
+
+In ``record`` mode every search and attachment fetched from Jira is saved to
+the fixture directory as well as being returned. In ``replay`` mode the same
+requests are answered from the fixture directory with no network access, after
+an optional delay, so that report builds can be profiled repeatably.
+
+Fixture layout:
+
+    <fixtures>/projects.json
+    <fixtures>/searches/<hash of query and fields>.json
+    <fixtures>/attachments/<attachment id>/<filename>
+"""
+import io
+import os
+import re
+import json
+import time
+import tempfile
+from threading import Lock
+from urllib.parse import urlsplit
+from urllib.parse import unquote_plus
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from pyccata.core.decorators import accepts
+from pyccata.core.log import Logger
+from pyccata.core.cache import ResultCache
+from pyccata.core.fieldmap import wrap
+from pyccata.core.session import PooledSession
+from pyccata.core.exceptions import InvalidQueryError
+from pyccata.core.managers.clients.jira import Jira
+
+class Fixtures(object):
+    """
+    Directory of recorded Jira responses
+    """
+    SEARCHES = 'searches'
+    ATTACHMENTS = 'attachments'
+    PROJECTS = 'projects.json'
+    ATTACHMENT_PATH = re.compile(r'/secure/attachment/([^/]+)/([^/]+)$')
+
+    _path = None
+    _lock = None
+
+    @accepts(str)
+    def __init__(self, path):
+        """
+        @param path string Directory holding the fixtures. Created if missing
+        """
+        self._path = os.path.expanduser(path)
+        self._lock = Lock()
+        for directory in (Fixtures.SEARCHES, Fixtures.ATTACHMENTS):
+            os.makedirs(os.path.join(self._path, directory), exist_ok=True)
+
+    @property
+    def path(self):
+        """ Get the fixture directory """
+        return self._path
+
+    def _search_file(self, search_query, fields):
+        """ Get the file holding the recording of a search """
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        key = ResultCache.key('replay', search_query, False, fields, None)
+        return os.path.join(self._path, Fixtures.SEARCHES, key + '.json')
+
+    def search(self, search_query, fields):
+        """
+        Get the recording of a search
+
+        @param search_query string
+        @param fields       string|list|None
+
+        @return dict|None ``total`` and ``issues``, the JSON of each issue in order
+        """
+        try:
+            with open(self._search_file(search_query, fields), 'r') as recording:
+                return json.load(recording)
+        except FileNotFoundError:
+            return None
+
+    def record_search(self, search_query, fields, start, response):
+        """
+        Add a page of search results to the recording of a search
+
+        @param search_query string
+        @param fields       string|list|None
+        @param start        int  The startAt of the page
+        @param response     dict The JSON of the page
+        """
+        with self._lock:
+            recording = self.search(search_query, fields) or {'query': search_query, 'fields': fields, 'issues': []}
+            issues = recording['issues']
+            page = response.get('issues', [])
+            if len(issues) < start + len(page):
+                issues.extend([None] * (start + len(page) - len(issues)))
+            issues[start:start + len(page)] = page
+            recording['total'] = response.get('total', len(issues))
+            self._write(self._search_file(search_query, fields), json.dumps(recording).encode('utf8'))
+
+    def attachment(self, url):
+        """
+        Get where the attachment at a URL is recorded
+
+        @param url string
+
+        @return string|None None if the URL is not an attachment
+        """
+        match = Fixtures.ATTACHMENT_PATH.search(urlsplit(url).path)
+        if match is None:
+            return None
+        filename = os.path.basename(unquote_plus(match.group(2)))
+        return os.path.join(self._path, Fixtures.ATTACHMENTS, os.path.basename(match.group(1)), filename)
+
+    def record_attachment(self, url, content):
+        """
+        Save the body of an attachment
+
+        @param url     string
+        @param content bytes
+        """
+        path = self.attachment(url)
+        if path is not None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._write(path, content)
+
+    def projects(self):
+        """ Get the JSON of the recorded projects """
+        try:
+            with open(os.path.join(self._path, Fixtures.PROJECTS), 'r') as recording:
+                return json.load(recording)
+        except FileNotFoundError:
+            return []
+
+    @accepts(list)
+    def record_projects(self, projects):
+        """
+        Save the JSON of the projects
+
+        @param projects list
+        """
+        self._write(os.path.join(self._path, Fixtures.PROJECTS), json.dumps(projects).encode('utf8'))
+
+    @staticmethod
+    def _write(path, content):
+        """ Replace a file with new content without readers ever seeing half of it """
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(handle, 'wb') as recording:
+            recording.write(content)
+        os.replace(temporary, path)
+
+class ReplayClient(object):
+    """
+    Answers the python-jira calls made by ``Jira`` from recordings
+
+    At most ``page_size`` issues are returned for each page, as a server would.
+    """
+    _fixtures = None
+    _page_size = 50
+    _latency = 0.0
+
+    @accepts(Fixtures, int, (int, float))
+    def __init__(self, fixtures, page_size, latency):
+        """
+        @param fixtures  Fixtures
+        @param page_size int   Issues returned in each page at most
+        @param latency   float Seconds every request takes
+        """
+        self._fixtures = fixtures
+        self._page_size = page_size
+        self._latency = float(latency)
+
+    def search_issues(self, jql_str, startAt=0, maxResults=50, fields=None, json_result=True):
+        """
+        Get a page of a recorded search as JSON
+
+        @raise InvalidQueryError if the search was never recorded
+        """
+        # pylint: disable=invalid-name,unused-argument
+        # The names and arguments are those of python-jira, which always answers in JSON here
+        time.sleep(self._latency)
+        recording = self._fixtures.search(jql_str, fields)
+        if recording is None:
+            raise InvalidQueryError('No recording of the search \'{0}\' in {1}'.format(jql_str, self._fixtures.path))
+        page = recording['issues'][startAt:startAt + min(maxResults, self._page_size)]
+        return {
+            'startAt': startAt,
+            'maxResults': maxResults,
+            'total': recording['total'],
+            'issues': [issue for issue in page if issue is not None]
+        }
+
+    def projects(self):
+        """ Get the recorded projects """
+        time.sleep(self._latency)
+        return wrap(self._fixtures.projects())
+
+class RecordingClient(object):
+    """
+    Passes calls through to python-jira, saving every answer to the fixtures
+    """
+    _client = None
+    _fixtures = None
+
+    @accepts(object, Fixtures)
+    def __init__(self, client, fixtures):
+        """
+        @param client   jira.client.JIRA
+        @param fixtures Fixtures
+        """
+        self._client = client
+        self._fixtures = fixtures
+
+    def search_issues(self, jql_str, startAt=0, maxResults=50, fields=None, json_result=True):
+        """ Search Jira and record the page """
+        # pylint: disable=invalid-name,unused-argument
+        response = self._client.search_issues(
+            jql_str, startAt=startAt, maxResults=maxResults, fields=fields, json_result=True
+        )
+        self._fixtures.record_search(jql_str, fields, startAt, response)
+        return response
+
+    def projects(self):
+        """ Get the projects from Jira and record them """
+        projects = self._client.projects()
+        self._fixtures.record_projects([project.raw for project in projects])
+        return projects
+
+    def __getattr__(self, name):
+        # anything not recorded, such as the session, comes from the real client
+        if name == '_client':
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves recorded attachments in place of the Jira server, honouring Range requests
+    """
+    _fixtures = None
+    _latency = 0.0
+
+    @accepts(Fixtures, (int, float))
+    def __init__(self, fixtures, latency):
+        """
+        @param fixtures Fixtures
+        @param latency  float Seconds every request takes
+        """
+        super().__init__()
+        self._fixtures = fixtures
+        self._latency = float(latency)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        """ Answer a request from the fixtures """
+        # pylint: disable=too-many-arguments
+        time.sleep(self._latency)
+        status, body = 404, b''
+        path = self._fixtures.attachment(request.url)
+        if path is not None and os.path.isfile(path):
+            with open(path, 'rb') as recording:
+                body = recording.read()
+            status = 200
+            match = re.match(r'bytes=(\d+)-$', request.headers.get('Range', ''))
+            if match is not None:
+                start = int(match.group(1))
+                status, body = (206, body[start:]) if start < len(body) else (416, b'')
+
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({'Content-Length': str(len(body))})
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        """ Nothing is held open """
+        pass
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Fetches through the pooled adapter and saves complete attachment downloads
+    """
+    _adapter = None
+    _fixtures = None
+
+    @accepts(BaseAdapter, Fixtures)
+    def __init__(self, adapter, fixtures):
+        """
+        @param adapter  requests.adapters.BaseAdapter
+        @param fixtures Fixtures
+        """
+        super().__init__()
+        self._adapter = adapter
+        self._fixtures = fixtures
+
+    def send(self, request, **kwargs):
+        """ Send the request and record the body of attachments """
+        # pylint: disable=arguments-differ
+        response = self._adapter.send(request, **kwargs)
+        if response.status_code == 200 and self._fixtures.attachment(request.url) is not None:
+            self._fixtures.record_attachment(request.url, response.content)
+        return response
+
+    def close(self):
+        """ Connections belong to the pooled adapter """
+        pass
+
+class Replay(Jira):
+    """
+    Jira client which records from, or replays to, a fixture directory
+
+    Everything ``Jira`` does with the results, paging, field mapping and
+    attachment URLs, runs unchanged. Settings are read from the ``replay``
+    block first and then from the ``jira`` block.
+    """
+    REQUIRED = [
+        'fixtures'
+    ]
+
+    RECORD = 'record'
+    REPLAY = 'replay'
+    SERVER = 'http://jira.replay'
+    LATENCY = 0.0
+
+    _fixtures = None
+
+    def __init__(self):
+        """ Initialise the replay client """
+        # pylint: disable=super-init-not-called
+        # Jira is only initialised when recording, as replays need no jira block
+        Logger().info('Initialising Jira replay interface in {0} mode'.format(self.mode))
+        self._options = {}
+        self._fixtures = Fixtures(self.configuration.replay.fixtures)
+        if self.mode == Replay.RECORD:
+            super().__init__()
+        else:
+            self._options['server'] = self._setting('server', Replay.SERVER)
+
+    @property
+    def mode(self):
+        """ Get whether responses are recorded or replayed """
+        return self._setting('mode', Replay.REPLAY)
+
+    @property
+    def fixtures(self):
+        """ Get the fixture directory """
+        return self._fixtures
+
+    @property
+    def client(self):
+        """
+        Get the stand-in for python-jira
+
+        @return ReplayClient|RecordingClient
+        """
+        if self._client is None:
+            if self.mode == Replay.RECORD:
+                self._client = RecordingClient(Jira.client.fget(self), self._fixtures)
+            else:
+                self._client = ReplayClient(
+                    self._fixtures,
+                    self._setting('page_size', Jira.MAX_RESULTS),
+                    self._setting('latency', Replay.LATENCY)
+                )
+        return self._client
+
+    @property
+    def session(self):
+        """
+        Get the shared pool of HTTP connections, None until the ProjectManager provides one
+        """
+        return self._session
+
+    @session.setter
+    @accepts(PooledSession)
+    def session(self, session):
+        """
+        Answer attachment downloads from the fixtures, or record them
+
+        @param session PooledSession
+        """
+        if self.mode == Replay.RECORD:
+            Jira.session.fset(self, session)
+            session.route(self._options['server'], RecordingAdapter(session.adapter, self._fixtures))
+        else:
+            self._session = session
+            session.route(self._options['server'], ReplayAdapter(self._fixtures, self._setting('latency', 0.0)))
+
+    def _setting(self, name, default):
+        """
+        Get an optional value from the ``replay`` block, falling back to the ``jira`` block
+
+        @param name    string
+        @param default mixed
+        """
+        try:
+            return getattr(self.configuration.replay, name)
+        except AttributeError:
+            return super()._setting(name, default)
@@ -9,6 +9,9 @@ from pyccata.core.interface import ManagerInterface
 from pyccata.core.manager import Manager
 from pyccata.core.decorators import accepts
 from pyccata.core.log import Logger
+from pyccata.core.cache import ResultCache
+from pyccata.core.session import PooledSession
+from pyccata.core.resources import ResultList
 
 class ProjectManager(Manager):
     """
@@ -22,6 +25,13 @@ class ProjectManager(Manager):
     """
     __implements__ = (ManagerInterface,)
 
+    CACHE_PATH = '~/.cache/pyccata'
+    CACHE_TTL = 600
+    CACHE_MAX_SIZE = 256 * 1024 * 1024
+
+    _cache = None
+    _session = None
+
     def __init__(self):
         """
         Initialise the object and call _load
@@ -50,6 +60,60 @@ class ProjectManager(Manager):
         if hasattr(self.client, 'threadmanager'):
             self.client.threadmanager = threadmanager
 
+    @property
+    def sources(self):
+        """
+        Get the threads which load the data searched by the client
+
+        Threads which search the client depend on these.
+        """
+        return list(getattr(self.client, 'sources', None) or [])
+
+    @property
+    def cache(self):
+        """
+        Get the cache of search results, or None if the client is not cached
+
+        Results are cached for clients which set ``CACHEABLE`` when the configuration
+        has a ``cache`` block with a ``ttl`` greater than 0.
+        """
+        if self._cache is None and getattr(self.client, 'CACHEABLE', False):
+            try:
+                settings = self.configuration.cache
+            except AttributeError:
+                return None
+            ttl = getattr(settings, 'ttl', ProjectManager.CACHE_TTL)
+            if ttl > 0:
+                self._cache = ResultCache(
+                    getattr(settings, 'path', ProjectManager.CACHE_PATH),
+                    ttl,
+                    getattr(settings, 'max_size', ProjectManager.CACHE_MAX_SIZE)
+                )
+        return self._cache
+
+    @property
+    def session(self):
+        """
+        Get the pool of HTTP connections shared by the client, attachments and anything else calling out
+
+        Sized by the optional ``http`` block of the configuration. Clients with a
+        ``session`` attribute are given the pool so that they can register their
+        credentials with it and send their own requests through it.
+        """
+        if self._session is None:
+            try:
+                settings = self.configuration.http
+            except AttributeError:
+                settings = None
+            self._session = PooledSession(
+                getattr(settings, 'pool_size', PooledSession.POOL_SIZE),
+                hosts=getattr(settings, 'hosts', PooledSession.HOSTS),
+                verify=getattr(settings, 'verify', True)
+            )
+            if hasattr(self.client, 'session'):
+                self.client.session = self._session
+        return self._session
+
     @property
     def server(self):
         """
@@ -62,6 +126,31 @@ class ProjectManager(Manager):
         return self._client.server
 
 
+    @accepts(list)
+    def projection(self, attributes):
+        """
+        Get the fields the client must search for so that results hold some attributes
+
+        @param attributes list Attributes of pyccata.core.resources.Issue
+
+        @return list|None None if the client cannot restrict a search to them
+        """
+        projection = getattr(self.client, 'projection', None)
+        return projection(attributes) if projection is not None else None
+
+    @accepts(str, fields=(None, list), columns=(None, list))
+    def anticipate(self, search_query, fields=None, columns=None):
+        """
+        Tell the client about a search before any is made, for clients which prepare for them
+
+        @param search_query string
+        @param fields       list|None The fields the search will ask for
+        @param columns      list|None Other fields the results are read by, such as those they are grouped on
+        """
+        anticipate = getattr(self.client, 'anticipate', None)
+        if anticipate is not None:
+            anticipate(search_query, fields=fields, columns=columns)
+
     def projects(self):
         """
         Get a list of projects defined in the agile project manager
@@ -76,10 +165,32 @@ class ProjectManager(Manager):
         @param search_query string     What to search for. When using the default manager, accepts queries in JQL
         @max_results        bool | int If False will load all issues in batches of 50
         @fields             list       A list of fields to retrieve as part of the query results
+
+        When a cache is configured, results are read from it until they expire.
         """
-        return self.client.search_issues(
+        key = None
+        if self.cache is not None:
+            key = ResultCache.key(self._cache_scope(), search_query, max_results, fields, group_by)
+            results = self.cache.get(key)
+            if results is not None:
+                Logger().debug('Using cached results for query ' + search_query)
+                return results
+
+        results = self.client.search_issues(
             search_query=search_query,
             max_results=max_results,
             fields=fields,
             group_by=group_by
         )
+        if key is not None and isinstance(results, ResultList):
+            self.cache.put(key, results)
+        return results
+
+    def _cache_scope(self):
+        """
+        Get a name for the back-end so that results from different servers never mix
+        """
+        try:
+            return '{0}:{1}'.format(self.configuration.manager, self.client.server.server_address)
+        except AttributeError:
+            return self.configuration.manager
@@ -3,6 +3,167 @@ Query Manager
 """
 from pyccata.core.filter import Filter
 from pyccata.core.decorators import accepts
+from pyccata.core.cache import ResultCache
+
+class Clause(object):
+    """
+    One condition of a JQL query
+
+    Conditions on fields held by ``pyccata.core.resources.Issue`` which compare
+    against plain values can also be tested against issues which have already
+    been fetched. Anything else - functions, history searches, text searches
+    and bracketed groups - is kept as opaque text.
+    """
+    # Issue attributes which may be tested locally, keyed by JQL field name
+    LOCAL_FIELDS = {
+        'issuetype': 'issuetype',
+        'type': 'issuetype',
+        'status': 'status',
+        'priority': 'priority',
+        'resolution': 'resolution',
+        'assignee': 'assignee',
+        'creator': 'creator'
+    }
+    POSITIVE = ('=', 'IN', 'IS')
+    NEGATIVE = ('!=', 'NOT IN', 'IS NOT')
+    EMPTY = ('EMPTY', 'NULL')
+
+    _text = None
+    _field = None
+    _operator = None
+    _values = None
+
+    @accepts(list)
+    def __init__(self, tokens):
+        """
+        @param tokens list Tokens of the condition, as produced by ``ResultCache.tokenize``
+        """
+        self._text = ' '.join(tokens)
+        self._field = None
+        self._operator = None
+        self._values = None
+        if len(tokens) < 3 or tokens[0] == '(':
+            return
+
+        field = tokens[0].strip('"\'').lower()
+        for operator in sorted(Clause.POSITIVE + Clause.NEGATIVE, key=len, reverse=True):
+            words = operator.split(' ')
+            if tokens[1:1 + len(words)] == words:
+                values = Clause._values_of(tokens[1 + len(words):])
+                if field in Clause.LOCAL_FIELDS and values is not None:
+                    self._field = field
+                    self._operator = operator
+                    self._values = values
+                    self._text = ' '.join([field, operator] + tokens[1 + len(words):])
+                return
+
+    @staticmethod
+    def _values_of(tokens):
+        """
+        Get the literal values compared against, or None if they are not all literals
+
+        @param tokens list
+        """
+        if len(tokens) == 1 and tokens[0] not in '(),':
+            literals = tokens
+        elif len(tokens) >= 3 and tokens[0] == '(' and tokens[-1] == ')':
+            literals = tokens[1:-1:2]
+            if tokens[2:-1:2] != [','] * (len(literals) - 1):
+                return None
+        else:
+            return None
+
+        if any(literal in '(),' for literal in literals):
+            return None
+        return [literal.strip('"\'').lower() if literal not in Clause.EMPTY else literal for literal in literals]
+
+    @property
+    def text(self):
+        """ Get the condition as JQL """
+        return self._text
+
+    @property
+    def field(self):
+        """ Get the Issue attribute a local condition tests, None if the condition is not local """
+        return Clause.LOCAL_FIELDS[self._field] if self._field is not None else None
+
+    @property
+    def local(self):
+        """ Can the condition be tested against an issue which has already been fetched? """
+        return self._field is not None
+
+    def matches(self, issue):
+        """
+        Does an issue meet this condition?
+
+        @param issue Issue
+
+        @return bool
+
+        Values are compared without case against the name, key, id and value of the
+        field. As in Jira, negative conditions never match an empty field.
+        """
+        value = getattr(issue, self.field, None)
+        wanted = set([literal for literal in self._values if literal not in Clause.EMPTY])
+        found = set()
+        if value is not None:
+            for attribute in ('name', 'key', 'id', 'value', 'displayName'):
+                if hasattr(value, attribute) and getattr(value, attribute) is not None:
+                    found.add(str(getattr(value, attribute)).lower())
+            if isinstance(value, (str, int)):
+                found.add(str(value).lower())
+
+        if self._operator in Clause.POSITIVE:
+            if value is None:
+                return len(wanted) < len(self._values)
+            return len(found & wanted) > 0
+        return value is not None and len(found & wanted) == 0
+
+    @staticmethod
+    @accepts(str)
+    def parse(search_query):
+        """
+        Split a query into the conditions joined by AND and its ORDER BY clause
+
+        @param search_query string
+
+        @return tuple (list of Clause, string order)
+
+        A query with a top level OR is returned as a single opaque condition.
+        """
+        tokens = ResultCache.tokenize(search_query)
+        order = ''
+        depth = 0
+        groups = [[]]
+        for index, token in enumerate(tokens):
+            depth += 1 if token == '(' else (-1 if token == ')' else 0)
+            if depth == 0 and token == 'ORDER' and tokens[index + 1:index + 2] == ['BY']:
+                order = ' '.join(tokens[index:])
+                break
+            if depth == 0 and token == 'AND':
+                groups.append([])
+            else:
+                groups[-1].append(token)
+
+        if any(len(group) == 0 for group in groups):
+            return [], order
+        # AND binds more tightly than OR so a top level OR cannot be split
+        if any(Clause._top_level_or(group) for group in groups):
+            joined = []
+            for group in groups:
+                joined += (['AND'] if len(joined) > 0 else []) + group
+            return [Clause(joined)], order
+        return [Clause(group) for group in groups], order
+
+    @staticmethod
+    def _top_level_or(tokens):
+        """ Does the condition contain an OR outside brackets? """
+        depth = 0
+        for token in tokens:
+            depth += 1 if token == '(' else (-1 if token == ')' else 0)
+            if depth == 0 and token == 'OR':
+                return True
+        return False
 
 class QueryManager(list):
     """
@@ -16,6 +177,10 @@ class QueryManager(list):
     If it has, the query is appended to the observers of the
     earlier query which assigns its results via the notify.
 
+    Where the client allows it, queries which only differ in
+    their fields, or in conditions which can be tested locally,
+    are coalesced into a single search. See ``_coalesce``.
+
     Filters provided to the QueryManager must implement
     Observable for this manager to understand.
 
@@ -27,6 +192,7 @@ class QueryManager(list):
         should be returned to the bottom of the queue with
         subsequent items monitoring the first observer to be removed.
     """
+    _groups = None
 
     @accepts(Filter)
     def append(self, item):
@@ -35,7 +201,6 @@ class QueryManager(list):
 
         The query manager only deals with Filter items.
         """
-        observed = False
         for query in self:
             if (
                     query.query == item.query
@@ -45,7 +210,175 @@ class QueryManager(list):
             ):
                 if not item in query.observers:
                     query.append(item)
-                observed = True
+                return
+
+        for query in self:
+            if self._coalesce(query, item):
+                return
+        super().append(item)
+
+    @accepts(list)
+    def project(self, parts):
+        """
+        Narrow searches for every field to the fields the parts reading them need
+
+        @param parts list Threads, each with ``reads``. See ``ThreadableDocument.reads``
+
+        A filter declaring its own fields keeps them. A filter without fields
+        is narrowed only when every part which reads it names the attributes it
+        reads, the attributes read by its collation are known and the client
+        can say which fields hold them. Filters sharing a search ask for the
+        union of what each of them needs.
+
+        Every search still to be made is then announced to its project manager
+        so that clients loading data up front, such as CSV files, load only
+        what the searches use.
+        """
+        reads = {}
+        for part in parts:
+            for thread, attributes in getattr(part, 'reads', []):
+                if thread in reads and (reads[thread] is None or attributes is None):
+                    reads[thread] = None
+                else:
+                    reads[thread] = reads.get(thread, []) + attributes if attributes is not None else None
+
+        for query in self:
+            if query.projectmanager is None or query.dispatched or query.complete:
+                continue
+            members = [query] + [item for item in query.observers if isinstance(item, Filter)]
+            if all(member.fields is not None for member in members):
+                continue
+
+            fields = []
+            for member in members:
+                projected = member.fields
+                if projected is None:
+                    attributes = QueryManager._reads(member, reads)
+                    projected = query.projectmanager.projection(attributes) if attributes is not None else None
+                if projected is None:
+                    fields = None
+                    break
+                fields += projected + [clause.field for clause in (member.predicates or [])]
+
+            if fields is not None:
+                query.widen(query.search_query, sorted(set(fields), key=fields.index))
+
+        for query in self:
+            anticipate = getattr(query.projectmanager, 'anticipate', None)
+            if anticipate is not None and not query.dispatched and not query.complete:
+                members = [query] + [item for item in query.observers if isinstance(item, Filter)]
+                anticipate(query.search_query, fields=query.search_fields, columns=QueryManager._joins(members))
+
+    @staticmethod
+    def _joins(members):
+        """
+        Get the fields the results of filters sharing a search are grouped and joined on
+
+        @param members list Filter
+        """
+        columns = []
+        for member in members:
+            columns += [member.group_by] if member.group_by else []
+            join = member.collation.join if member.collation is not None else None
+            columns += [join.column] if join is not None and join.column else []
+        return sorted(set(columns), key=columns.index)
+
+    @staticmethod
+    def _reads(item, reads):
+        """
+        Get every attribute read from the results of a filter, None if any may be
+
+        @param item  Filter
+        @param reads dict Attributes read by parts, keyed by the filter they read
+        """
+        attributes = reads.get(item)
+        if attributes is None:
+            return None
+        if item.collation is not None:
+            collated = item.collation.fields
+            if collated is None:
+                return None
+            attributes = attributes + collated
+        return attributes + ([item.group_by] if item.group_by is not None else [])
+
+    def clear(self):
+        """ Forget every query """
+        super().clear()
+        self._groups = None
+
+    @staticmethod
+    def _compatible(query, item):
+        """
+        May the item share the search of the query?
+
+        @param query Filter Already queued and not yet started
+        @param item  Filter
+        """
+        client = getattr(item.projectmanager, 'client', None)
+        return (
+            getattr(client, 'COALESCE', False)
+            and query.projectmanager is item.projectmanager
+            and not (query.dispatched or query.complete or query.failed)
+            and query.group_by == item.group_by
+            and type(query.max_results) is type(item.max_results)
+            and query.max_results == item.max_results
+        )
+
+    def _coalesce(self, query, item):
+        """
+        Widen the search of a queued query so that it also finds the results of the item
+
+        @param query Filter
+        @param item  Filter
+
+        @return bool True if the item now observes the query
+
+        The widened search keeps the conditions the queries share, and any
+        ORDER BY they share, and asks for the union of their fields. Each
+        filter then keeps only the issues which meet the rest of its own
+        conditions. Conditions may only be dropped from the search if they can
+        be tested locally, and only for searches which fetch every issue, as a
+        limit on the wider search would cut off a different set of issues.
+        """
+        if not QueryManager._compatible(query, item):
+            return False
+        if self._groups is None:
+            self._groups = {}
+
+        members = self._groups.get(query, [query])
+        parsed = dict((member, Clause.parse(member.query)) for member in members + [item])
+        orders = set([order for _, order in parsed.values()])
+        if len(orders) != 1:
+            return False
+
+        texts = [set([clause.text for clause in clauses]) for clauses, _ in parsed.values()]
+        common = [clause for clause in parsed[query][0] if all(clause.text in text for text in texts)]
+        if len(common) == 0:
+            return False
+
+        shared = set([clause.text for clause in common])
+        residuals = dict(
+            (member, [clause for clause in clauses if clause.text not in shared])
+            for member, (clauses, _) in parsed.items()
+        )
+        for residual in residuals.values():
+            if any(not clause.local for clause in residual):
+                return False
+        if item.max_results is not False and any(len(residual) > 0 for residual in residuals.values()):
+            return False
+
+        fields = []
+        for member in members + [item]:
+            if member.fields is None:
+                fields = None
                 break
-        if not observed:
-            super().append(item)
+            fields += member.fields + [clause.field for clause in residuals[member]]
+        if fields is not None:
+            fields = sorted(set(fields), key=fields.index)
+
+        query.widen((' AND '.join([clause.text for clause in common]) + ' ' + orders.pop()).strip(), fields)
+        for member, residual in residuals.items():
+            member.predicates = residual
+        query.append(item)
+        self._groups[query] = members + [item]
+        return True
@@ -1,19 +1,40 @@
 """
 Thread manager module
 """
+import os
+from collections import deque
+from heapq import heappush
+from heapq import heappop
+from itertools import count
+from threading import Condition
+from threading import RLock
+from threading import Timer
 from time import sleep
+from time import perf_counter
 import psutil
 from pyccata.core.threading import Threadable
+from pyccata.core.threading import ThreadExecutor
+from pyccata.core.threading import PoolExecutor
+from pyccata.core.threading import ProcessExecutor
+from pyccata.core.threading import AsyncExecutor
+from pyccata.core.trace import ExecutionTrace
+from pyccata.core.retry import Backoff
+from pyccata.core.retry import CircuitBreaker
+from pyccata.core.concurrency import ConcurrencyController
 from pyccata.core.decorators import accepts
 from pyccata.core.managers.project import ProjectManager
 from pyccata.core.managers.query import QueryManager
 from pyccata.core.interface import ObservableInterface
+from pyccata.core.interface import ExecutorInterface
 from pyccata.core.helpers import implements
 from pyccata.core.exceptions import ArgumentValidationError
 from pyccata.core.exceptions import InvalidConnectionError
 from pyccata.core.exceptions import InvalidQueryError
 from pyccata.core.exceptions import PoolEmptyError
+from pyccata.core.exceptions import ThreadFailedError
 from pyccata.core.exceptions import ThreadNotStartedError
+from pyccata.core.exceptions import ThreadCancelledError
+from pyccata.core.exceptions import ThreadTimeoutError
 from pyccata.core.log import Logger
 from pyccata.core.configuration import Configuration
 
@@ -28,10 +49,21 @@ class ThreadManager(list):
     # will always have too many attributes.
 
     POOL_SIZE = 10
+    IO_WORKERS = 10
+    CPU_WORKERS = 1
+    PROCESS_WORKERS = 1
+    ASYNC_LIMIT = 512
     MAX_RETRIES = 3
+    RETRY_DELAY = 1.0
+    RETRY_MAX_DELAY = 30.0
+    BREAKER_THRESHOLD = 5
+    BREAKER_RESET = 60.0
+    INITIAL_CONCURRENCY = 8
+    MEMORY_HEADROOM = 0.1
+    CANCEL_GRACE = 5.0
+    EVENT_DRIVEN = True
     _instance = None
     _is_loaded = False
-    lock = False
 
     def __init__(self):
         if self._is_loaded:
@@ -39,15 +71,50 @@ class ThreadManager(list):
         super().__init__()
         self._managed_threads = 0
         self._complete_threads = 0
-        Logger().debug('Loading project manager')
-        self._projectmanager = ProjectManager()
-        Logger().debug(str(self._projectmanager.threadmanager))
-        self._projectmanager.threadmanager = self
         self._querymanager = QueryManager()
         self._configuration = Configuration()
         self._failed_threads = []
-        self._pool = []
+        self._lock = RLock()
+        self._ready = []
+        self._sequence = count()
+        self._blocked = set()
+        self._dependents = {}
+        self._pool = set()
+        self._coroutines = set()
+        self._condition = Condition()
+        self._finished = deque()
+        self._appended = False
+        self._trace = ExecutionTrace()
+        self._delayed = {}
+        self._retrying = {}
+        self._breakers = {}
+        self._deadlines = []
+        self._deadline_of = {}
+        self._expired = set()
+        self._abandoned = set()
+        self._cancelled = None
+        self._controller = None
+        if self._setting('adaptive', True):
+            self._controller = ConcurrencyController(
+                self._setting('initial_concurrency', ThreadManager.INITIAL_CONCURRENCY),
+                ThreadManager.POOL_SIZE,
+                float(self._setting('memory_headroom', ThreadManager.MEMORY_HEADROOM))
+            )
+        self._executors = {
+            Threadable.THREAD: ThreadExecutor(),
+            Threadable.IO: PoolExecutor(self._setting('io_workers', ThreadManager.IO_WORKERS), name='io'),
+            Threadable.CPU: PoolExecutor(self._setting('cpu_workers', ThreadManager.CPU_WORKERS), name='cpu'),
+            Threadable.PROCESS: ProcessExecutor(self._setting('process_workers', ThreadManager.PROCESS_WORKERS)),
+            Threadable.ASYNC: AsyncExecutor(self._setting('async_limit', ThreadManager.ASYNC_LIMIT))
+        }
         self._complete = False
+
+        # managers such as the CSV manager append threads as soon as they are given
+        # the thread manager, so everything append and execute use must exist first
+        Logger().debug('Loading project manager')
+        self._projectmanager = ProjectManager()
+        Logger().debug(str(self._projectmanager.threadmanager))
+        self._projectmanager.threadmanager = self
         self._is_loaded = True
 
     @property
@@ -70,41 +137,111 @@ class ThreadManager(list):
         """ Have all threads executed successfully? """
         return self._complete
 
+    @property
+    def trace(self):
+        """ get the timings recorded for each thread executed by the manager """
+        return self._trace
+
+    @property
+    def controller(self):
+        """ get the adaptive concurrency controller. None if disabled """
+        return self._controller
+
+    @property
+    def executors(self):
+        """ get the executor back-ends keyed by name """
+        return self._executors
+
+    @accepts(str, ExecutorInterface)
+    def register_executor(self, name, executor):
+        """
+        Register an executor back-end
+
+        @param name     string            The value of ``Threadable.EXECUTOR`` handled by this back-end
+        @param executor ExecutorInterface
+
+        Registering an executor under an existing name replaces it.
+        """
+        if name in self._executors:
+            self._executors[name].shutdown()
+        self._executors[name] = executor
+
+    def _setting(self, name, default):
+        """
+        Get an optional value from the ``threading`` block of the configuration
+
+        @param name    string
+        @param default mixed  Returned when the value is not configured
+        """
+        try:
+            return getattr(self.configuration.threading, name)
+        except AttributeError:
+            return default
+
     @accepts(Threadable)
     def append(self, item):
         """
         Append a new Threadable item to the list of threads to execute
+
+        Threads may be appended from inside other running threads.
         """
-        while ThreadManager.lock:
-            sleep(Threadable.THREAD_SLEEP)
-        ThreadManager.lock = True
-        if hasattr(item, 'projectmanager'):
-            item.projectmanager = self.projectmanager
+        with self._lock:
+            if hasattr(item, 'projectmanager'):
+                item.projectmanager = self.projectmanager
+                # searches can't start until the data they search is loaded
+                for source in self.projectmanager.sources:
+                    if isinstance(source, Threadable):
+                        item.depends_on(source)
 
-        # looks like a duck, smells like a duck, is it a duck?
-        if implements(item, ObservableInterface):
-            try:
-                self.querymanager.append(item)
-            except ArgumentValidationError:
-                # It's not??? Don't care.
-                pass
+            # looks like a duck, smells like a duck, is it a duck?
+            if implements(item, ObservableInterface):
+                try:
+                    self.querymanager.append(item)
+                except ArgumentValidationError:
+                    # It's not??? Don't care.
+                    pass
+
+            if not hasattr(item, 'observing') or not item.observing:
+                super().append(item)
+                self._trace.queued(item)
+                self._enqueue(item)
+            self._managed_threads += 1
 
-        if not hasattr(item, 'observing') or not item.observing:
-            super().append(item)
-        self.sort(key=lambda x: x.PRIORITY, reverse=True)
-        ThreadManager.lock = False
-        self._managed_threads += 1
+        # wake execute in case a running thread is waiting on this one
+        with self._condition:
+            self._appended = True
+            self._condition.notify()
 
     def clear(self):
         """
         Truncates the managed threads
         """
-        self._managed_threads = 0
-        self._complete_threads = 0
-        self._querymanager.clear()
-        self._pool.clear()
-        self._complete = False
-        super().clear()
+        with self._lock:
+            self._managed_threads = 0
+            self._complete_threads = 0
+            self._querymanager.clear()
+            self._ready.clear()
+            self._blocked.clear()
+            self._dependents.clear()
+            self._pool.clear()
+            self._coroutines.clear()
+            self._finished.clear()
+            self._appended = False
+            self._complete = False
+            self._trace.clear()
+            for timer in self._delayed.values():
+                timer.cancel()
+            self._delayed.clear()
+            self._retrying.clear()
+            self._breakers.clear()
+            self._deadlines.clear()
+            self._deadline_of.clear()
+            self._expired.clear()
+            self._abandoned.clear()
+            self._cancelled = None
+            if self._controller is not None:
+                self._controller.clear()
+            super().clear()
 
     def start(self):
         """ Sorts the list and then triggers execute, setting _complete on execute completion """
@@ -130,18 +267,53 @@ class ThreadManager(list):
              all threads within this batch have failed or one succeeds.
              Once any of the threads succeeds, the failure flag should be
              removed from all failed threads.
+
+        When ``EVENT_DRIVEN`` is set, execution blocks until a pooled thread
+        signals that it has left its ``run`` method or a new thread is appended,
+        rather than polling the completion queue each ``THREAD_SLEEP``.
+
+        Threads are only started once everything they depend on has finished.
+        Threads still waiting when nothing is left running can never start and
+        are failed.
+
+        Execution continues whilst any thread is waiting out a retry delay.
+
+        Threads which run past their timeout are cancelled and failed. If the
+        whole execution runs past ``threading.timeout``, or a failure escapes,
+        every thread which has not finished is cancelled.
         """
+        self._cancelled = None
+        timeout = self._setting('timeout', None)
+        deadline = perf_counter() + timeout if timeout is not None else None
+
         # fill up the pool
-        self._fill_pool()
+        try:
+            self._fill_pool()
+        except PoolEmptyError:
+            pass
         Logger().info('Starting pool for ' + str(len(self._pool)) + ' threads')
 
-        while len(self._pool) > 0:
-            self.monitor()
-            try:
-                self._fill_pool()
-            except PoolEmptyError:
-                pass
-            sleep(Threadable.THREAD_SLEEP)
+        try:
+            while len(self._pool) > 0 or len(self._delayed) > 0:
+                if ThreadManager.EVENT_DRIVEN:
+                    self.monitor(self._wait_for_change(self._next_deadline(deadline)))
+                else:
+                    self.monitor()
+                self._expire(deadline)
+                try:
+                    self._fill_pool()
+                except PoolEmptyError:
+                    pass
+                if not ThreadManager.EVENT_DRIVEN:
+                    sleep(Threadable.THREAD_SLEEP)
+        except Exception:
+            # don't leave the rest running unobserved
+            self.cancel(ThreadCancelledError('Execution aborted'))
+            raise
+        finally:
+            # a trace of a run which raised is the one most worth having
+            self._save_trace()
+        self._fail_blocked()
         if len(self._failed_threads) > 0:
             Logger().error('{0} threads have failed as part of this execution'.format(len(self._failed_threads)))
             return False
@@ -167,44 +339,303 @@ class ThreadManager(list):
             )
         )
 
-    def monitor(self):
+    def monitor(self, threads=None):
         """
         Monitor pooled threads and remove complete and failed ones
+
+        :param list: threads [optional] Threads which have signalled completion.
+                     If not provided, the completion queue is drained without blocking.
         """
-        for thread in self._pool:
-            try:
-                if not thread.isAlive():
-                    self._pool.remove(thread)
+        if threads is None:
+            threads = self._drain()
 
-                if thread.complete:
+        for thread in threads:
+            if thread in self._abandoned:
+                # finished long after it was given up on and already counted as failed
+                self._abandoned.discard(thread)
+                continue
+            try:
+                if thread.ident is not None:
+                    # dedicated threads have left run() and are about to exit
                     thread.join()
 
+                self._pool.discard(thread)
+                self._coroutines.discard(thread)
+                self._deadline_of.pop(thread, None)
+                self._expired.discard(thread)
+                if self._controller is not None:
+                    latency = perf_counter() - thread.started_at if thread.started_at is not None else None
+                    self._controller.finished(thread, latency)
+
                 if thread.failed:
                     raise thread.failure
+                if thread in self._retrying:
+                    # the retry got through so the back-end has recovered
+                    self._retrying.pop(thread).success()
             except InvalidQueryError:
-                self._failed_threads.append(thread)
+                self._fail(thread)
                 self.remove(thread)
-            except InvalidConnectionError:
-                self.remove(thread)
-                if not thread.hasobservers:
-                    self._failed_threads.append(thread)
-                else:
-                    self.rotate_observers(thread)
+                # observers share the query so will never get results
+                for observer in getattr(thread, 'observers', []):
+                    if not observer.failed:
+                        observer.failure = thread.failure
+            except InvalidConnectionError as exception:
+                self._retry(thread, exception)
             except ThreadNotStartedError:
-                # pylint: disable=protected-access
-                # It it necessary to access the _failure and _complete status
-                # of the executed thread in the event of a Thread not being
-                # started to clear the exception and allow the thread to continue
-                # execution.
-                thread._failure = None
-                thread._complete = False
+                ThreadManager._reset(thread)
+                self._enqueue(thread)
+            except ThreadCancelledError:
+                self._fail(thread)
+            finally:
+                self._release(thread)
+
+    @accepts(ThreadCancelledError)
+    def cancel(self, reason):
+        """
+        Stop every thread which has not yet finished
+
+        @param reason ThreadCancelledError Recorded as the failure of each cancelled thread
+
+        Threads waiting to start fail straight away, as do any appended afterwards.
+        Running threads are asked to stop through their cancellation token and
+        are failed once they do.
+        """
+        with self._lock:
+            self._cancelled = reason
+            waiting = [entry[2] for entry in self._ready] + list(self._blocked) + list(self._delayed)
+            for timer in self._delayed.values():
+                timer.cancel()
+            self._ready.clear()
+            self._blocked.clear()
+            self._dependents.clear()
+            self._delayed.clear()
+            running = list(self._pool)
+        Logger().error(str(reason))
+        for thread in waiting:
+            if not (thread.complete or thread.failed):
+                thread.cancel(reason)
+                thread.abandon()
+                self._failed_threads.append(thread)
+        for thread in running:
+            thread.cancel(reason)
+            self._give_up_on(thread)
+        # wake execute in case nothing else will
+        with self._condition:
+            self._appended = True
+            self._condition.notify()
 
     @accepts(Threadable)
-    def rotate_observers(self, thread):
+    def _fail(self, thread):
+        """
+        Record a failed thread
+
+        @param thread Threadable
+
+        With ``threading.abort_on_failure`` set, the first failure cancels everything else.
+        """
+        self._failed_threads.append(thread)
+        if self._cancelled is None and self._setting('abort_on_failure', False):
+            self.cancel(ThreadCancelledError('Aborting because thread \'{0}\' failed'.format(thread.thread_name)))
+
+    def _next_deadline(self, deadline):
+        """
+        Get the earliest time at which a thread, or the execution, runs out of time
+
+        @param deadline float|None The ``perf_counter`` value at which the execution runs out of time
+
+        @return float|None
+        """
+        with self._lock:
+            while len(self._deadlines) > 0 and self._deadline_of.get(self._deadlines[0][2]) != self._deadlines[0][0]:
+                heappop(self._deadlines)
+            earliest = self._deadlines[0][0] if len(self._deadlines) > 0 else None
+        if deadline is not None and self._cancelled is None:
+            earliest = deadline if earliest is None else min(earliest, deadline)
+        return earliest
+
+    def _expire(self, deadline):
+        """
+        Cancel and fail threads which have run out of time
+
+        @param deadline float|None The ``perf_counter`` value at which the execution runs out of time
+        """
+        now = perf_counter()
+        if deadline is not None and now >= deadline and self._cancelled is None:
+            self.cancel(ThreadTimeoutError('Execution did not finish within {0} seconds'.format(self._setting('timeout', None))))
+        expired = []
+        with self._lock:
+            while len(self._deadlines) > 0 and self._deadlines[0][0] <= now:
+                when, _, thread = heappop(self._deadlines)
+                if self._deadline_of.get(thread) == when:
+                    del self._deadline_of[thread]
+                    expired.append(thread)
+        for thread in expired:
+            if thread not in self._pool:
+                continue
+            if thread in self._expired:
+                Logger().warning('Thread \'{0}\' has not stopped since it was cancelled. No longer waiting for it'.format(
+                    thread.thread_name
+                ))
+                with self._lock:
+                    self._pool.discard(thread)
+                    self._coroutines.discard(thread)
+                    self._expired.discard(thread)
+                    self._abandoned.add(thread)
+                thread.abandon()
+                if self._controller is not None:
+                    self._controller.finished(thread, None)
+                self._fail(thread)
+                self._release(thread)
+            elif not (thread.complete or thread.failed):
+                thread.cancel(ThreadTimeoutError('Thread \'{0}\' did not finish in time'.format(thread.thread_name)))
+                thread.abandon()
+                self._give_up_on(thread)
+
+    def _give_up_on(self, thread):
+        """
+        Stop waiting for a cancelled thread if it has not finished within ``cancel_grace`` seconds
+
+        @param thread Threadable
+
+        Python threads cannot be killed. A thread which ignores its token is left running.
+        """
+        when = perf_counter() + self._setting('cancel_grace', ThreadManager.CANCEL_GRACE)
+        with self._lock:
+            self._expired.add(thread)
+            self._deadline_of[thread] = when
+            heappush(self._deadlines, (when, next(self._sequence), thread))
+
+    @staticmethod
+    def _reset(thread):
+        """
+        Clear the outcome of a thread so that it can be run again
+
+        @param thread Threadable
+        """
+        # pylint: disable=protected-access
+        # It it necessary to access the _failure and _complete status
+        # of the executed thread to clear the exception and allow the
+        # thread to continue execution.
+        thread._failure = None
+        thread._complete = False
+        thread.dispatched = False
+
+    @accepts(Threadable, InvalidConnectionError)
+    def _retry(self, thread, exception):
+        """
+        Decide whether a thread which could not reach its back-end gets another attempt
+
+        @param thread    Threadable
+        @param exception InvalidConnectionError
+
+        Threads with observers hand the work to an observer, others are run again.
+        Attempts are spaced out by exponential back-off with jitter, or by the
+        ``Retry-After`` the server asked for if that is longer. The thread fails
+        once ``max_retries`` is reached, when the failure will not go away on
+        retry or whilst the circuit breaker for the back-end is open.
+        """
+        self._retrying.pop(thread, None)
+        breaker = self._breaker(exception.server)
+        breaker.failure()
+        attempt = thread.retries + 1
+        hasobservers = getattr(thread, 'hasobservers', False)
+
+        reason = None
+        if not exception.retryable:
+            reason = 'HTTP/{0} will not succeed on retry'.format(exception.code)
+        elif attempt > self._setting('max_retries', ThreadManager.MAX_RETRIES):
+            reason = 'giving up after {0} retries'.format(thread.retries)
+        elif not hasobservers and thread.ident is not None:
+            reason = 'dedicated threads cannot be restarted'
+        elif not breaker.allow():
+            reason = 'circuit breaker for {0} is open'.format(exception.server)
+
+        if reason is not None:
+            Logger().error('Thread \'{0}\' failed to connect. {1}'.format(thread.thread_name, reason))
+            if hasobservers:
+                # observers share the query so will never get results
+                for observer in thread.observers:
+                    if not observer.failed:
+                        observer.failure = exception
+            self.remove(thread)
+            self._fail(thread)
+            return
+
+        delay = Backoff(
+            self._setting('retry_delay', ThreadManager.RETRY_DELAY),
+            self._setting('retry_max_delay', ThreadManager.RETRY_MAX_DELAY)
+        ).delay(attempt)
+        delay = max(delay, exception.retry_after or 0.0)
+        Logger().warning(
+            'Thread \'{0}\' failed to connect. Retry {1} in {2:.2f} seconds'.format(thread.thread_name, attempt, delay)
+        )
+        if hasobservers:
+            self.remove(thread)
+            replacement = self.rotate_observers(thread, delay=delay)
+        else:
+            ThreadManager._reset(thread)
+            thread.retries = attempt
+            replacement = thread
+            self._schedule(thread, delay)
+        if replacement is not None:
+            self._retrying[replacement] = breaker
+
+    def _breaker(self, server):
+        """
+        Get the circuit breaker for a back-end
+
+        @param server string
+
+        @return CircuitBreaker
+        """
+        with self._lock:
+            if server not in self._breakers:
+                self._breakers[server] = CircuitBreaker(
+                    self._setting('breaker_threshold', ThreadManager.BREAKER_THRESHOLD),
+                    self._setting('breaker_reset', ThreadManager.BREAKER_RESET)
+                )
+            return self._breakers[server]
+
+    def _schedule(self, thread, delay):
+        """
+        Place a thread on the ready queue once a delay has passed
+
+        @param thread Threadable
+        @param delay  float Seconds
+        """
+        if delay <= 0:
+            self._enqueue(thread)
+            return
+        timer = Timer(delay, self._resume, args=(thread,))
+        timer.daemon = True
+        with self._lock:
+            self._delayed[thread] = timer
+        timer.start()
+
+    def _resume(self, thread):
+        """
+        Enqueue a thread whose delay has passed and wake execute
+
+        @param thread Threadable
+        """
+        with self._lock:
+            # cleared whilst waiting
+            if self._delayed.pop(thread, None) is None:
+                return
+            self._enqueue(thread)
+        with self._condition:
+            self._appended = True
+            self._condition.notify()
+
+    @accepts(Threadable, delay=(int, float))
+    def rotate_observers(self, thread, delay=0):
         """
         Rotates observers of a failed thread
 
         @param thread Threadable
+        @param delay  float [optional] Seconds to wait before starting the replacement
+
+        @return Threadable|None The observer now running the query. None if every observer has failed
 
         If a thread has failed because of a broken / lost connection but has observers,
         this method rotates the observers and tries again with a different thread.
@@ -217,36 +648,199 @@ class ThreadManager(list):
         # if the replacement has already got a failure, we've exhausted the list
         # and cannot continue
         if replacement.failed:
-            self._failed_threads.append(replacement)
+            self._fail(replacement)
+            return None
+        replacement.retries = thread.retries + 1
+        with self._lock:
+            super().append(replacement)
+        self._schedule(replacement, delay)
+        return replacement
+
+    @accepts(Threadable)
+    def _enqueue(self, thread):
+        """
+        Place a thread on the ready queue or, if blocked, park it against its dependencies
+
+        @param thread Threadable
+
+        The ready queue is a heap ordered by priority then by order of arrival.
+        """
+        with self._lock:
+            if self._cancelled is not None:
+                thread.cancel(self._cancelled)
+                thread.abandon()
+                self._failed_threads.append(thread)
+                return
+            waiting = [
+                dependency for dependency in thread.dependencies
+                if not (dependency.complete or dependency.failed)
+            ]
+            if len(waiting) == 0:
+                self._blocked.discard(thread)
+                heappush(self._ready, (-thread.PRIORITY, next(self._sequence), thread))
+                self._trace.ready(thread)
+                return
+            self._blocked.add(thread)
+            for dependency in waiting:
+                self._dependents.setdefault(dependency, []).append(thread)
+
+    @accepts(Threadable)
+    def _release(self, thread):
+        """
+        Move threads which were waiting on the given thread to the ready queue
+
+        @param thread Threadable
+
+        Observers finish with the thread they observe so their dependents are released too.
+        Dependents still waiting on something else are parked again.
+        """
+        with self._lock:
+            for finished in [thread] + list(getattr(thread, 'observers', None) or []):
+                for dependent in self._dependents.pop(finished, []):
+                    if dependent in self._blocked:
+                        self._enqueue(dependent)
+
+    def _unblock(self):
+        """
+        Re-check every blocked thread
+
+        Catches dependencies which finished without passing through this manager.
+        """
+        with self._lock:
+            for thread in list(self._blocked):
+                if not thread.blocked:
+                    self._enqueue(thread)
+
+    def _save_trace(self):
+        """
+        Writes the trace to the file named by ``threading.trace`` in the configuration
+
+        The summary is written to the log at the same time.
+        """
+        path = self._setting('trace', None)
+        if path is None:
             return
-        super().append(replacement)
+        Logger().info('Thread execution summary' + os.linesep + self._trace.summary())
+        try:
+            self._trace.save(path)
+            Logger().info('Execution trace written to \'{0}\''.format(path))
+        except OSError as exception:
+            Logger().warning('Failed to write execution trace to \'{0}\''.format(path))
+            Logger().warning(exception)
 
-    def _fill_pool(self):
-        """ Fills the current executing thread pool from the class pool """
-        complete = True
-        # dont bother filling the pool if there
-        # is nothing left to fill it with
+    def _fail_blocked(self):
+        """
+        Fails any thread which is still waiting on a dependency that can no longer finish
+        """
         for thread in self:
-            if thread.ready:
-                complete = False
-                break
-        if complete:
-            raise PoolEmptyError()
-
-        i = 0
-        while i < len(self) and len(self._pool) < ThreadManager.POOL_SIZE:
-            try:
-                thread = self[i]
-                if thread.ready and thread not in self._pool:
-                    try:
-                        thread.start()
-                        self._pool.append(thread)
-                    # skip if thread has already been started
-                    except RuntimeError:
-                        pass
-            except IndexError:
-                pass
-            i += 1
+            if thread.complete or thread.failed or thread.dispatched:
+                continue
+            waiting = [
+                dependency.thread_name for dependency in thread.dependencies
+                if not (dependency.complete or dependency.failed)
+            ]
+            thread.failure = ThreadFailedError(
+                'Thread \'{0}\' cannot start. Still waiting on {1}'.format(thread.thread_name, waiting)
+            )
+            Logger().error(thread.failure)
+            self._fail(thread)
+
+    def _fill_pool(self):
+        """ Fills the current executing thread pool from the ready queue """
+        with self._lock:
+            if len(self._ready) == 0 and len(self._pool) == 0:
+                self._unblock()
+
+            # dont bother filling the pool if there
+            # is nothing left to fill it with
+            if len(self._ready) == 0:
+                raise PoolEmptyError()
+
+            # coroutines are bounded by the async limit rather than the pool size
+            deferred = []
+            while len(self._ready) > 0 and len(self._pool) - len(self._coroutines) < ThreadManager.POOL_SIZE:
+                entry = heappop(self._ready)
+                thread = entry[2]
+                if not thread.ready or thread in self._pool:
+                    continue
+                # the class of thread is at its limit, leave it queued
+                if self._controller is not None and not self._controller.allow(thread):
+                    deferred.append(entry)
+                    continue
+                try:
+                    self._dispatch(thread)
+                    self._pool.add(thread)
+                    if thread.EXECUTOR == Threadable.ASYNC:
+                        self._coroutines.add(thread)
+                    if self._controller is not None:
+                        self._controller.started(thread)
+                # skip if thread has already been started
+                except RuntimeError:
+                    pass
+            for entry in deferred:
+                heappush(self._ready, entry)
+
+    @accepts(Threadable)
+    def _dispatch(self, thread):
+        """
+        Hands a thread to the executor named by its ``EXECUTOR`` attribute
+
+        @param thread Threadable
+
+        Unknown executor names fall back to a dedicated thread.
+        """
+        executor = self._executors.get(thread.EXECUTOR, self._executors[Threadable.THREAD])
+        thread.dispatched = True
+        self._trace.dispatched(thread)
+        timeout = thread.timeout if thread.timeout is not None else self._setting('thread_timeout', None)
+        if timeout is not None:
+            when = perf_counter() + timeout
+            with self._lock:
+                self._deadline_of[thread] = when
+                heappush(self._deadlines, (when, next(self._sequence), thread))
+        executor.submit(thread, self._signal)
+
+    def _signal(self, thread):
+        """
+        Places a thread on the completion queue and wakes execute
+
+        @param thread Threadable
+        """
+        self._trace.finished(thread)
+        with self._condition:
+            self._finished.append(thread)
+            self._condition.notify()
+
+    def _drain(self):
+        """
+        Empties the completion queue without blocking
+
+        @return list of threads which have signalled completion since the last call
+        """
+        with self._condition:
+            finished = list(self._finished)
+            self._finished.clear()
+            self._appended = False
+        return finished
+
+    def _wait_for_change(self, until=None):
+        """
+        Blocks until at least one thread has finished or a new thread has been appended
+
+        @param until float [optional] ``perf_counter`` value at which to stop waiting regardless
+
+        @return list of threads which have signalled completion since the last call
+        """
+        with self._condition:
+            while len(self._finished) == 0 and not self._appended:
+                if until is None:
+                    self._condition.wait()
+                    continue
+                remaining = until - perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        return self._drain()
 
     def __new__(cls):
         """
@@ -254,6 +848,9 @@ class ThreadManager(list):
         """
 
         cls.POOL_SIZE = psutil.cpu_count(logical=True) * 64
+        cls.IO_WORKERS = psutil.cpu_count(logical=True) * 8
+        cls.CPU_WORKERS = psutil.cpu_count(logical=True)
+        cls.PROCESS_WORKERS = psutil.cpu_count(logical=False) or cls.CPU_WORKERS
         if cls._instance is None:
             Logger().info('Loading thread manager')
             cls._is_loaded = False
@@ -7,9 +7,11 @@ Module for managing attachments to issues
 @link https://esspde-gitlab.ssn.hpe.com/proffitt/JiraWeeklyReport
 """
 import os
-import pycurl
+import asyncio
+import requests
 from pyccata.core.managers.report import ReportManager
 from pyccata.core.abstract import ThreadableDocument
+from pyccata.core.threading import AsyncThreadable
 from pyccata.core.decorators import accepts
 from pyccata.core.filter import Filter
 from pyccata.core.resources  import Replacements
@@ -17,12 +19,19 @@ from pyccata.core.log import Logger
 from pyccata.core.helpers import create_directory
 from pyccata.core.configuration import Configuration
 from pyccata.core.exceptions import InvalidCallbackError
+from pyccata.core.download import Download
 
-class Attachments(ThreadableDocument):
+class Attachments(ThreadableDocument, AsyncThreadable):
     """
     Represents a list of ticket attachments for a release
+
+    Attachments are downloaded concurrently from the event loop rather than
+    holding an IO worker for the whole batch. Downloads are resumable and
+    files which are already complete are not fetched again.
     """
 
+    DOWNLOAD_WORKERS = 8
+
     _content = None
     _collate = None
     _output_path = None
@@ -32,20 +41,24 @@ class Attachments(ThreadableDocument):
         # pylint: disable=arguments-differ
         self._content = Filter(query, max_results=50, fields=fields)
         self.threadmanager.append(self._content)
+        self.depends_on(self._content)
         self.projectmanager = Configuration().manager
         self._collate = collate.split(',')
         self._output_path = Replacements().replace(output_path)
         create_directory(self._output_path)
 
-    def run(self):
-        """ wait for the filter to complete """
-        while not self._complete:
-            self._complete = self._content.complete
-            if self._content.failed:
-                Logger().warning('Failed to execute ' + self._content.query)
-                Logger().warning(self._content.failure)
-                self._complete = True
-                return
+    @property
+    def reads(self):
+        """ Only the attachments of each issue are read """
+        return [(thread, ['attachments'] if thread is self._content else None) for thread in self.dependencies]
+
+    async def run(self):
+        """ Download the attachments found by the filter once it has finished """
+        self._complete = True
+        if self._content.failed:
+            Logger().warning('Failed to execute ' + self._content.query)
+            Logger().warning(self._content.failure)
+            return
 
         content = [item for issue in self._content.results for item in issue.attachments]
         contents = []
@@ -60,47 +73,71 @@ class Attachments(ThreadableDocument):
             return
 
         try:
-            self._download_attachments()
+            await self._download_attachments()
         except InvalidCallbackError as exception:
             Logger().error(exception)
             self.failure = exception
 
 
-    def _download_attachments(self):
+    async def _download_attachments(self):
         """
         Downloads all attachments from the project manager.
+
+        At most ``http.download_workers`` attachments are fetched at once.
         """
         # attachments function is a callback to the project manager
         attachments_function = self.projectmanager.server.attachments
         if not attachments_function or attachments_function is None:
             raise InvalidCallbackError('attachments callback function has not been set')
 
-        for item in self._content:
-            with open(os.path.join(self._output_path, item.filename), 'wb') as output_file:
-                try:
-                    attachment_url = attachments_function(str(item.attachment_id), item.filename)
-                    Logger().info('Downloading file \'' + item.filename + '\' from \'' + attachment_url + '\'')
-                    curl_instance = pycurl.Curl()
-                    curl_instance.setopt(curl_instance.URL, attachment_url)
-                    curl_instance.setopt(
-                        pycurl.USERPWD,
-                        '{username}:{password}'.format(
-                            username=Configuration().jira.username,
-                            password=Configuration().jira.password
-                        )
-                    )
-
-                    curl_instance.setopt(curl_instance.WRITEDATA, output_file)
-                    curl_instance.perform()
-                    if curl_instance.getinfo(pycurl.RESPONSE_CODE) != 200:
-                        Logger().error(
-                            'Error in downloading attachments. Got response code {0}'.format(
-                                curl_instance.getinfo(pycurl.RESPONSE_CODE)
-                            )
-                        )
-                except pycurl.error as exception:
-                    Logger().error(exception)
-                curl_instance.close()
+        limit = asyncio.Semaphore(Attachments._download_workers())
+
+        async def download(item):
+            """ Wait for a free slot then download the item """
+            async with limit:
+                await AsyncThreadable.blocking(self._download, attachments_function, item)
+
+        await asyncio.gather(*[download(item) for item in self._content])
+
+    @staticmethod
+    def _download_timeout():
+        """ Get the seconds to wait for the server to connect or send more of an attachment """
+        try:
+            return Configuration().http.timeout
+        except AttributeError:
+            return Download.TIMEOUT
+
+    @staticmethod
+    def _download_workers():
+        """ Get the number of attachments which may download at once """
+        try:
+            return Configuration().http.download_workers
+        except AttributeError:
+            return Attachments.DOWNLOAD_WORKERS
+
+    def _download(self, attachments_function, item):
+        """
+        Downloads a single attachment
+
+        @param attachments_function callable Returns the url of the attachment
+        @param item                 Attachment
+
+        Connections are taken from the pool shared through the project manager,
+        which already holds the credentials of the server. Files which are
+        already complete are skipped and partial files resumed, see
+        ``pyccata.core.download.Download``.
+        """
+        try:
+            attachment_url = attachments_function(str(item.attachment_id), item.filename)
+            Logger().info('Downloading file \'' + item.filename + '\' from \'' + attachment_url + '\'')
+            Download(
+                attachment_url,
+                os.path.join(self._output_path, item.filename),
+                size=getattr(item, 'size', None),
+                timeout=self._download_timeout()
+            ).fetch(self.projectmanager.session)
+        except (requests.RequestException, OSError) as exception:
+            Logger().error(exception)
 
     @accepts(ReportManager)
     def render(self, document):
@@ -4,10 +4,8 @@ Loops over all files in a directory and performs a command over each
 import os
 import re
 import fnmatch
-import time
 from collections import namedtuple
 
-from pyccata.core.threading import Threadable
 from pyccata.core.resources import Replacements
 from pyccata.core.command import ThreadableCommand
 
@@ -52,6 +50,7 @@ class Fileloop(ThreadableCommand):
         self._wait_for = None
         if wait_for is not None:
             self._wait_for = self.threadmanager.find(wait_for)
+            self.depends_on(self._wait_for)
 
     def _build_command_list(self):
         """
@@ -66,6 +65,9 @@ class Fileloop(ThreadableCommand):
 
         config = namedtuple('config', 'name command input_directory output_directory wait_for')
         for index, filename in enumerate(files):
+            # each command waits on the one maxthreads before it so no more than
+            # maxthreads of them are ever runnable at once
+            lane = self._commands[index - self._maxthreads] if index >= self._maxthreads else None
             additional = {}
             additional['filename'] = filename
             output_file, current_extension = os.path.splitext(filename)
@@ -94,34 +96,24 @@ class Fileloop(ThreadableCommand):
                         command=command_string,
                         input_directory=self._input_directory,
                         output_directory=self._output_directory,
-                        wait_for=None
+                        wait_for=lane
                     )
                 )
             )
 
     def run(self):
-        """ Run the current set of commands """
-        if self._wait_for is not None:
-            while not self._wait_for.complete:
-                time.sleep(Threadable.THREAD_SLEEP)
-        self._build_command_list()
+        """
+        Hands a command for each file to the thread manager
+
+        The fileloop does not wait for the commands to finish. Instead every
+        thread waiting for the loop is made to wait for each of its commands,
+        so nothing declared with ``wait_for`` the loop starts before they are done.
+        """
         if not os.path.exists(self._output_directory):
             os.makedirs(self._output_directory)
-
-        pool = []
-        current_index = 0
-        for command in self._commands:
-            if current_index < self._maxthreads:
-                pool.append(command)
-                self.threadmanager.append(pool[-1])
-                current_index += 1
-
-            if current_index == self._maxthreads:
-                while True:
-                    for item in pool:
-                        if item.complete:
-                            current_index -= 1
-                    if current_index < self._maxthreads:
-                        break
-                    time.sleep(Threadable.THREAD_SLEEP)
+        self._build_command_list()
+        for thread in list(self.threadmanager):
+            if self in thread.dependencies:
+                for command in self._commands:
+                    thread.depends_on(command)
         self._complete = True
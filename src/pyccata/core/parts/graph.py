@@ -38,6 +38,15 @@ class Graph(Picture):
     _colour_index = 0
 
     _filenames = []
+    _graph_type = None
+
+    # graphs drawn only from the x and y data, and the extra columns each also reads
+    PLOTTED = {
+        'bar_graph': [],
+        'line': [],
+        'scatter': ['group_by'],
+        'hexbin': ['aggragate']
+    }
 
     def setup(self, query=None, width=100, graphtype=None, structure=None):
         """
@@ -65,13 +74,30 @@ class Graph(Picture):
         self._content = Filter(
             query.query,
             max_results=(query.max_results if hasattr(query, 'max_results') else False),
-            fields=(query.fields if hasattr(query, 'fields') else []),
+            fields=(query.fields if hasattr(query, 'fields') else None),
             collate=(query.collate if hasattr(query, 'collate') else None),
             distinct=(query.distinct if hasattr(query, 'distinct') else False),
             namespace=Configuration.NAMESPACE,
             group_by=(query.group_by if hasattr(query, 'group_by') else None)
         )
         self.threadmanager.append(self._content)
+        self.depends_on(self._content)
+
+    @property
+    def reads(self):
+        """ Standard plots read the x and y data of the structure, and their own extra columns """
+        if self._graph_type not in Graph.PLOTTED:
+            return super().reads
+        attributes = []
+        for data in (getattr(self._graph, 'xdata', None), getattr(self._graph, 'ydata', None)):
+            if not isinstance(data, (str, list)):
+                return super().reads
+            attributes += data if isinstance(data, list) else [data]
+        for extra in Graph.PLOTTED[self._graph_type]:
+            value = self._content.group_by if extra == 'group_by' else getattr(self._graph, extra, None)
+            if value is not None:
+                attributes.append(value)
+        return [(thread, attributes if thread is self._content else None) for thread in self.dependencies]
 
     @staticmethod
     def _get_filename(graphtype, query):
@@ -88,15 +114,16 @@ class Graph(Picture):
     def run(self):
         """
         Execute the current thread
-        """
-        while not self._complete:
-            if self._content.complete:
-                self.save()
 
+        The graph is not started until its filter has finished.
+        """
         if self._content.failed:
             Logger().warning('Failed to execute \'' + self._content.query + '\'')
             Logger().warning('Reason was:')
             Logger().warning(self._content.failure)
+            self._complete = True
+            return
+        self.save()
 
     def render(self, report):
         """
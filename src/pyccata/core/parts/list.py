@@ -56,34 +56,35 @@ class List(ThreadableDocument):
         if isinstance(self._content, Filter):
             Logger().debug('Appending list content filter to thread manager')
             self.threadmanager.append(self._content)
+            self.depends_on(self._content)
         else:
             for item in self:
                 if isinstance(item, Filter):
                     self.threadmanager.append(item)
+                    self.depends_on(item)
+
+    @property
+    def reads(self):
+        """ Lists read their field from each result, or the description when it is missing """
+        attributes = [self._field, 'description'] if self._field not in ('', 'description') else ['description']
+        return [(thread, attributes if isinstance(thread, Filter) else None) for thread in self.dependencies]
 
     def run(self):
         """
-            Builds the list and executes any queries.
+        Builds the list from the results of any queries.
+
+        The list is not started until its filters have finished.
         """
-        while not self._complete:
-            if isinstance(self._content, Filter):
-                #pylint disable=maybe-no-member
-                self._complete = self._content.complete
-                if self._content.failed:
-                    Logger().debug(self._content.failure)
-                    self._complete = True
-            else:
-                complete = True
-                for item in self._content:
-                    if isinstance(item, Filter):
-                        complete = item.complete or item.failed
-                        if item.failed:
-                            Logger().warning('Failed to execute \'' + item.query + '\'')
-                            Logger().warning(item.failure)
-                    if not complete:
-                        break
-                if complete:
-                    self._complete = complete
+        if isinstance(self._content, Filter):
+            #pylint disable=maybe-no-member
+            if self._content.failed:
+                Logger().debug(self._content.failure)
+        else:
+            for item in self._content:
+                if isinstance(item, Filter) and item.failed:
+                    Logger().warning('Failed to execute \'' + item.query + '\'')
+                    Logger().warning(item.failure)
+        self._complete = True
 
     @accepts(ReportManager)
     def render(self, document):
@@ -45,6 +45,7 @@ class Table(ThreadableDocument):
             try:
                 self._rows = Table._parse_filter(rows)
                 self.threadmanager.append(self._rows)
+                self.depends_on(self._rows)
             #pylint: disable=broad-except
             except Exception as exception:
                 Logger().warning('Failed to create filter from config object')
@@ -56,6 +57,25 @@ class Table(ThreadableDocument):
         self._columns = columns
         self._style = style
 
+    @property
+    def reads(self):
+        """ Each cell of a row is read from the result attribute named by the fields of its filter """
+        return [
+            (thread, Table._attributes(thread.fields) if isinstance(thread, Filter) else None)
+            for thread in self.dependencies
+        ]
+
+    @staticmethod
+    def _attributes(fields):
+        """
+        Get the result attributes holding a list of fields, None if the fields are not listed
+
+        @param fields list|None
+        """
+        if fields is None or len(fields) == 0:
+            return None
+        return [field.replace(' ', '_').lower() for field in fields]
+
     @accepts(list)
     def _parse_content(self, rows):
         """
@@ -71,11 +91,14 @@ class Table(ThreadableDocument):
                     try:
                         rows[row_index][cell_index] = Table._parse_filter(cell)
                         self.threadmanager.append(rows[row_index][cell_index])
+                        self.depends_on(rows[row_index][cell_index])
                     #pylint: disable=broad-except
                     except Exception as exception:
                         Logger().warning('Failed to create filter from config object')
                         Logger().warning('Exception was:')
                         Logger().warning(exception)
+                elif isinstance(cell, Filter):
+                    self.depends_on(cell)
                 elif isinstance(cell, str):
                     rows[row_index][cell_index] = Replacements().replace(cell)
         return rows
@@ -101,22 +124,20 @@ class Table(ThreadableDocument):
         )
 
     def run(self):
-        while not self._complete:
-            complete = True
-            if isinstance(self._rows, Filter):
-                self._complete = self._rows.complete
-                continue
-            for row in self._rows:
-                for item in row:
-                    if isinstance(item, Filter) and item.failed:
-                        Logger().warning('Failed to execute \'' + item.query + '\'')
-                        Logger().warning('Reason was:')
-                        Logger().warning(item.failure)
-                    elif isinstance(item, Filter) and not item.complete:
-                        complete = False
-
-            if complete:
-                self._complete = True
+        """
+        Reports on any filters which failed to execute.
+
+        The table is not started until its filters have finished.
+        """
+        filters = [self._rows] if isinstance(self._rows, Filter) else [
+            item for row in self._rows for item in row if isinstance(item, Filter)
+        ]
+        for item in filters:
+            if item.failed:
+                Logger().warning('Failed to execute \'' + item.query + '\'')
+                Logger().warning('Reason was:')
+                Logger().warning(item.failure)
+        self._complete = True
 
     @accepts(ReportManager)
     def render(self, report):
@@ -11,7 +11,11 @@ import os
 import re
 import calendar
 import copy
+import keyword
 import subprocess
+from numbers import Integral
+from itertools import chain
+from threading import Lock
 from argparse import Action
 from datetime import datetime
 import pandas as pd
@@ -24,6 +28,20 @@ from pyccata.core.exceptions import InvalidArgumentNumberError
 from pyccata.core.exceptions import InvalidModuleError
 from pyccata.core.helpers import implements
 
+def _slot_names(cls):
+    """
+    Get the names of the slots declared by a class and its bases, in order
+
+    @param cls type
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get('__slots__', ())
+        for name in [slots] if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and name not in names:
+                names.append(name)
+    return names
+
 class ResultListItemAbstract(object):
     """
     Abstract base class for ResultListItems
@@ -32,14 +50,20 @@ class ResultListItemAbstract(object):
     # As a struct, no public methods are required.
     # Instead, all attributes are public
 
+    __slots__ = ()
     __implements__ = (ResultListItemInterface,)
 
+    # pandas types of the columns of delimited files holding these items, keyed by
+    # column. Columns not named are left for pandas to infer. See CSVFile
+    SCHEMA = None
+
     @accepts(dict)
     def from_dict(self, dictionary):
         """
         Reloads the object dictionary from another
         """
-        self.__dict__.update(dictionary)
+        for key, value in dictionary.items():
+            setattr(self, key, value)
         return self
 
     @property
@@ -47,7 +71,114 @@ class ResultListItemAbstract(object):
         """
         Convert a dictionary to a pandas series
         """
-        return pd.Series(self.__dict__)
+        return pd.Series(self._values())
+
+    def _values(self):
+        """
+        Get the attributes of the item, whether held in slots or in its dictionary
+        """
+        values = dict((name, getattr(self, name, None)) for name in _slot_names(type(self)))
+        values.update(getattr(self, '__dict__', {}))
+        return values
+
+class ResultRow(ResultListItemAbstract):
+    """
+    Base of the compact rows read from the dataframe of a ResultList
+
+    A row class is generated for each mapping item and set of columns. It
+    extends the class of the mapping item, so keeps its methods and constants,
+    but holds each column, and every other attribute the mapping item sets up,
+    in a slot. Rows are made from the values of a dataframe row without
+    copying the mapping item or calling ``__init__``.
+    """
+    # pylint: disable=too-few-public-methods
+    __slots__ = ()
+
+    MAPPING = None
+    COLUMNS = ()
+    FIELDS = ()
+
+    _setters = ()
+    _defaults = ()
+    _types = {}
+    _lock = Lock()
+
+    @staticmethod
+    @accepts(ResultListItemInterface, list)
+    def type_of(item, columns):
+        """
+        Get the row class for a mapping item and the columns of a dataframe
+
+        @param item    ResultListItemInterface
+        @param columns list
+
+        @return type|None None if a column cannot be held in a slot
+        """
+        key = (type(item), tuple(columns))
+        with ResultRow._lock:
+            if key not in ResultRow._types:
+                ResultRow._types[key] = ResultRow._generate(item, columns)
+            return ResultRow._types[key]
+
+    @staticmethod
+    def _generate(item, columns):
+        """
+        Create the row class for a mapping item and a set of columns
+        """
+        mapping = type(item)
+        defaults = getattr(item, '__dict__', {})
+        fields = list(columns) + [name for name in defaults if name not in columns]
+        inherited = _slot_names(mapping)
+        for field in fields:
+            if (
+                    not isinstance(field, str)
+                    or not field.isidentifier()
+                    or keyword.iskeyword(field)
+                    or (field not in inherited and hasattr(mapping, field))
+            ):
+                return None
+        if len(set(fields)) != len(fields):
+            return None
+
+        row_type = type(mapping.__name__ + 'Row', (ResultRow, mapping), {
+            '__slots__': tuple([field for field in fields if field not in inherited]),
+            '__module__': mapping.__module__,
+            'MAPPING': mapping,
+            'COLUMNS': tuple(columns),
+            'FIELDS': tuple(fields)
+        })
+        row_type._setters = tuple([getattr(row_type, field).__set__ for field in fields])
+        row_type._defaults = tuple([defaults[field] for field in fields[len(columns):]])
+        return row_type
+
+    @classmethod
+    def make(cls, values):
+        """
+        Create a row
+
+        @param values iterable The value of each column, in order
+        """
+        row = cls.__new__(cls)
+        for setter, value in zip(cls._setters, chain(values, cls._defaults)):
+            setter(row, value)
+        return row
+
+    def __reduce__(self):
+        return (_rebuild_row, (self.MAPPING, list(self.COLUMNS), [getattr(self, field) for field in self.FIELDS]))
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            type(self).__name__,
+            ', '.join(['{0}={1!r}'.format(field, getattr(self, field)) for field in self.COLUMNS])
+        )
+
+def _rebuild_row(mapping, columns, values):
+    """ Recreate a row, generating its class again if necessary. See ``ResultRow.__reduce__`` """
+    row_type = ResultRow.type_of(mapping(), columns)
+    row = row_type.make(values[:len(columns)])
+    for setter, value in zip(row_type._setters[len(columns):], values[len(columns):]):
+        setter(row, value)
+    return row
 
 class Issue(ResultListItemAbstract):
     """ Basic storage for a ticket item """
@@ -87,7 +218,7 @@ class Issue(ResultListItemAbstract):
 
     def keys(self):
         """ Gets the list of issue keys """
-        return list(self.__dict__.keys())
+        return list(self._values().keys())
 
 class Join(object):
     """
@@ -122,6 +253,16 @@ class Collation(object):
     the ResultList class
     """
     # pylint: disable=too-many-instance-attributes
+
+    # attributes of each result read by the methods of pyccata.core.collation, besides ``field``
+    READS = {
+        'total_by_field': [],
+        'flatten': [],
+        'average_days_since_creation': ['created'],
+        'average_duration': ['created', 'resolutiondate'],
+        'priority': ['priority']
+    }
+
     _method = None
     _field = None
     _columns = None
@@ -207,6 +348,19 @@ class Collation(object):
         """
         return self._field
 
+    @property
+    def fields(self):
+        """
+        Get the attributes of each result the collation method reads
+
+        @return list|None None if the method may read any attribute
+        """
+        name = getattr(self._method, '__name__', None)
+        if getattr(self._method, '__module__', None) != 'pyccata.core.collation' or name not in Collation.READS:
+            return None
+        fields = self._field if isinstance(self._field, list) else [self._field]
+        return [field for field in fields if field != ''] + Collation.READS[name]
+
     @property
     def query(self):
         """
@@ -291,6 +445,8 @@ class CommandLineResultItem(ResultListItemAbstract):
     # As a struct, no public methods are required.
     # Instead, all attributes are public
 
+    __slots__ = ('line',)
+
     def __init__(self):
         """
         Create a new CommandLineResultItem
@@ -301,7 +457,7 @@ class CommandLineResultItem(ResultListItemAbstract):
         """
         Gets the object keys
         """
-        return list(self.__dict__.keys())
+        return list(CommandLineResultItem.__slots__)
 
 class ArgumentFlag():
     """
@@ -443,6 +599,7 @@ class ResultList(list):
     _columns = None
     _group_by = None
     _subquery = None
+    _column_values = None
 
     def __init__(self, name=None, collate=None, distinct=False, namespace=None):
         """
@@ -459,12 +616,17 @@ class ResultList(list):
     #
 
     def __getitem__(self, key):
-        if self.dataframe is not None:
-            return self._get_item(dict(self.dataframe.iloc[key]))
+        # the frame is read here rather than handed out, so the cached columns stay valid
+        dataframe = self._dataframe if self._dataframe is not None else self.dataframe
+        if dataframe is not None:
+            if isinstance(key, Integral):
+                return self._get_row(key)
+            return self._get_item(dict(dataframe.iloc[key]))
         return super().__getitem__(key)
 
     def __setitem__(self, key, value):
         if self._dataframe is not None:
+            self._column_values = None
             self._dataframe.at[key] = value.series() if isinstance(value, ResultListInterface) else pd.Series(value)
         super().__setitem__(key, value)
 
@@ -475,6 +637,7 @@ class ResultList(list):
 
     def __delitem__(self, key):
         if self._dataframe is not None:
+            self._column_values = None
             return self._dataframe.__delitem__(key)
         return super().__delitem__(key)
 
@@ -594,9 +757,7 @@ class ResultList(list):
         Converts a dictionary into the type stored in _mapping_item
         """
         if isinstance(dictionary, dict) and self._mapping_item is not None:
-            item = copy.deepcopy(self._mapping_item)
-            item.__init__()
-            return item.from_dict(dictionary)
+            return self._get_item(dictionary)
         return dictionary
 
     @accepts(ResultListItemInterface)
@@ -622,7 +783,11 @@ class ResultList(list):
     def dataframe(self):
         """
         Get the dataframe for this object, creating as necessary
+
+        The frame may be changed in place by whoever it is handed to, so the
+        column values cached for reading rows are dropped.
         """
+        self._column_values = None
         if self._dataframe is not None:
             return self._dataframe
         if len(self) > 0 and self._mapping_item is not None:
@@ -649,6 +814,7 @@ class ResultList(list):
         """
         Sets the dataframe from a Pandas search
         """
+        self._column_values = None
         if not isinstance(dataframe, tuple):
             self._dataframe = dataframe
         else:
@@ -715,15 +881,42 @@ class ResultList(list):
 
     def _get_item(self, dictionary):
         """
-        Converts a dictionary to a copy of the mapping item
+        Converts a dictionary to a row of the mapping item
 
         @param dictionary dict
+
+        Falls back to a copy of the mapping item when the keys cannot be held in a ``ResultRow``.
+        The copy is deep so that rows never share the lists and dicts of the mapping item.
+        """
+        if dictionary is None or self._mapping_item is None:
+            return None
+        row_type = ResultRow.type_of(self._mapping_item, list(dictionary.keys()))
+        if row_type is None:
+            return copy.deepcopy(self._mapping_item).from_dict(dictionary)
+        return row_type.make(dictionary.values())
+
+    def _get_row(self, index):
         """
-        item = None
-        if dictionary is not None and self._mapping_item is not None:
-            item = copy.deepcopy(self._mapping_item)
-            item.from_dict(dictionary)
-        return item
+        Get a row of the dataframe as a row of the mapping item
+
+        @param index int
+
+        The row class and the values of each column are found once and kept until
+        the dataframe changes, so rows are read by position without building a
+        Series for each.
+        """
+        if self._mapping_item is None:
+            return None
+        if self._column_values is None:
+            columns = list(self._dataframe.columns)
+            self._column_values = (
+                ResultRow.type_of(self._mapping_item, columns),
+                [self._dataframe.iloc[:, column].to_numpy() for column in range(len(columns))]
+            )
+        row_type, values = self._column_values
+        if row_type is None:
+            return self._get_item(dict(self._dataframe.iloc[index]))
+        return row_type.make([column[index] for column in values])
 
 class MultiResultList(ResultList):
     """
@@ -1114,8 +1307,12 @@ class Attachment(object):
     # As a struct, no public methods are required.
     # Instead, all attributes are public
 
+    __slots__ = ('attachment_id', 'filename', 'mime_type', 'size', 'extension')
+
     def __init__(self):
         """ Store an attachment details as a struct """
         self.attachment_id = None
         self.filename = None
         self.mime_type = None
+        self.size = None
+        self.extension = None
@@ -0,0 +1,115 @@
+"""
+Back-off and circuit breaking for threads which fail to reach a remote service
+
+@package pyccata.core
+"""
+import random
+from threading import Lock
+from time import monotonic
+from pyccata.core.decorators import accepts
+
+class Backoff(object):
+    """
+    Exponential back-off with full jitter
+
+    The delay before attempt ``n`` is drawn uniformly from
+    ``[0, min(maximum, base * 2 ** (n - 1))]`` so that threads which failed
+    together do not all come back together.
+    """
+    _base = 1.0
+    _maximum = 30.0
+
+    @accepts((int, float), (int, float))
+    def __init__(self, base, maximum):
+        """
+        @param base    float Seconds. The upper bound of the delay before the first retry
+        @param maximum float Seconds. The delay never grows beyond this
+        """
+        self._base = float(base)
+        self._maximum = float(maximum)
+
+    @accepts(int)
+    def delay(self, attempt):
+        """
+        Get the number of seconds to wait before the given retry
+
+        @param attempt int 1 for the first retry
+
+        @return float
+        """
+        ceiling = min(self._maximum, self._base * (2 ** max(attempt - 1, 0)))
+        return random.uniform(0, ceiling)
+
+class CircuitBreaker(object):
+    """
+    Stops retrying against a back-end which keeps failing
+
+    The circuit opens after ``threshold`` consecutive failures. Whilst open no
+    retries are allowed. Once ``reset`` seconds have passed a single retry is
+    let through to probe the back-end; if that succeeds the circuit closes,
+    if it fails the circuit opens again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    _threshold = 5
+    _reset = 60.0
+    _failures = 0
+    _opened = None
+    _probing = False
+    _lock = None
+
+    @accepts(int, (int, float))
+    def __init__(self, threshold, reset):
+        """
+        @param threshold int   Consecutive failures before the circuit opens
+        @param reset     float Seconds the circuit stays open before a retry is let through
+        """
+        self._threshold = threshold
+        self._reset = float(reset)
+        self._failures = 0
+        self._opened = None
+        self._probing = False
+        self._lock = Lock()
+
+    @property
+    def state(self):
+        """ Get the current state of the circuit """
+        if self._opened is None:
+            return CircuitBreaker.CLOSED
+        if monotonic() - self._opened < self._reset:
+            return CircuitBreaker.OPEN
+        return CircuitBreaker.HALF_OPEN
+
+    def allow(self):
+        """
+        May another attempt be made against the back-end?
+
+        @return bool
+
+        Only one caller is allowed through whilst the circuit is half open.
+        """
+        with self._lock:
+            state = self.state
+            if state == CircuitBreaker.CLOSED:
+                return True
+            if state == CircuitBreaker.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def failure(self):
+        """ Record a failed attempt """
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self._threshold:
+                self._opened = monotonic()
+                self._probing = False
+
+    def success(self):
+        """ Record a successful attempt, closing the circuit """
+        with self._lock:
+            self._failures = 0
+            self._opened = None
+            self._probing = False
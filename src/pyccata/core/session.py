@@ -0,0 +1,121 @@
+"""
+Pooled HTTP connections shared by everything which talks to a remote server
+
+Searches, attachment downloads and pipeline triggers all go through the same
+connection pool, so connections and TLS sessions opened by one are reused by
+the others rather than each negotiating their own.
+
+@package pyccata.core
+"""
+from threading import Lock
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from pyccata.core.decorators import accepts
+
+class PooledSession(object):
+    """
+    Keep-alive connections with a limit on how many are open to each host
+
+    Once ``pool_size`` connections to a host are in use, further requests to
+    it wait for one to be returned. Credentials are registered for each
+    server, by scheme, host and port, and sent only to that server.
+    """
+    POOL_SIZE = 10
+    HOSTS = 10
+
+    _session = None
+    _adapter = None
+    _credentials = None
+    _lock = None
+
+    @accepts(int, hosts=int, verify=(bool, str))
+    def __init__(self, pool_size, hosts=HOSTS, verify=True):
+        """
+        @param pool_size int      Connections which may be open to each host at once
+        @param hosts     int      Hosts to keep connections open to
+        @param verify    bool|str Verify TLS certificates, or the path of a CA bundle to verify them with
+        """
+        self._adapter = HTTPAdapter(pool_connections=hosts, pool_maxsize=pool_size, pool_block=True)
+        self._session = requests.Session()
+        self._session.verify = verify
+        self.mount(self._session)
+        self._credentials = {}
+        self._lock = Lock()
+
+    @property
+    def adapter(self):
+        """ Get the transport adapter holding the connection pools """
+        return self._adapter
+
+    def mount(self, session):
+        """
+        Make another session, such as the one a client library creates for itself, use the shared pools
+
+        @param session requests.Session
+        """
+        session.mount('http://', self._adapter)
+        session.mount('https://', self._adapter)
+
+    @accepts(str, object)
+    def route(self, prefix, adapter):
+        """
+        Send requests for URLs beginning with a prefix through a different adapter
+
+        @param prefix  string
+        @param adapter requests.adapters.BaseAdapter
+        """
+        self._session.mount(prefix, adapter)
+
+    @staticmethod
+    @accepts(str)
+    def origin(url):
+        """
+        Get the scheme, host and port of a URL
+
+        @param url string
+
+        @return string
+        """
+        parts = urlsplit(url)
+        port = parts.port or {'http': 80, 'https': 443}.get(parts.scheme)
+        return '{0}://{1}:{2}'.format(parts.scheme, (parts.hostname or '').lower(), port)
+
+    @accepts(str, tuple)
+    def credentials(self, url, auth):
+        """
+        Register the credentials for a server
+
+        @param url  string Any URL on the server
+        @param auth tuple  (username, password)
+        """
+        with self._lock:
+            self._credentials[PooledSession.origin(url)] = auth
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, with the credentials registered for its server unless others are given
+
+        @param method string
+        @param url    string
+
+        Takes the keyword arguments of ``requests.Session.request``
+
+        @return requests.Response
+        """
+        if kwargs.get('auth') is None:
+            kwargs['auth'] = self._credentials.get(PooledSession.origin(url))
+        return self._session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """ Send a GET request. See ``request`` """
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """ Send a POST request. See ``request`` """
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        """ Close every pooled connection """
+        self._session.close()
+        self._adapter.close()
@@ -2,24 +2,150 @@
 Base classes for any items which need to be run in their own thread.
 """
 
+import asyncio
 import inspect
+import multiprocessing
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from threading import Thread
+from threading import Event
+from threading import Lock
+from threading import current_thread
+from time import perf_counter
 from pyccata.core.decorators import accepts
 from pyccata.core.exceptions import ArgumentMismatchError
+from pyccata.core.exceptions import ThreadCancelledError
+from pyccata.core.interface import ExecutorInterface
+from pyccata.core.log import Logger
+
+class CancellationToken(object):
+    """
+    Tells a thread, and anything it has started, that it should stop
+
+    Threads poll ``cancelled`` between steps or register a callback with
+    ``on_cancel`` to interrupt something which blocks, such as a subprocess.
+    """
+    _event = None
+    _reason = None
+    _callbacks = None
+    _lock = None
+
+    def __init__(self):
+        self._event = Event()
+        self._reason = None
+        self._callbacks = []
+        self._lock = Lock()
+
+    @property
+    def cancelled(self):
+        """ Has cancellation been requested? """
+        return self._event.is_set()
+
+    @property
+    def reason(self):
+        """ Get the ThreadCancelledError explaining why the thread was cancelled """
+        return self._reason
+
+    @accepts(ThreadCancelledError)
+    def cancel(self, reason):
+        """
+        Request cancellation and run the registered callbacks
+
+        @param reason ThreadCancelledError
+
+        Only the first request counts.
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            CancellationToken._call(callback)
+
+    def on_cancel(self, callback):
+        """
+        Register a function to call when cancellation is requested
+
+        @param callback callable Called without arguments. Called at once if already cancelled
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        CancellationToken._call(callback)
+
+    @staticmethod
+    def _call(callback):
+        """ Run a callback, logging rather than raising failures """
+        try:
+            callback()
+        # pylint: disable=broad-except
+        # One callback failing must not stop the rest from cancelling
+        except Exception as exception:
+            Logger().warning('Cancellation callback failed')
+            Logger().warning(exception)
+
+    def wait(self, timeout=None):
+        """
+        Block until cancellation is requested or the timeout passes
+
+        @param timeout float [optional] Seconds
+
+        @return bool True if cancelled
+        """
+        return self._event.wait(timeout)
 
 class Threadable(Thread):
     """
     Base class for threadable objects
+
+    The ``EXECUTOR`` attribute determines which back-end the ThreadManager uses
+    to execute the ``run`` method:
+
+        THREAD - The object runs on its own dedicated thread. Use this for objects
+                 which wait on other threads from inside their ``run`` method.
+        IO     - The ``run`` method is executed as a task on a shared pool of
+                 worker threads sized for network and disk bound work.
+        CPU    - As IO but on a smaller pool sized to the number of cores.
+        PROCESS - The work described by ``task`` is executed in a worker process
+                  and the value it returns is handed back to ``collect`` in the
+                  parent. Use this for CPU bound work which holds the GIL.
+        ASYNC   - Reserved for ``AsyncThreadable`` whose ``run`` is a coroutine.
+
+    Threads which consume the output of other threads declare it with ``depends_on``.
+    The ThreadManager will not start a thread until all of its dependencies have
+    completed or failed so ``run`` never needs to wait for them.
+
+    A thread which runs for longer than ``TIMEOUT`` seconds, or is cancelled
+    by the ThreadManager, has its ``token`` cancelled. Long running ``run``
+    methods should check ``cancelled`` or register with the token.
     """
 
     THREAD_SLEEP = 0.000001
     PRIORITY = 0
+    TIMEOUT = None
+
+    THREAD = 'thread'
+    IO = 'io'
+    CPU = 'cpu'
+    PROCESS = 'process'
+    ASYNC = 'async'
+    EXECUTOR = IO
 
     _thread_name = ''
     _complete = False
     _failure = None
     _retrycount = 0
+    _dispatched = False
+    _dependencies = None
+    _started_at = None
+    _worker = None
+    _timeout = None
+    _token = None
 
     @property
     def thread_name(self):
@@ -52,10 +178,121 @@ class Threadable(Thread):
         """ Has the current thread completed its run? """
         return self._complete
 
+    @property
+    def timeout(self):
+        """ Get the number of seconds the thread may run for. None for no limit """
+        return self._timeout if self._timeout is not None else self.TIMEOUT
+
+    @timeout.setter
+    @accepts((None, int, float))
+    def timeout(self, value):
+        """ Set the number of seconds the thread may run for """
+        self._timeout = value
+
+    @property
+    def token(self):
+        """ Get the cancellation token for this thread """
+        return self._token
+
+    @property
+    def cancelled(self):
+        """ Has this thread been asked to stop? """
+        return self._token.cancelled
+
+    def cancel(self, reason=None):
+        """
+        Ask the thread to stop
+
+        @param reason ThreadCancelledError [optional]
+        """
+        if reason is None:
+            reason = ThreadCancelledError('Thread \'{0}\' was cancelled'.format(self.thread_name))
+        self._token.cancel(reason)
+
+    @property
+    def retries(self):
+        """ How many times has the work of this thread been retried? """
+        return self._retrycount
+
+    @retries.setter
+    @accepts(int)
+    def retries(self, value):
+        """ Set the number of times the work of this thread has been retried """
+        self._retrycount = value
+
+    @property
+    def dispatched(self):
+        """ Has the thread been handed to an executor? """
+        return self._dispatched
+
+    @dispatched.setter
+    @accepts(bool)
+    def dispatched(self, value):
+        """ Mark the thread as having been handed to an executor """
+        self._dispatched = value
+
+    @property
+    def started_at(self):
+        """ Get the ``time.perf_counter()`` value recorded when an executor began running the thread """
+        return self._started_at
+
+    @property
+    def worker(self):
+        """ Get the name of the worker which ran the thread """
+        return self._worker
+
+    def abandon(self):
+        """
+        Record the cancellation as the failure of a thread which is not going to run
+
+        @return bool True if the thread had been cancelled
+        """
+        if not self.cancelled:
+            return False
+        if not self.failed:
+            self.failure = self._token.reason
+        return True
+
+    def mark_started(self, worker=None):
+        """
+        Record that an executor has begun running the thread
+
+        @param worker string [optional] Defaults to the name of the calling thread
+
+        Called by the executor from the worker, immediately before ``run``.
+        """
+        self._started_at = perf_counter()
+        self._worker = worker if worker is not None else current_thread().name
+
+    @property
+    def dependencies(self):
+        """ Get the threads which must finish before this thread can start """
+        return self._dependencies if self._dependencies is not None else []
+
+    @accepts(Thread)
+    def depends_on(self, thread):
+        """
+        Record that this thread cannot start until the given thread has finished
+
+        @param thread Threadable
+        """
+        if self._dependencies is None:
+            self._dependencies = []
+        if thread is not self and thread not in self._dependencies:
+            self._dependencies.append(thread)
+
+    @property
+    def blocked(self):
+        """ Is the thread waiting on a dependency which has not yet completed or failed? """
+        for dependency in self.dependencies:
+            if not (dependency.complete or dependency.failed):
+                return True
+        return False
+
     @property
     def ready(self):
         """ Is the thread ready to start? """
-        return not self.isAlive() and not (self.complete or self.failed)
+        return not self.dispatched and not self.isAlive() and not (self.complete or self.failed) and not self.blocked
 
     @abstractmethod
     def setup(self, *args, **kwargs):
@@ -67,6 +304,7 @@ class Threadable(Thread):
         Initialise the current thread
         """
         Thread.__init__(self)
+        self._token = CancellationToken()
         self.setup(*args, **kwargs)
 
     def validate_setup(self, config):
@@ -98,3 +336,381 @@ class Threadable(Thread):
         the parent thread to understand the reason a given thread failed
         """
         raise NotImplementedError('Method must be implemented by a child')
+
+    def task(self):
+        """
+        Describe the work carried out by ``run`` in a form which can be sent to another process
+
+        @return tuple (callable, tuple) A module level function and the arguments to call it with.
+                Both must be picklable.
+
+        Only required when ``EXECUTOR`` is ``PROCESS``.
+        """
+        raise NotImplementedError(
+            '{0} must implement task() to run in a process'.format(self.__class__.__name__)
+        )
+
+    def collect(self, result):
+        """
+        Receive the value returned by ``task`` in the parent process
+
+        @param result mixed
+        """
+        # pylint: disable=unused-argument
+        self._complete = True
+
+class AsyncThreadable(Threadable):
+    """
+    Base class for network bound objects whose ``run`` method is a coroutine
+
+    Rather than blocking an OS thread each, all AsyncThreadable objects are
+    driven by the ThreadManager on a single event loop.
+    """
+    EXECUTOR = Threadable.ASYNC
+
+    @abstractmethod
+    async def run(self):
+        """
+        Coroutine carrying out the work of the current object
+
+        As with Threadable, exceptions must be handled here and assigned to
+        the failure.
+        """
+        raise NotImplementedError('Method must be implemented by a child')
+
+    @staticmethod
+    async def blocking(function, *args, **kwargs):
+        """
+        Await a blocking call without stalling the event loop
+
+        @param function callable Called with *args and **kwargs on a worker thread
+
+        @return mixed whatever the function returns
+
+        For libraries which only offer a blocking client. Under the AsyncExecutor
+        the call runs on its own pool of ``limit`` threads.
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, partial(function, *args, **kwargs))
+
+class ThreadExecutor(object):
+    """
+    Executes each Threadable on its own dedicated thread
+    """
+    __implements__ = (ExecutorInterface,)
+
+    @accepts(Threadable, object)
+    def submit(self, thread, callback):
+        """
+        Starts the thread, wrapping its run method so that the callback
+        is triggered as soon as it exits, regardless of how it exits.
+
+        @param thread   Threadable
+        @param callback function
+
+        @raise RuntimeError if the thread has already been started
+        """
+        # pylint: disable=no-self-use
+        run = thread.run
+
+        def _run():
+            """ Execute the original run method and signal completion """
+            try:
+                thread.mark_started()
+                if not thread.abandon():
+                    run()
+            except Exception as exception:
+                if not thread.failed:
+                    thread.failure = exception
+                raise
+            finally:
+                callback(thread)
+
+        thread.run = _run
+        try:
+            thread.start()
+        except RuntimeError:
+            # already started - put the original back so it isn't wrapped twice
+            thread.run = run
+            raise
+
+    def shutdown(self):
+        """ Dedicated threads clean up after themselves """
+        pass
+
+class PoolExecutor(object):
+    """
+    Executes Threadable run methods as tasks on a fixed set of worker threads
+
+    The underlying ``concurrent.futures.ThreadPoolExecutor`` is not created
+    until the first task is submitted.
+    """
+    __implements__ = (ExecutorInterface,)
+
+    _workers = 1
+    _name = ''
+    _executor = None
+
+    @accepts(int, name=str)
+    def __init__(self, workers, name=''):
+        """
+        Create a new pool executor
+
+        @param workers int    The maximum number of worker threads
+        @param name    string Prefix for the worker thread names
+        """
+        self._workers = workers
+        self._name = name
+        self._executor = None
+
+    @property
+    def workers(self):
+        """ Get the maximum number of worker threads in the pool """
+        return self._workers
+
+    @property
+    def executor(self):
+        """ Lazy load the worker pool """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix=self._name)
+        return self._executor
+
+    @accepts(Threadable, object)
+    def submit(self, thread, callback):
+        """
+        Queue the run method of the thread on the worker pool
+
+        @param thread   Threadable
+        @param callback function
+        """
+        self.executor.submit(PoolExecutor._execute, thread, callback)
+
+    @staticmethod
+    def _execute(thread, callback):
+        """
+        Task body executed by the worker thread
+        """
+        try:
+            thread.mark_started()
+            if not thread.abandon():
+                thread.run()
+        # pylint: disable=broad-except
+        # A worker must never die with the task. Dedicated threads
+        # report uncaught exceptions to stderr, the pool sends them to the log.
+        except Exception as exception:
+            Logger().error('Uncaught exception in thread \'{0}\''.format(thread.thread_name))
+            Logger().error(exception)
+            if not thread.failed:
+                thread.failure = exception
+        finally:
+            callback(thread)
+
+    def shutdown(self):
+        """ Shut the worker pool down without waiting for queued tasks """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+class ProcessExecutor(object):
+    """
+    Executes the ``task`` of each Threadable on a fixed set of worker processes
+
+    Threadable objects cannot be sent across a process boundary so the worker
+    only receives the callable and arguments returned by ``task``. The result is
+    handed back to the thread via ``collect`` from within the parent process.
+    """
+    __implements__ = (ExecutorInterface,)
+
+    _workers = 1
+    _executor = None
+
+    @accepts(int)
+    def __init__(self, workers):
+        """
+        Create a new process executor
+
+        @param workers int The maximum number of worker processes
+        """
+        self._workers = workers
+        self._executor = None
+
+    @property
+    def workers(self):
+        """ Get the maximum number of worker processes in the pool """
+        return self._workers
+
+    @property
+    def executor(self):
+        """
+        Lazy load the process pool
+
+        Workers are not forked from this process as it is already running
+        threads which may hold locks. They come from a forkserver where available.
+        """
+        if self._executor is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context(method)
+            )
+        return self._executor
+
+    @accepts(Threadable, object)
+    def submit(self, thread, callback):
+        """
+        Send the task of the thread to the process pool
+
+        @param thread   Threadable
+        @param callback function
+
+        Failures to describe or queue the task are recorded against the thread.
+        """
+        if thread.abandon():
+            callback(thread)
+            return
+        try:
+            function, args = thread.task()
+            # the pool doesn't report when a worker picks the task up
+            thread.mark_started(worker='process')
+            future = self.executor.submit(function, *args)
+        # pylint: disable=broad-except
+        # Whatever stops the task from being queued is the reason the thread failed
+        except Exception as exception:
+            thread.failure = exception
+            callback(thread)
+            return
+        # tasks still waiting for a worker are dropped, running ones are left to finish
+        thread.token.on_cancel(future.cancel)
+        future.add_done_callback(partial(ProcessExecutor._collect, thread, callback))
+
+    @staticmethod
+    def _collect(thread, callback, future):
+        """
+        Hand the result of a finished task back to its thread
+        """
+        try:
+            if not thread.abandon():
+                thread.collect(future.result())
+        # pylint: disable=broad-except
+        # Exceptions raised inside the worker process are re-raised by result()
+        except Exception as exception:
+            if not thread.abandon():
+                thread.failure = exception
+        finally:
+            callback(thread)
+
+    def shutdown(self):
+        """ Shut the process pool down without waiting for queued tasks """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+class AsyncExecutor(object):
+    """
+    Drives the ``run`` coroutine of AsyncThreadable objects on a single event loop
+
+    The loop runs on its own daemon thread, started when the first coroutine
+    is submitted.
+    """
+    __implements__ = (ExecutorInterface,)
+
+    _limit = 0
+    _loop = None
+    _thread = None
+    _semaphore = None
+    _blocking = None
+
+    @accepts(int)
+    def __init__(self, limit):
+        """
+        Create a new async executor
+
+        @param limit int The maximum number of coroutines in flight. 0 for no limit
+        """
+        self._limit = limit
+        self._loop = None
+        self._thread = None
+        self._semaphore = None
+        self._blocking = None
+
+    @property
+    def limit(self):
+        """ Get the maximum number of coroutines in flight """
+        return self._limit
+
+    @property
+    def loop(self):
+        """ Lazy load the event loop and the thread which runs it """
+        if self._loop is None:
+            started = Event()
+            self._loop = asyncio.new_event_loop()
+            # blocking calls awaited by the coroutines get as many threads as
+            # there may be coroutines rather than the loop's small default pool
+            self._blocking = ThreadPoolExecutor(
+                max_workers=self._limit if self._limit > 0 else None,
+                thread_name_prefix='async-blocking'
+            )
+            self._loop.set_default_executor(self._blocking)
+
+            def _run():
+                """ Run the event loop until shut down """
+                asyncio.set_event_loop(self._loop)
+                if self._limit > 0:
+                    self._semaphore = asyncio.Semaphore(self._limit)
+                started.set()
+                self._loop.run_forever()
+
+            self._thread = Thread(target=_run, name='async', daemon=True)
+            self._thread.start()
+            started.wait()
+        return self._loop
+
+    @accepts(AsyncThreadable, object)
+    def submit(self, thread, callback):
+        """
+        Schedule the run coroutine of the thread on the event loop
+
+        @param thread   AsyncThreadable
+        @param callback function
+        """
+        asyncio.run_coroutine_threadsafe(self._execute(thread, callback), self.loop)
+
+    async def _execute(self, thread, callback):
+        """
+        Task body executed on the event loop
+        """
+        task = asyncio.current_task()
+        thread.token.on_cancel(partial(self._loop.call_soon_threadsafe, task.cancel))
+        try:
+            if self._semaphore is not None:
+                async with self._semaphore:
+                    thread.mark_started()
+                    if not thread.abandon():
+                        await thread.run()
+            else:
+                thread.mark_started()
+                if not thread.abandon():
+                    await thread.run()
+        except asyncio.CancelledError:
+            if not thread.abandon():
+                raise
+        # pylint: disable=broad-except
+        # As with the worker pool, uncaught exceptions must not stop the loop
+        except Exception as exception:
+            Logger().error('Uncaught exception in coroutine \'{0}\''.format(thread.thread_name))
+            Logger().error(exception)
+            if not thread.failed:
+                thread.failure = exception
+        finally:
+            callback(thread)
+
+    def shutdown(self):
+        """ Stop the event loop without waiting for outstanding coroutines """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._blocking.shutdown(wait=False)
+            self._loop = None
+            self._thread = None
+            self._semaphore = None
+            self._blocking = None
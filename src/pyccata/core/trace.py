@@ -0,0 +1,244 @@
+"""
+Records the life cycle of every thread executed by the ThreadManager
+
+The trace can be exported in the Chrome trace event format, which loads in
+``chrome://tracing`` and https://ui.perfetto.dev, or as a plain text summary.
+
+@package pyccata.core
+"""
+import os
+import json
+from collections import OrderedDict
+from threading import Lock
+from time import perf_counter
+from pyccata.core.decorators import accepts
+
+class TraceRecord(object):
+    """
+    Timestamps for a single thread
+
+    All timestamps are ``time.perf_counter()`` values, None until the event has happened.
+
+        queued     - The thread was handed to the ThreadManager
+        ready      - The thread last had nothing left to wait on and joined the ready queue
+        dispatched - The thread was handed to its executor
+        started    - The executor began running the thread
+        finished   - The thread left its run method, successfully or otherwise
+    """
+    # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    __slots__ = (
+        'name', 'classname', 'priority', 'executor', 'worker',
+        'queued', 'ready', 'dispatched', 'started', 'finished', 'failed'
+    )
+
+    def __init__(self, thread):
+        """
+        @param thread Threadable
+        """
+        self.name = thread.thread_name
+        self.classname = thread.__class__.__name__
+        self.priority = thread.PRIORITY
+        self.executor = thread.EXECUTOR
+        self.worker = None
+        self.queued = None
+        self.ready = None
+        self.dispatched = None
+        self.started = None
+        self.finished = None
+        self.failed = False
+
+    @property
+    def waiting(self):
+        """ Seconds between becoming ready and starting. Time spent waiting for a worker """
+        if self.ready is None or self.started is None:
+            return None
+        return max(self.started - self.ready, 0.0)
+
+    @property
+    def running(self):
+        """ Seconds spent inside run """
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+class ExecutionTrace(object):
+    """
+    Thread safe collection of TraceRecord objects, one per thread
+
+    Every method may be called from any thread.
+    """
+    _lock = None
+    _records = None
+    _origin = None
+
+    def __init__(self):
+        self._lock = Lock()
+        self._records = OrderedDict()
+        self._origin = perf_counter()
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def records(self):
+        """ Get the records in the order their threads were queued """
+        with self._lock:
+            return list(self._records.values())
+
+    def _record(self, thread):
+        """ Get or create the record for a thread. Must be called with the lock held """
+        record = self._records.get(id(thread))
+        if record is None:
+            record = TraceRecord(thread)
+            self._records[id(thread)] = record
+        return record
+
+    def clear(self):
+        """ Forget everything recorded so far """
+        with self._lock:
+            self._records.clear()
+            self._origin = perf_counter()
+
+    def queued(self, thread):
+        """
+        Record that the thread has been given to the ThreadManager
+
+        @param thread Threadable
+        """
+        now = perf_counter()
+        with self._lock:
+            record = self._record(thread)
+            if record.queued is None:
+                record.queued = now
+
+    def ready(self, thread):
+        """
+        Record that the thread has joined the ready queue
+
+        @param thread Threadable
+        """
+        now = perf_counter()
+        with self._lock:
+            self._record(thread).ready = now
+
+    def dispatched(self, thread):
+        """
+        Record that the thread has been handed to its executor
+
+        @param thread Threadable
+        """
+        now = perf_counter()
+        with self._lock:
+            self._record(thread).dispatched = now
+
+    def finished(self, thread):
+        """
+        Record that the thread has left its run method
+
+        @param thread Threadable
+
+        The start time and worker are taken from the thread, where its executor left them.
+        """
+        now = perf_counter()
+        with self._lock:
+            record = self._record(thread)
+            record.started = thread.started_at if thread.started_at is not None else record.dispatched
+            record.worker = thread.worker
+            record.finished = now
+            record.failed = thread.failed
+
+    def to_chrome(self):
+        """
+        Get the trace as a Chrome trace event document
+
+        @return dict
+
+        Each run appears as a complete event on the track of the worker which ran it.
+        Time spent waiting, first on dependencies and then for a worker, is shown
+        as an async span so that saturated pools show up as long waits.
+        """
+        # pylint: disable=invalid-name
+        pid = os.getpid()
+        tracks = OrderedDict()
+        events = []
+
+        def microseconds(timestamp):
+            """ Convert a perf_counter value to microseconds from the start of the trace """
+            return round((timestamp - self._origin) * 1000000, 3)
+
+        for index, record in enumerate(self.records):
+            args = {
+                'class': record.classname,
+                'priority': record.priority,
+                'executor': record.executor,
+                'failed': record.failed
+            }
+            if record.queued is not None and record.started is not None:
+                for phase, timestamp in (('b', record.queued), ('e', record.started)):
+                    events.append({
+                        'name': record.name, 'cat': 'queued', 'ph': phase, 'id': index,
+                        'ts': microseconds(timestamp), 'pid': pid, 'tid': 0, 'args': args
+                    })
+            if record.started is None or record.finished is None:
+                continue
+            worker = record.worker or record.executor
+            tid = tracks.setdefault(worker, len(tracks) + 1)
+            events.append({
+                'name': record.name, 'cat': 'failed' if record.failed else record.classname, 'ph': 'X',
+                'ts': microseconds(record.started), 'dur': microseconds(record.finished) - microseconds(record.started),
+                'pid': pid, 'tid': tid, 'args': args
+            })
+
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'queue'}})
+        for worker, tid in tracks.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': worker}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    @accepts(str)
+    def save(self, path):
+        """
+        Write the trace to disk in the Chrome trace event format
+
+        @param path string
+        """
+        with open(path, 'w') as trace_file:
+            json.dump(self.to_chrome(), trace_file)
+
+    def summary(self):
+        """
+        Get the trace as a plain text table, one line per thread in the order they started
+
+        @return string
+        """
+        def seconds(value):
+            """ Format a duration or a blank if it never happened """
+            return '{0:.3f}'.format(value) if value is not None else '-'
+
+        records = sorted(
+            self.records,
+            key=lambda record: record.started if record.started is not None else float('inf')
+        )
+        rows = [('thread', 'class', 'executor', 'priority', 'start', 'wait', 'run', 'status')]
+        for record in records:
+            status = 'failed' if record.failed else ('complete' if record.finished is not None else 'not run')
+            rows.append((
+                record.name,
+                record.classname,
+                record.executor,
+                str(record.priority),
+                seconds(record.started - self._origin if record.started is not None else None),
+                seconds(record.waiting),
+                seconds(record.running),
+                status
+            ))
+
+        finished = [record.finished for record in records if record.finished is not None]
+        busy = sum([record.running for record in records if record.running is not None])
+        wall = (max(finished) - self._origin) if len(finished) > 0 else 0.0
+
+        widths = [max([len(row[column]) for row in rows]) for column in range(len(rows[0]))]
+        lines = ['  '.join([value.ljust(width) for value, width in zip(row, widths)]).rstrip() for row in rows]
+        lines.append(
+            '{0} threads, {1} seconds wall clock, {2} seconds in run'.format(len(records), seconds(wall), seconds(busy))
+        )
+        return os.linesep.join(lines)
@@ -1,8 +1,13 @@
+import asyncio
 import copy
+import os
 from time import sleep
+from threading import current_thread
 from random import shuffle
 from collections import namedtuple
+from jira.exceptions import JIRAError
 from pyccata.core.threading import Threadable
+from pyccata.core.threading import AsyncThreadable
 from pyccata.core.interface import ObservableInterface
 from pyccata.core.log import Logger
 from pyccata.core.exceptions import InvalidQueryError
@@ -11,6 +16,7 @@ from pyccata.core.filter import Filter
 from pyccata.core.manager import Manager
 from pyccata.core.interface import ManagerInterface
 from pyccata.core.interface import ReportingInterface
+from pyccata.core.interface import ExecutorInterface
 from pyccata.core.parts.paragraph import Paragraph
 from pyccata.core.resources import *
 from pyccata.bioinformatics.resources import *
@@ -35,6 +41,150 @@ class ViableTestThread(Threadable):
         Logger().info('Thread \'{0}\' complete'.format(self._name))
         self._complete = True
 
+class QuickTestThread(Threadable):
+    PRIORITY = 104
+    def setup(self):
+        pass
+
+    def run(self):
+        self._complete = True
+
+class SpawningTestThread(Threadable):
+    PRIORITY = 104
+    EXECUTOR = Threadable.THREAD
+    _child = None
+    def setup(self, manager=None):
+        self._manager = manager
+
+    def run(self):
+        self._child = QuickTestThread()
+        self._manager.append(self._child)
+        while not self._child.complete:
+            sleep(Threadable.THREAD_SLEEP)
+        self._complete = True
+
+class WorkerNameTestThread(Threadable):
+    PRIORITY = 104
+    def setup(self):
+        pass
+
+    def run(self):
+        sleep(0.01)
+        self._complete = True
+
+class RaisingTestThread(Threadable):
+    PRIORITY = 104
+    def setup(self):
+        pass
+
+    def run(self):
+        raise RuntimeError('Uncaught failure')
+
+class DependentTestThread(Threadable):
+    PRIORITY = 1100
+    dependency_complete = None
+    def setup(self, dependency=None):
+        if dependency is not None:
+            self.depends_on(dependency)
+
+    def run(self):
+        self.dependency_complete = [dependency.complete for dependency in self.dependencies]
+        self._complete = True
+
+class SearchingTestThread(DependentTestThread):
+    projectmanager = None
+
+class AsyncTestThread(AsyncThreadable):
+    PRIORITY = 104
+    in_flight = 0
+    max_in_flight = 0
+    def setup(self, delay=0.05):
+        self._delay = delay
+
+    async def run(self):
+        AsyncTestThread.in_flight += 1
+        AsyncTestThread.max_in_flight = max(AsyncTestThread.max_in_flight, AsyncTestThread.in_flight)
+        await asyncio.sleep(self._delay)
+        AsyncTestThread.in_flight -= 1
+        self._complete = True
+
+class RaisingAsyncTestThread(AsyncThreadable):
+    PRIORITY = 104
+    def setup(self):
+        pass
+
+    async def run(self):
+        raise RuntimeError('Uncaught failure')
+
+class BlockingAsyncTestThread(AsyncThreadable):
+    PRIORITY = 104
+    blocking_worker = None
+    def setup(self):
+        pass
+
+    async def run(self):
+        self.blocking_worker = await self.blocking(lambda: current_thread().name)
+        self._complete = True
+
+class CancellableTestThread(Threadable):
+    PRIORITY = 104
+    def setup(self, timeout=None, wait=5):
+        self.timeout = timeout
+        self._wait = wait
+
+    def run(self):
+        if self.token.wait(self._wait):
+            self.failure = self.token.reason
+            return
+        self._complete = True
+
+class StubbornTestThread(Threadable):
+    PRIORITY = 104
+    def setup(self, delay=1):
+        self._delay = delay
+
+    def run(self):
+        sleep(self._delay)
+        self._complete = True
+
+class ProcessTestThread(Threadable):
+    PRIORITY = 104
+    EXECUTOR = Threadable.PROCESS
+    value = None
+    result = None
+    def setup(self, value=0):
+        self.value = value
+
+    @staticmethod
+    def square(value):
+        if value < 0:
+            raise ValueError('negative')
+        return (value * value, os.getpid())
+
+    def task(self):
+        return (ProcessTestThread.square, (self.value,))
+
+    def collect(self, result):
+        self.result = result
+        self._complete = True
+
+    def run(self):
+        self.collect(ProcessTestThread.square(self.value))
+
+class InlineTestExecutor(object):
+    __implements__ = (ExecutorInterface,)
+    submitted = None
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, thread, callback):
+        self.submitted.append(thread)
+        thread.run()
+        callback(thread)
+
+    def shutdown(self):
+        pass
+
 class ExplodingQueryThread(Threadable):
     PRIORITY = 2
     def setup(self):
@@ -57,6 +207,138 @@ class BrokenConnectionThread(Threadable):
         Logger().info('Starting broken thread \'{0}\''.format(self._name))
         self.failure = InvalidConnectionError(500, 'http://jira.local:8080', 'Recieved HTTP/500 whilst establishing a connection to jira.local.')
 
+class FlakyConnectionThread(Threadable):
+    PRIORITY = 4
+    def setup(self, failures=1, code=503, headers=None):
+        self._failures = failures
+        self._code = code
+        self._headers = headers
+        self.attempts = 0
+
+    def run(self):
+        self.attempts += 1
+        if self.attempts <= self._failures:
+            self.failure = InvalidConnectionError(self._code, 'http://jira.local:8080', 'Service unavailable', self._headers)
+            return
+        self._complete = True
+
+class PagedSearchResults(list):
+    total = 0
+
+class PagedJiraClient(object):
+    """ Serves a search of ``total`` issues a page at a time, later pages answering sooner """
+    Field = namedtuple('Field', 'summary')
+    Issue = namedtuple('Issue', 'key fields')
+
+    def __init__(self, total, page_size=50, fail_at=None):
+        self.total = total
+        self.page_size = page_size
+        self.fail_at = fail_at
+        self.requests = []
+        self.workers = set()
+
+    def search_issues(self, search_query, startAt=0, maxResults=50, fields=None, json_result=False):
+        self.requests.append((startAt, maxResults))
+        self.workers.add(current_thread().name)
+        if startAt == self.fail_at:
+            raise JIRAError(status_code=503, text='Service unavailable')
+        sleep(max(0.05 - startAt * 0.0001, 0))
+        end = min(startAt + min(maxResults, self.page_size), self.total)
+        if json_result:
+            return {
+                'total': self.total,
+                'issues': [
+                    {'key': 'TP-{0}'.format(index), 'fields': {'summary': str(index)}} for index in range(startAt, end)
+                ]
+            }
+        page = PagedSearchResults(
+            PagedJiraClient.Issue(key='TP-{0}'.format(index), fields=PagedJiraClient.Field(summary=str(index)))
+            for index in range(startAt, end)
+        )
+        page.total = self.total
+        return page
+
+class SyncingJiraClient(object):
+    """ Answers searches from a set of issues which changes between searches """
+    Field = namedtuple('Field', 'summary')
+    Issue = namedtuple('Issue', 'key fields')
+
+    def __init__(self, keys):
+        self.issues = dict((key, 'v1') for key in keys)
+        self.changed = set()
+        self.queries = []
+
+    def search_issues(self, search_query, startAt=0, maxResults=50, fields=None, json_result=False):
+        self.queries.append(search_query)
+        keys = sorted(
+            [key for key in self.issues if 'updated >=' not in search_query or key in self.changed],
+            reverse=search_query.endswith('DESC')
+        )
+        if json_result:
+            return {
+                'total': len(keys),
+                'issues': [
+                    {'key': key, 'fields': {'summary': self.issues[key]}} for key in keys[startAt:startAt + maxResults]
+                ]
+            }
+        page = PagedSearchResults(
+            SyncingJiraClient.Issue(key=key, fields=SyncingJiraClient.Field(summary=self.issues[key]))
+            for key in keys[startAt:startAt + maxResults]
+        )
+        page.total = len(keys)
+        return page
+
+class DownloadResponse(object):
+    """ A streamed response which may be cut off after ``cut`` bytes """
+    def __init__(self, status_code, body=b'', cut=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.cut = cut
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size=1):
+        end = len(self.body) if self.cut is None else self.cut
+        for start in range(0, end, chunk_size):
+            yield self.body[start:min(start + chunk_size, end)]
+        if self.cut is not None:
+            raise ConnectionError('connection reset')
+
+    def close(self):
+        self.closed = True
+
+class DownloadSession(object):
+    """
+    Serves ``content``, honouring Range requests unless ``ranges`` is False
+
+    Range requests are answered from ``shift`` bytes before the byte asked for.
+    """
+    def __init__(self, content, ranges=True, status_code=200, cut=None, shift=0):
+        self.content = content
+        self.ranges = ranges
+        self.status_code = status_code
+        self.cut = cut
+        self.shift = shift
+        self.requests = []
+        self.timeouts = []
+
+    def get(self, url, stream=False, headers=None, timeout=None):
+        headers = headers or {}
+        self.requests.append(headers)
+        self.timeouts.append(timeout)
+        if self.status_code != 200:
+            return DownloadResponse(self.status_code)
+        if 'Range' in headers and self.ranges:
+            start = int(headers['Range'][len('bytes='):-1])
+            if start >= len(self.content):
+                return DownloadResponse(416)
+            start = max(start - self.shift, 0)
+            content_range = 'bytes {0}-{1}/{2}'.format(start, len(self.content) - 1, len(self.content))
+            return DownloadResponse(
+                206, self.content[start:], cut=self.cut, headers={'Content-Range': content_range}
+            )
+        return DownloadResponse(200, self.content, cut=self.cut)
+
 class BrokenConnectionFilter(Filter):
     PRIORITY = 1000
     def run(self):
@@ -101,7 +383,7 @@ class DataProviders(object):
     def _get_client():
         JIRA = namedtuple('JIRA', 'search_issues projects')
         return JIRA(
-            search_issues=lambda x, maxResults, fields: DataProviders._test_data_for_search_results(),
+            search_issues=lambda x, maxResults, fields, json_result=False: DataProviders._test_data_for_search_results(),
             projects=lambda: DataProviders._test_data_for_projects()
         )
 
@@ -109,7 +391,7 @@ class DataProviders(object):
     def _get_client_for_collation():
         JIRA = namedtuple('JIRA', 'search_issues projects')
         return JIRA(
-            search_issues=lambda x, maxResults, fields: DataProviders._test_data_for_collation(),
+            search_issues=lambda x, maxResults, fields, json_result=False: DataProviders._test_data_for_collation(),
             projects=lambda: DataProviders._test_data_for_projects()
         )
 
@@ -131,7 +413,7 @@ class DataProviders(object):
         multi_results.append(results_set_two)
         JIRA = namedtuple('JIRA', 'search_issues projects')
         return JIRA(
-            search_issues=lambda x, maxResults, fields: None,
+            search_issues=lambda x, maxResults, fields, json_result=False: None,
             projects=lambda: DataProviders._test_data_for_projects()
         )
 
@@ -139,7 +421,7 @@ class DataProviders(object):
     def _get_client_without_results():
         JIRA = namedtuple('JIRA', 'search_issues projects')
         return JIRA(
-            search_issues=lambda x, maxResults, fields: [],
+            search_issues=lambda x, maxResults, fields, json_result=False: [],
             projects=lambda: DataProviders._test_data_for_projects()
         )
 
@@ -359,7 +641,8 @@ class DataProviders(object):
     @staticmethod
     def _get_config_for_test(port='8080', manager='jira', reporting='docx'):
         ReportType = namedtuple('Report', 'title subtitle abstract path datapath sections template')
-        Config = namedtuple('Config', 'manager reporting report jira server port username password')
+        Config = namedtuple('Config', 'manager reporting report jira server port username password customfields')
+        CustomField = namedtuple('CustomField', 'identifier name mapto transform')
         Report = ReportType(
             title='hello world',
             subtitle='sub title test',
@@ -377,7 +660,11 @@ class DataProviders(object):
             server   = 'http://jira.local',
             port     = port,
             username = 'test',
-            password = 'letmein'
+            password = 'letmein',
+            customfields = [
+                CustomField(identifier='release_text', name='Release Text', mapto='customfield_10600', transform=None),
+                CustomField(identifier='pipelines', name='Pipelines', mapto='customfield_10802', transform='value')
+            ]
         )
 
         return Config(
@@ -388,7 +675,8 @@ class DataProviders(object):
             server   = None,
             port     = None,
             username = None,
-            password = None
+            password = None,
+            customfields = None
         )
 
     @staticmethod
@@ -534,6 +822,15 @@ class DataProviders(object):
             'TestFile.zip'
         ]
 
+    @staticmethod
+    def read_csv(frames):
+        """ Answers each call to pandas.read_csv with the next frame, keeping the columns asked for as pandas would """
+        frames = iter(frames)
+        def read(*args, usecols=None, **kwargs):
+            frame = next(frames)
+            return frame if usecols is None else frame.iloc[:, usecols]
+        return read
+
     @staticmethod
     def get_csv_results():
         return [
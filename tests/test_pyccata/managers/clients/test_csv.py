@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 
 from unittest import TestCase
 from mock import patch, call, PropertyMock
@@ -15,6 +17,9 @@ from pyccata.core.resources import Replacements
 from pyccata.core.log import Logger
 from pyccata.core.document import DocumentController
 from pyccata.core.interface import ReportingInterface
+from pyccata.bioinformatics.resources import BedxFileItem
+from pyccata.core.threading import ProcessExecutor
+from pyccata.core.threading import Threadable
 
 class TestCsvManager(TestCase):
     _test_configuration_path = ''
@@ -53,7 +58,7 @@ class TestCsvManager(TestCase):
     @patch('pandas.read_csv')
     def test_csv_with_multi_file(self, mock_dataframe, mock_config_locations, mock_parse):
         mock_config_locations.return_value = [self._path]
-        mock_dataframe.side_effect = DataProviders.get_csv_results()
+        mock_dataframe.side_effect = DataProviders.read_csv(DataProviders.get_csv_results())
         with patch('pyccata.core.managers.clients.docx.Docx') as docx:
             docx.__implements__ = (ReportingInterface,)
             document = DocumentController('csv_multi_file.json')
@@ -75,7 +80,7 @@ class TestCsvManager(TestCase):
     def test_csv_with_single_file(self, mock_dataframe, mock_config_locations, mock_parse):
         self.tearDown()
         mock_config_locations.return_value = [self._path]
-        mock_dataframe.side_effect = DataProviders.get_csv_results()
+        mock_dataframe.side_effect = DataProviders.read_csv(DataProviders.get_csv_results())
         with patch('pyccata.core.managers.clients.docx.Docx') as docx:
             docx.__implements__ = (ReportingInterface,)
             document = DocumentController('csv_single_file_distinct.json')
@@ -97,7 +102,7 @@ class TestCsvManager(TestCase):
     def test_csv_with_broken_file(self, mock_dataframe, mock_config_locations, mock_parse):
         self.tearDown()
         mock_config_locations.return_value = [self._path]
-        mock_dataframe.side_effect = DataProviders.get_csv_results()
+        mock_dataframe.side_effect = DataProviders.read_csv(DataProviders.get_csv_results())
         with patch('pyccata.core.managers.clients.docx.Docx') as docx:
             docx.__implements__ = (ReportingInterface,)
             document = DocumentController('broken_csv.json')
@@ -114,7 +119,7 @@ class TestCsvManager(TestCase):
     def test_csv_with_multi_file_no_fields(self, mock_dataframe, mock_config_locations, mock_parse):
         self.tearDown()
         mock_config_locations.return_value = [self._path]
-        mock_dataframe.side_effect = DataProviders.get_csv_results()
+        mock_dataframe.side_effect = DataProviders.read_csv(DataProviders.get_csv_results())
         with patch('pyccata.core.managers.clients.docx.Docx') as docx:
             docx.__implements__ = (ReportingInterface,)
             document = DocumentController('csv_multi_file_no_fields.json')
@@ -133,7 +138,7 @@ class TestCsvManager(TestCase):
     def test_csv_with_multi_file_max_results(self, mock_dataframe, mock_config_locations, mock_parse):
         self.tearDown()
         mock_config_locations.return_value = [self._path]
-        mock_dataframe.side_effect = DataProviders.get_csv_results()
+        mock_dataframe.side_effect = DataProviders.read_csv(DataProviders.get_csv_results())
         with patch('pyccata.core.managers.clients.docx.Docx') as docx:
             docx.__implements__ = (ReportingInterface,)
             document = DocumentController('csv_multi_file_max_results.json')
@@ -159,3 +164,207 @@ class TestCsvManager(TestCase):
             csvfiles = document._thread_manager.projectmanager._client._client
             self.assertIsInstance(csvfiles, CSVClient)
             self.assertEquals(len(csvfiles), 0)
+
+class TestCsvFile(TestCase):
+
+    @patch('pyccata.core.log.Logger.log')
+    def setUp(self, mock_log):
+        Logger._instance = mock_log
+        self._path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        Logger._instance = None
+        shutil.rmtree(self._path)
+
+    def _file(self, lines):
+        filename = os.path.join(self._path, 'peaks.bedx')
+        with open(filename, 'w') as bedx:
+            bedx.write('\n'.join(['\t'.join(line) for line in lines]) + '\n')
+        return filename
+
+    def test_columns_are_typed_by_the_schema_of_the_item(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '300', '400', 'Gfi1', '-']])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA)
+        csvfile.run()
+        self.assertTrue(csvfile.complete)
+        self.assertEquals('category', str(csvfile.dataframe['chromosome'].dtype))
+        self.assertEquals('int32', str(csvfile.dataframe['start'].dtype))
+        self.assertEquals(['chr1', 'chr2'], list(csvfile.dataframe['chromosome']))
+        self.assertEquals({2: 'int32', 1: 'category', 3: 'int32', 5: 'category'}, csvfile.dtypes)
+
+    def test_files_which_do_not_match_the_schema_are_loaded_untyped(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '', '400', 'Gfi1', '-']])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA)
+        csvfile.run()
+        self.assertTrue(csvfile.complete)
+        self.assertEquals('float64', str(csvfile.dataframe['start'].dtype))
+
+    def test_streaming_files_are_searched_a_chunk_at_a_time(self):
+        item = BedxFileItem()
+        lines = [['P{0}'.format(i), 'chr{0}'.format(i % 3), str(i * 100), str(i * 100 + 50), 'G', '+'] for i in range(10)]
+        csvfile = CSVFile(self._file(lines), item.DELIMITER, item.keys(), schema=item.SCHEMA, chunk_size=3)
+        csvfile.run()
+        self.assertTrue(csvfile.complete)
+        self.assertIsNone(csvfile.dataframe)
+
+        results = csvfile.search('chromosome == "chr1"', fields=['peak_id', 'chromosome'])
+        self.assertEquals(['P1', 'P4', 'P7'], list(results['peak_id']))
+        self.assertEquals(['peak_id', 'chromosome'], list(results.columns))
+        self.assertEquals('category', str(results['chromosome'].dtype))
+        self.assertEquals(['P1', 'P4'], list(csvfile.search('chromosome == "chr1"', max_results=2)['peak_id']))
+        self.assertEquals(0, len(csvfile.search('start > 5000')))
+        self.assertEquals(10, len(csvfile.search('')))
+
+    def test_streaming_files_which_do_not_match_the_schema_are_searched_untyped(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '', '400', 'Gfi1', '-']])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, chunk_size=1)
+        csvfile.run()
+        self.assertEquals(['P1'], list(csvfile.search('start < 150')['peak_id']))
+
+    def test_parsed_files_are_loaded_from_their_cache(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '300', '400', 'Gfi1', '-']])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True)
+        csvfile.run()
+        self.assertTrue(os.path.isfile(os.path.join(self._path, '.peaks.bedx.arrow')))
+
+        cached = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True)
+        with patch('pandas.read_csv') as mock_read:
+            cached.run()
+            self.assertFalse(mock_read.called)
+        self.assertTrue(cached.complete)
+        self.assertTrue(csvfile.dataframe.equals(cached.dataframe))
+        self.assertEquals('category', str(cached.dataframe['chromosome'].dtype))
+        self.assertEquals(['P2'], list(cached.search('start > 200')['peak_id']))
+
+    def test_stale_or_corrupt_caches_are_rebuilt(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+']])
+        CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True).run()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '300', '400', 'Gfi1', '-']])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True)
+        csvfile.run()
+        self.assertEquals(['P1', 'P2'], list(csvfile.dataframe['peak_id']))
+
+        with open(os.path.join(self._path, '.peaks.bedx.arrow'), 'wb') as cache:
+            cache.write(b'ARROW1 not really')
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True)
+        csvfile.run()
+        self.assertTrue(csvfile.complete)
+        self.assertEquals(2, len(csvfile.dataframe))
+        self.assertEquals(2, len(csvfile._cache.load()))
+
+        untyped = CSVFile(filename, item.DELIMITER, item.keys(), cache=True)
+        with patch('pandas.read_csv', wraps=pandas.read_csv) as mock_read:
+            untyped.run()
+            self.assertTrue(mock_read.called)
+
+    def test_large_files_are_split_at_line_boundaries(self):
+        item = BedxFileItem()
+        filename = self._file([['P{0}'.format(i), 'chr1', '1', '2', 'G', '+'] for i in range(100)])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), split_size=100, processes=ProcessExecutor(4))
+        ranges = csvfile._ranges()
+        self.assertEquals(4, len(ranges))
+        self.assertEquals((0, os.path.getsize(filename)), (ranges[0][0], ranges[-1][1]))
+        with open(filename, 'rb') as bedx:
+            content = bedx.read()
+        for start, end in ranges:
+            self.assertTrue(start == 0 or content[start - 1:start] == b'\n')
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), split_size=10 ** 6, processes=ProcessExecutor(4))
+        self.assertIsNone(csvfile._ranges())
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_files_of_the_csv_manager_are_split_over_the_thread_manager_processes(self, mock_load):
+        Config = namedtuple('Config', 'manager csv threading')
+        CsvConfig = namedtuple('CsvConfig', 'datapath input_files output_directory namespace split_size')
+        lines = [['P{0}'.format(i), 'chr{0}'.format(i % 5), str(i), str(i + 1), 'G', '+'] for i in range(300)]
+        self._file(lines)
+        configuration = Config(
+            manager='csv',
+            csv=CsvConfig(
+                datapath=self._path,
+                input_files=['peaks.bedx'],
+                output_directory=self._path,
+                namespace='bioinformatics',
+                split_size=1000
+            ),
+            threading=namedtuple('ThreadingConfig', 'process_workers')(process_workers=2)
+        )
+        for name, value in (('manager', 'csv'), ('_configuration', configuration)):
+            patcher = patch('pyccata.core.configuration.Configuration.' + name, new_callable=PropertyMock)
+            patcher.start().return_value = value
+            self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, Configuration, '_instance', None)
+        self.addCleanup(setattr, ThreadManager, '_instance', None)
+
+        manager = ThreadManager()
+        self.addCleanup(manager.executors[Threadable.PROCESS].shutdown)
+        csvfile = manager.projectmanager.client.client[0]
+        self.assertEquals([csvfile], list(manager))
+        self.assertIs(manager.executors[Threadable.PROCESS], csvfile._processes)
+        self.assertEquals(2, len(csvfile._ranges()))
+
+        manager.execute()
+        self.assertIsNone(csvfile.failure)
+        self.assertEquals([line[0] for line in lines], list(csvfile.dataframe['peak_id']))
+
+    def test_pieces_are_parsed_in_worker_processes_and_joined_in_order(self):
+        item = BedxFileItem()
+        lines = [['P{0}'.format(i), 'chr{0}'.format(i % 5), str(i), str(i + 1), 'G', '+-'[i % 2]] for i in range(500)]
+        filename = self._file(lines)
+        processes = ProcessExecutor(3)
+        self.addCleanup(processes.shutdown)
+        csvfile = CSVFile(
+            filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, split_size=1000, processes=processes
+        )
+        csvfile.run()
+        self.assertIsNone(csvfile.failure)
+        self.assertEquals([line[0] for line in lines], list(csvfile.dataframe['peak_id']))
+        self.assertEquals(list(range(500)), list(csvfile.dataframe.index))
+        self.assertEquals('category', str(csvfile.dataframe['chromosome'].dtype))
+        self.assertEquals('int32', str(csvfile.dataframe['start'].dtype))
+
+    def test_only_the_columns_declared_are_loaded(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '300', '400', 'Gfi1', '-']])
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA)
+        csvfile.require(['start'] + csvfile.referenced('chromosome == "start" & peak_id != `end`'))
+        csvfile.require(['gene_name', 'unknown'])
+        self.assertEquals(['peak_id', 'chromosome', 'start', 'end', 'gene_name'], csvfile.required)
+        csvfile.run()
+        self.assertEquals(csvfile.required, list(csvfile.dataframe.columns))
+        self.assertEquals('int32', str(csvfile.dataframe['start'].dtype))
+
+        results = csvfile.search('strand == "-"', fields=['peak_id', 'strand'])
+        self.assertEquals(['P2'], list(results['peak_id']))
+        self.assertEquals(item.keys(), list(csvfile.dataframe.columns))
+        self.assertEquals('category', str(csvfile.dataframe['strand'].dtype))
+
+        csvfile.require(None)
+        self.assertIsNone(csvfile.required)
+
+    def test_columns_missing_from_the_cache_projection_are_read_from_it(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+'], ['P2', 'chr2', '300', '400', 'Gfi1', '-']])
+        CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True).run()
+        csvfile = CSVFile(filename, item.DELIMITER, item.keys(), schema=item.SCHEMA, cache=True)
+        csvfile.require(['peak_id'])
+        with patch('pandas.read_csv') as mock_read:
+            csvfile.run()
+            self.assertEquals(['peak_id'], list(csvfile.dataframe.columns))
+            self.assertEquals(['P2'], list(csvfile.search('end > 300', fields=['peak_id'])['peak_id']))
+            self.assertFalse(mock_read.called)
+
+    def test_client_declares_the_columns_of_anticipated_searches(self):
+        item = BedxFileItem()
+        filename = self._file([['P1', 'chr1', '100', '200', 'Xkr4', '+']])
+        client = CSVClient('peaks.bedx', namespace='bioinformatics', datapath=self._path)
+        client._threadmanager = []
+        client.add_source('peaks.bedx')
+        client.anticipate('chromosome = chr1 and start > 10', fields=['peak_id'], columns=['strand'])
+        self.assertEquals(['peak_id', 'chromosome', 'start', 'strand'], client[0].required)
+        client.anticipate('', fields=None)
+        self.assertIsNone(client[0].required)
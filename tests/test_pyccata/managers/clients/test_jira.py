@@ -1,5 +1,5 @@
 from unittest import TestCase
-from mock import patch, PropertyMock
+from mock import patch, PropertyMock, MagicMock
 
 from pyccata.core.configuration import Configuration
 from pyccata.core.managers.project import ProjectManager
@@ -7,10 +7,16 @@ from pyccata.core.exceptions import InvalidConnectionError, InvalidQueryError
 from pyccata.core.interface import ManagerInterface
 from pyccata.core.managers.clients.jira import Jira
 from tests.mocks.dataproviders import DataProviders
+from tests.mocks.dataproviders import PagedJiraClient
+from tests.mocks.dataproviders import SyncingJiraClient
 from jira.client import JIRA
 from jira.exceptions import JIRAError
 from pyccata.core.log import Logger
 from collections import namedtuple
+import time
+import shutil
+import tempfile
+import requests
 
 class TestJira(TestCase):
 
@@ -144,4 +150,152 @@ class TestJira(TestCase):
                 self.assertIsInstance(manager.client.client, JIRA)
                 attachments = manager.search_issues(search_query='assignee = "bob123"', max_results=2, fields=['attachments'])
 
+    def _paged_manager(self, client):
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+                manager = ProjectManager()
+                manager._client._client = client
+                return manager
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_search_without_a_limit_fetches_every_page_concurrently_in_order(self, mock_load):
+        client = PagedJiraClient(230)
+        manager = self._paged_manager(client)
+        results = manager.search_issues(search_query='fixVersion = "1.0"', max_results=False, fields=['summary'])
+        self.assertEquals(230, results.total)
+        self.assertEquals(['TP-{0}'.format(index) for index in range(230)], [issue.key for issue in results])
+        self.assertEquals([0, 50, 100, 150, 200], sorted([start for start, _ in client.requests]))
+        self.assertEquals(Jira.PAGE_WORKERS, len([name for name in client.workers if name.startswith('jira-search')]))
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_search_stops_at_max_results(self, mock_load):
+        client = PagedJiraClient(230)
+        manager = self._paged_manager(client)
+        results = manager.search_issues(search_query='fixVersion = "1.0"', max_results=120, fields=[])
+        self.assertEquals(120, len(results))
+        self.assertEquals([(0, 50), (50, 50), (100, 20)], sorted(client.requests))
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_search_follows_the_page_size_the_server_returns(self, mock_load):
+        client = PagedJiraClient(70, page_size=20)
+        manager = self._paged_manager(client)
+        results = manager.search_issues(search_query='fixVersion = "1.0"', max_results=False, fields=[])
+        self.assertEquals(['TP-{0}'.format(index) for index in range(70)], [issue.key for issue in results])
+        self.assertEquals([0, 20, 40, 60], sorted([start for start, _ in client.requests]))
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_search_raises_invalid_connection_error_when_a_page_fails(self, mock_load):
+        manager = self._paged_manager(PagedJiraClient(230, fail_at=100))
+        with self.assertRaises(InvalidConnectionError):
+            manager.search_issues(search_query='fixVersion = "1.0"', max_results=False, fields=[])
+
+    def _syncing_manager(self, client, path):
+        JiraConfig = namedtuple('Jira', 'server port username password incremental sync_path')
+        Config = namedtuple('Config', 'manager jira')
+        patches = [
+            patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock),
+            patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock)
+        ]
+        mock_manager, mock_config = [patcher.start() for patcher in patches]
+        for patcher in patches:
+            self.addCleanup(patcher.stop)
+        mock_config.return_value = Config(
+            manager='jira',
+            jira=JiraConfig(
+                server='http://jira.local', port='8080', username='test', password='letmein',
+                incremental=True, sync_path=path
+            )
+        )
+        mock_manager.return_value = 'jira'
+        manager = ProjectManager()
+        manager._client._client = client
+        return manager
 
+    def _sync(self, manager, query='fixVersion = "1.0" ORDER BY key DESC'):
+        return manager.search_issues(search_query=query, max_results=False, fields=['summary'])
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_incremental_search_fetches_changes_and_drops_issues_which_left(self, mock_load):
+        path = tempfile.mkdtemp()
+        try:
+            client = SyncingJiraClient(['TP-1', 'TP-2', 'TP-3'])
+            manager = self._syncing_manager(client, path)
+            self.assertEquals(['TP-3', 'TP-2', 'TP-1'], [issue.key for issue in self._sync(manager)])
+            self.assertEquals(1, len(client.queries))
+
+            client.issues['TP-2'] = 'v2'
+            client.issues['TP-4'] = 'v1'
+            del client.issues['TP-3']
+            client.changed = set(['TP-2', 'TP-4'])
+            results = self._sync(manager)
+            self.assertEquals(['TP-4', 'TP-2', 'TP-1'], [issue.key for issue in results])
+            self.assertEquals(['v1', 'v2', 'v1'], [issue.summary for issue in results])
+            self.assertEquals(3, results.total)
+            self.assertEquals(
+                '(fixVersion = "1.0") AND updated >= "-2m" ORDER BY key DESC',
+                client.queries[1]
+            )
+            self.assertEquals(4, len(client.queries))
+        finally:
+            shutil.rmtree(path)
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_incremental_search_without_changes_only_checks_the_total(self, mock_load):
+        path = tempfile.mkdtemp()
+        try:
+            client = SyncingJiraClient(['TP-1', 'TP-2'])
+            manager = self._syncing_manager(client, path)
+            self._sync(manager)
+            results = self._sync(manager)
+            self.assertEquals(['TP-2', 'TP-1'], [issue.key for issue in results])
+            self.assertEquals(3, len(client.queries))
+        finally:
+            shutil.rmtree(path)
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_incremental_search_fetches_everything_once_the_store_is_old(self, mock_load):
+        path = tempfile.mkdtemp()
+        try:
+            client = SyncingJiraClient(['TP-1', 'TP-2'])
+            manager = self._syncing_manager(client, path)
+            self._sync(manager)
+            with patch('pyccata.core.managers.clients.jira.time.time', return_value=time.time() + Jira.FULL_SYNC + 1):
+                self._sync(manager)
+            self.assertEquals(2, len(client.queries))
+            self.assertNotIn('updated', client.queries[1])
+        finally:
+            shutil.rmtree(path)
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_incremental_searches_for_different_fields_are_stored_apart(self, mock_load):
+        path = tempfile.mkdtemp()
+        try:
+            client = SyncingJiraClient(['TP-1', 'TP-2'])
+            manager = self._syncing_manager(client, path)
+            query = 'fixVersion = "1.0" ORDER BY key DESC'
+            manager.search_issues(search_query=query, max_results=False, fields=['summary', 'key'])
+            manager.search_issues(search_query=query, max_results=False, fields=['summary', 'key', 'sum'])
+            self.assertEquals(2, len(client.queries))
+            self.assertNotIn('updated', client.queries[1])
+        finally:
+            shutil.rmtree(path)
+
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_shared_session_carries_the_jira_credentials_and_connections(self, mock_load):
+        client = MagicMock()
+        client._session = requests.Session()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+                manager = ProjectManager()
+                manager._client._client = client
+                session = manager.session
+                self.assertIs(session, manager.client.session)
+                self.assertIs(session.adapter, client._session.get_adapter('http://jira.local:8080/rest/api/2'))
+                with patch('requests.Session.request') as mock_request:
+                    session.get(manager.server.attachments('10', 'install.sql'))
+                self.assertEquals(('test', 'letmein'), mock_request.call_args[1]['auth'])
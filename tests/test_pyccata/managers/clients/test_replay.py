@@ -0,0 +1,107 @@
+import os
+import io
+import shutil
+import tempfile
+from unittest import TestCase
+from collections import namedtuple
+from mock import patch, PropertyMock
+from requests.adapters import BaseAdapter
+from requests.models import Response
+
+from pyccata.core.log import Logger
+from pyccata.core.exceptions import InvalidQueryError
+from pyccata.core.managers.project import ProjectManager
+from pyccata.core.managers.clients.replay import Replay
+from pyccata.core.managers.clients.replay import Fixtures
+from pyccata.core.managers.clients.replay import RecordingClient
+from pyccata.core.managers.clients.replay import RecordingAdapter
+from tests.mocks.dataproviders import PagedJiraClient
+
+class AttachmentAdapter(BaseAdapter):
+    """ Answers every request with the same body """
+    def send(self, request, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b'SELECT 1;')
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+class TestReplay(TestCase):
+
+    Config = namedtuple('Config', 'manager replay jira')
+    JiraConfig = namedtuple('JiraConfig', 'server port username password')
+    ReplayConfig = namedtuple('ReplayConfig', 'fixtures mode page_size latency')
+
+    @patch('argparse.ArgumentParser.parse_args')
+    @patch('pyccata.core.log.Logger.log')
+    def setUp(self, mock_log, mock_parser):
+        mock_log.return_value = None
+        mock_parser.return_value = []
+        Logger._instance = mock_log
+        self._fixtures = tempfile.mkdtemp()
+
+    def tearDown(self):
+        Logger._instance = None
+        shutil.rmtree(self._fixtures)
+
+    def _manager(self, mode, page_size=50):
+        for name, value in (('manager', 'replay'), ('_configuration', None)):
+            patcher = patch('pyccata.core.configuration.Configuration.' + name, new_callable=PropertyMock)
+            mock = patcher.start()
+            self.addCleanup(patcher.stop)
+            mock.return_value = value if value is not None else TestReplay.Config(
+                manager='replay',
+                replay=TestReplay.ReplayConfig(fixtures=self._fixtures, mode=mode, page_size=page_size, latency=0),
+                jira=TestReplay.JiraConfig(server='http://jira.local', port='', username='test', password='letmein')
+            )
+        return ProjectManager()
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_recorded_searches_are_replayed_without_jira(self, mock_load):
+        recorder = self._manager('record')
+        self.assertIsInstance(recorder.client, Replay)
+        recorder._client._client = RecordingClient(PagedJiraClient(120), recorder.client.fixtures)
+        recorded = recorder.search_issues(search_query='project = TP', max_results=False, fields=['summary'])
+        self.assertEquals(120, len(recorded))
+
+        replay = self._manager('replay', page_size=30)
+        replayed = replay.search_issues(search_query='project  =  TP', max_results=False, fields=['summary'])
+        self.assertEquals(120, replayed.total)
+        self.assertEquals([issue.key for issue in recorded], [issue.key for issue in replayed])
+        self.assertEquals(['0', '1'], [issue.summary for issue in replayed][:2])
+        self.assertEquals(30, len(replay.client.client.search_issues('project = TP', fields='summary')['issues']))
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_searches_which_were_never_recorded_fail(self, mock_load):
+        manager = self._manager('replay')
+        with self.assertRaises(InvalidQueryError):
+            manager.search_issues(search_query='project = NOPE', max_results=10, fields=[])
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_attachments_are_served_from_the_fixtures(self, mock_load):
+        manager = self._manager('replay')
+        url = manager.server.attachments('10', 'install.sql')
+        path = manager.client.fixtures.attachment(url)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as attachment:
+            attachment.write(b'SELECT 1;')
+
+        response = manager.session.get(url, stream=True)
+        self.assertEquals(200, response.status_code)
+        self.assertEquals(b'SELECT 1;', b''.join(response.iter_content(chunk_size=4)))
+        response = manager.session.get(url, stream=True, headers={'Range': 'bytes=7-'})
+        self.assertEquals(206, response.status_code)
+        self.assertEquals(b'1;', response.content)
+        self.assertEquals(404, manager.session.get(manager.server.attachments('11', 'other.sql')).status_code)
+
+    def test_recording_adapter_saves_attachments(self):
+        fixtures = Fixtures(self._fixtures)
+        adapter = RecordingAdapter(AttachmentAdapter(), fixtures)
+        url = 'http://jira.local/secure/attachment/12/release%2B1.sql'
+        request = namedtuple('Request', 'url')(url=url)
+        self.assertEquals(b'SELECT 1;', adapter.send(request).content)
+        with open(os.path.join(self._fixtures, 'attachments', '12', 'release+1.sql'), 'rb') as recorded:
+            self.assertEquals(b'SELECT 1;', recorded.read())
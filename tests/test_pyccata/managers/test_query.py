@@ -1,10 +1,45 @@
+from collections import namedtuple
 from unittest import TestCase
 from mock import patch
 
 from pyccata.core.filter import Filter
 from pyccata.core.managers.query import QueryManager
+from pyccata.core.managers.query import Clause
+from pyccata.core.resources import ResultList
+from pyccata.core.resources import Issue
+from pyccata.core.fieldmap import FieldMap
 from pyccata.core.log import Logger
 
+Resource = namedtuple('Resource', 'name id')
+
+class CoalescingProjectManager(object):
+    """ Records searches and answers them from a fixed set of issues """
+    Client = namedtuple('Client', 'COALESCE')
+
+    def __init__(self, coalesce=True):
+        self.client = CoalescingProjectManager.Client(COALESCE=coalesce)
+        self.searches = []
+        self.anticipated = []
+
+    def projection(self, attributes):
+        return FieldMap([]).project(attributes)
+
+    def anticipate(self, search_query, fields=None, columns=None):
+        self.anticipated.append((search_query, fields, columns))
+
+    def search_issues(self, search_query='', max_results=0, fields=None, group_by=None):
+        self.searches.append((search_query, fields))
+        results = ResultList()
+        for key, issuetype, status in [('TP-1', 'Bug', 'Done'), ('TP-2', 'Story', 'Done'), ('TP-3', 'Bug', 'Open')]:
+            issue = Issue()
+            issue.key = key
+            issue.issuetype = Resource(name=issuetype, id='1')
+            issue.status = Resource(name=status, id='2')
+            results.append(issue)
+        return results
+
+Part = namedtuple('Part', 'reads')
+
 class TestQueryManager(TestCase):
 
     @patch('pyccata.core.configuration.Configuration._parse_flags')
@@ -36,3 +71,119 @@ class TestQueryManager(TestCase):
         self.assertEquals(2, len(self._manager))
         self.assertFalse(another_filter.observing)
 
+    def _filter(self, query, projectmanager, max_results=False, fields=None):
+        item = Filter(query, max_results=max_results, fields=fields)
+        item._projectmanager = projectmanager
+        return item
+
+    def test_parse_splits_conditions_and_order(self):
+        clauses, order = Clause.parse('fixVersion = "1.0" and Type in (Bug, "New Feature") order by key')
+        self.assertEquals(['fixVersion = "1.0"', 'type IN ( Bug , "New Feature" )'], [clause.text for clause in clauses])
+        self.assertEquals([False, True], [clause.local for clause in clauses])
+        self.assertEquals('ORDER BY key', order)
+
+    def test_parse_keeps_a_top_level_or_whole(self):
+        clauses, _ = Clause.parse('project = TP AND status = Done OR priority = High')
+        self.assertEquals(1, len(clauses))
+        self.assertFalse(clauses[0].local)
+        clauses, _ = Clause.parse('project = TP AND (status = Done OR priority = High)')
+        self.assertEquals(2, len(clauses))
+
+    def test_clause_matches_names_ids_and_empty_fields(self):
+        issue = Issue()
+        issue.status = Resource(name='In Progress', id='3')
+        self.assertTrue(Clause(['status', '=', '"in progress"']).matches(issue))
+        self.assertTrue(Clause(['status', 'IN', '(', 'Done', ',', '3', ')']).matches(issue))
+        self.assertFalse(Clause(['status', '!=', '3']).matches(issue))
+        self.assertTrue(Clause(['resolution', 'IS', 'EMPTY']).matches(issue))
+        self.assertFalse(Clause(['resolution', '!=', 'Fixed']).matches(issue))
+        self.assertFalse(Clause(['resolution', 'IS', 'NOT', 'EMPTY']).matches(issue))
+
+    def test_filters_differing_in_local_conditions_share_one_search(self):
+        projectmanager = CoalescingProjectManager()
+        bugs = self._filter('fixVersion = "1.0" AND type = Bug', projectmanager, fields=['summary'])
+        done = self._filter('fixVersion = "1.0" AND status = Done', projectmanager, fields=['key'])
+        self._manager.append(bugs)
+        self._manager.append(done)
+        self.assertEquals([bugs], list(self._manager))
+        self.assertTrue(done.observing)
+        self.assertEquals('fixVersion = "1.0"', bugs.search_query)
+        self.assertEquals(['summary', 'issuetype', 'key', 'status'], bugs.search_fields)
+
+        bugs.run()
+        self.assertEquals([('fixVersion = "1.0"', ['summary', 'issuetype', 'key', 'status'])], projectmanager.searches)
+        self.assertEquals(['TP-1', 'TP-3'], [issue.key for issue in bugs.results])
+        self.assertEquals(['TP-1', 'TP-2'], [issue.key for issue in done.results])
+        self.assertTrue(done.complete)
+
+    def test_filters_are_not_coalesced_when_results_could_differ(self):
+        projectmanager = CoalescingProjectManager()
+        pairs = [
+            ('project = TP AND type = Bug ORDER BY key', 'project = TP AND type = Story ORDER BY rank'),
+            ('project = TP AND type = Bug', 'project = TP AND summary ~ "release"'),
+            ('type = Bug', 'status = Done')
+        ]
+        for first, second in pairs:
+            manager = QueryManager()
+            manager.append(self._filter(first, projectmanager))
+            manager.append(self._filter(second, projectmanager))
+            self.assertEquals(2, len(manager))
+
+        manager = QueryManager()
+        manager.append(self._filter('project = TP AND type = Bug', projectmanager, max_results=10))
+        manager.append(self._filter('project = TP AND type = Story', projectmanager, max_results=10))
+        self.assertEquals(2, len(manager))
+
+        manager = QueryManager()
+        manager.append(self._filter('project = TP AND type = Bug', CoalescingProjectManager(coalesce=False)))
+        manager.append(self._filter('project = TP AND type = Story', CoalescingProjectManager(coalesce=False)))
+        self.assertEquals(2, len(manager))
+
+    def test_filters_differing_only_in_fields_share_a_limited_search(self):
+        projectmanager = CoalescingProjectManager()
+        first = self._filter('project = TP', projectmanager, max_results=10, fields=['summary'])
+        second = self._filter('project  =  TP', projectmanager, max_results=10, fields=['status'])
+        self._manager.append(first)
+        self._manager.append(second)
+        self.assertEquals(1, len(self._manager))
+        self.assertEquals(['summary', 'status'], first.search_fields)
+
+    def test_filters_without_fields_search_for_what_the_parts_read(self):
+        projectmanager = CoalescingProjectManager()
+        bugs = self._filter('fixVersion = "1.0" AND type = Bug', projectmanager)
+        done = self._filter('fixVersion = "1.0" AND status = Done', projectmanager, fields=['Release text'])
+        self._manager.append(bugs)
+        self._manager.append(done)
+        self.assertIsNone(bugs.search_fields)
+
+        self._manager.project([Part(reads=[(bugs, ['description'])]), Part(reads=[(bugs, ['Summary'])])])
+        self.assertEquals('fixVersion = "1.0"', bugs.search_query)
+        self.assertEquals(['key', 'description', 'summary', 'issuetype', 'Release text', 'status'], bugs.search_fields)
+        self.assertIsNone(bugs.fields)
+
+    def test_filters_are_not_narrowed_unless_every_reader_is_known(self):
+        projectmanager = CoalescingProjectManager()
+        unnamed = self._filter('project = TP', projectmanager)
+        unmapped = self._filter('project = XX', projectmanager)
+        unread = self._filter('project = YY', projectmanager)
+        for item in (unnamed, unmapped, unread):
+            self._manager.append(item)
+
+        self._manager.project([
+            Part(reads=[(unnamed, ['summary'])]),
+            Part(reads=[(unnamed, None)]),
+            Part(reads=[(unmapped, ['not_a_field'])])
+        ])
+        self.assertEquals([None, None, None], [item.search_fields for item in (unnamed, unmapped, unread)])
+
+    def test_searches_still_to_be_made_are_anticipated(self):
+        projectmanager = CoalescingProjectManager()
+        peaks = Filter('chromosome = chr1', fields=['peak_id', 'start'], group_by='strand')
+        peaks._projectmanager = projectmanager
+        done = self._filter('project = TP', projectmanager, fields=['summary'])
+        done._complete = True
+        self._manager.append(peaks)
+        self._manager.append(done)
+
+        self._manager.project([])
+        self.assertEquals([('chromosome = chr1', ['peak_id', 'start'], ['strand'])], projectmanager.anticipated)
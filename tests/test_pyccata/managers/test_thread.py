@@ -1,10 +1,29 @@
+import os
+import json
+import time
+import tempfile
+from threading import Event
 from unittest import TestCase
 from mock     import patch, PropertyMock
 
 from tests.mocks.dataproviders import DataProviders
 from tests.mocks.dataproviders import TestObservableThread
 from tests.mocks.dataproviders import ViableTestThread
+from tests.mocks.dataproviders import QuickTestThread
+from tests.mocks.dataproviders import SpawningTestThread
+from tests.mocks.dataproviders import WorkerNameTestThread
+from tests.mocks.dataproviders import InlineTestExecutor
+from tests.mocks.dataproviders import ProcessTestThread
+from tests.mocks.dataproviders import DependentTestThread
+from tests.mocks.dataproviders import SearchingTestThread
+from tests.mocks.dataproviders import FlakyConnectionThread
+from tests.mocks.dataproviders import RaisingAsyncTestThread
+from tests.mocks.dataproviders import BlockingAsyncTestThread
+from tests.mocks.dataproviders import RaisingTestThread
+from tests.mocks.dataproviders import AsyncTestThread
 from tests.mocks.dataproviders import BrokenConnectionFilter
+from tests.mocks.dataproviders import CancellableTestThread
+from tests.mocks.dataproviders import StubbornTestThread
 
 from pyccata.core.configuration import Configuration
 from pyccata.core.managers.project import ProjectManager
@@ -13,8 +32,18 @@ from pyccata.core.managers.query import QueryManager
 from pyccata.core.exceptions import InvalidModuleError
 from pyccata.core.exceptions import ArgumentValidationError
 from pyccata.core.exceptions import InvalidClassError
+from pyccata.core.exceptions import ThreadFailedError
+from pyccata.core.exceptions import InvalidConnectionError
+from pyccata.core.exceptions import ThreadCancelledError
+from pyccata.core.exceptions import ThreadTimeoutError
 from pyccata.core.filter import Filter
 from pyccata.core.log import Logger
+from pyccata.core.threading import Threadable
+from pyccata.core.threading import PoolExecutor
+from pyccata.core.threading import ThreadExecutor
+from pyccata.core.threading import ProcessExecutor
+from pyccata.core.threading import AsyncExecutor
+from pyccata.core.concurrency import ConcurrencyController
 
 class TestThreadManager(TestCase):
 
@@ -55,6 +84,22 @@ class TestThreadManager(TestCase):
                 manager.append(mock_filter)
                 self.assertIsInstance(mock_filter.projectmanager, ProjectManager)
 
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_project_manager_may_append_threads_when_given_the_manager(self, mock_load, mock_jira_client):
+        mock_jira_client.return_value = DataProviders._get_client()
+        source = QuickTestThread()
+        assign = PropertyMock(side_effect=lambda *manager: manager and manager[0].append(source))
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                with patch('pyccata.core.managers.project.ProjectManager.threadmanager', new=assign):
+                    mock_config.return_value = DataProviders._get_config_for_test()
+                    mock_manager.return_value = 'jira'
+                    manager = ThreadManager()
+                    self.assertEquals([source], list(manager))
+                    manager.execute()
+                    self.assertTrue(source.complete)
+
     @patch('pyccata.core.managers.clients.jira.Jira._client')
     @patch('pyccata.core.configuration.Configuration._load')
     @patch('pyccata.core.managers.query.QueryManager.append')
@@ -145,3 +190,663 @@ class TestThreadManager(TestCase):
                 manager.start()
                 self.assertEquals(1, len(manager._failed_threads))
 
+    @patch('pyccata.core.retry.random.uniform')
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_retries_threads_which_fail_to_connect(self, mock_query, mock_load, mock_jira_client, mock_uniform):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        mock_uniform.return_value = 0.01
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.clear()
+                thread = FlakyConnectionThread(failures=2)
+                manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertEquals(3, thread.attempts)
+                self.assertEquals(2, thread.retries)
+                self.assertEquals(2, mock_uniform.call_count)
+
+    @patch('pyccata.core.retry.random.uniform')
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_gives_up_after_max_retries(self, mock_query, mock_load, mock_jira_client, mock_uniform):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        mock_uniform.return_value = 0.01
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.clear()
+                thread = FlakyConnectionThread(failures=10)
+                manager.append(thread)
+                manager.start()
+                self.assertFalse(manager.completed)
+                self.assertEquals(ThreadManager.MAX_RETRIES + 1, thread.attempts)
+                self.assertIsInstance(thread.failure, InvalidConnectionError)
+
+    @patch('pyccata.core.retry.random.uniform')
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_does_not_retry_failures_which_will_not_go_away(self, mock_query, mock_load, mock_jira_client, mock_uniform):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        mock_uniform.return_value = 0.01
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.clear()
+                thread = FlakyConnectionThread(failures=1, code=401)
+                manager.append(thread)
+                manager.start()
+                self.assertFalse(manager.completed)
+                self.assertEquals(1, thread.attempts)
+
+    @patch('pyccata.core.retry.random.uniform')
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_waits_for_retry_after(self, mock_query, mock_load, mock_jira_client, mock_uniform):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        mock_uniform.return_value = 0.01
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.clear()
+                thread = FlakyConnectionThread(failures=1, code=429, headers={'Retry-After': '0.3'})
+                manager.append(thread)
+                start = time.time()
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertGreaterEqual(time.time() - start, 0.3)
+
+    @patch('pyccata.core.retry.random.uniform')
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_stops_retrying_whilst_the_circuit_is_open(self, mock_query, mock_load, mock_jira_client, mock_uniform):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        mock_uniform.return_value = 0.01
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.clear()
+                threads = [FlakyConnectionThread(failures=10) for _ in range(2)]
+                with patch.object(ThreadManager, 'BREAKER_THRESHOLD', 2):
+                    for thread in threads:
+                        manager.append(thread)
+                    manager.start()
+                self.assertFalse(manager.completed)
+                self.assertEquals(3, sum([thread.attempts for thread in threads]))
+
+    @patch('pyccata.core.managers.thread.sleep')
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_event_driven_execute_does_not_poll(self, mock_query, mock_load, mock_jira_client, mock_sleep):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                threads = [QuickTestThread() for _ in range(50)]
+                for thread in threads:
+                    manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertFalse(mock_sleep.called)
+                for thread in threads:
+                    self.assertTrue(thread.complete)
+                    self.assertFalse(thread.isAlive())
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_event_driven_execute_wakes_when_running_thread_appends(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                spawning = SpawningTestThread(manager=manager)
+                manager.append(spawning)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertTrue(spawning.complete)
+                self.assertTrue(spawning._child.complete)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_io_threads_run_on_bounded_worker_pool(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.register_executor(Threadable.IO, PoolExecutor(2, name='bounded'))
+                threads = [WorkerNameTestThread() for _ in range(20)]
+                for thread in threads:
+                    manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                workers = set([thread.worker for thread in threads])
+                self.assertTrue(len(workers) <= 2)
+                for worker in workers:
+                    self.assertTrue(worker.startswith('bounded'))
+                for thread in threads:
+                    self.assertTrue(thread.complete)
+                    self.assertIsNone(thread.ident)
+                manager.register_executor(Threadable.IO, PoolExecutor(ThreadManager.IO_WORKERS, name='io'))
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_registered_executor_receives_threads_by_name(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                executor = InlineTestExecutor()
+                manager.register_executor('inline', executor)
+                thread = QuickTestThread()
+                thread.EXECUTOR = 'inline'
+                manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertEquals([thread], executor.submitted)
+                self.assertTrue(thread.complete)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_register_executor_rejects_non_executors(self, mock_load, mock_jira_client):
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+                manager = ThreadManager()
+                with self.assertRaises(ArgumentValidationError):
+                    manager.register_executor('inline', object())
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_process_threads_collect_results_from_worker_processes(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.register_executor(Threadable.PROCESS, ProcessExecutor(2))
+                threads = [ProcessTestThread(value=i) for i in range(10)]
+                for thread in threads:
+                    manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                for i, thread in enumerate(threads):
+                    self.assertTrue(thread.complete)
+                    self.assertEquals(i * i, thread.result[0])
+                    self.assertNotEqual(os.getpid(), thread.result[1])
+                manager.executors[Threadable.PROCESS].shutdown()
+
+    def test_process_executor_records_worker_exceptions_against_thread(self):
+        executor = ProcessExecutor(1)
+        thread = ProcessTestThread(value=-1)
+        signalled = []
+        executor.submit(thread, signalled.append)
+        executor.executor.shutdown(wait=True)
+        self.assertEquals([thread], signalled)
+        self.assertFalse(thread.complete)
+        self.assertIsInstance(thread.failure, ValueError)
+
+    def test_process_executor_fails_threads_without_a_task(self):
+        executor = ProcessExecutor(1)
+        thread = QuickTestThread()
+        signalled = []
+        executor.submit(thread, signalled.append)
+        self.assertEquals([thread], signalled)
+        self.assertIsInstance(thread.failure, NotImplementedError)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_ready_queue_dispatches_in_priority_then_arrival_order(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                executor = InlineTestExecutor()
+                manager.register_executor(Threadable.IO, executor)
+                first = QuickTestThread()
+                second = QuickTestThread()
+                dependent = DependentTestThread()
+                observable = TestObservableThread()
+                for thread in [first, observable, dependent, second]:
+                    manager.append(thread)
+                self.assertEquals([first, observable, dependent, second], list(manager))
+                manager.start()
+                self.assertEquals([dependent, first, second, observable], executor.submitted)
+                manager.register_executor(Threadable.IO, PoolExecutor(ThreadManager.IO_WORKERS, name='io'))
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_append_is_safe_from_many_threads(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                spawners = [SpawningTestThread(manager=manager) for _ in range(20)]
+                for thread in spawners:
+                    manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertEquals(40, len(manager))
+                self.assertEquals(0, len(manager._ready))
+                for thread in manager:
+                    self.assertTrue(thread.complete)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_starts_threads_after_their_dependencies(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                # the dependent has the higher priority so would otherwise start first
+                dependency = ViableTestThread()
+                dependent = DependentTestThread(dependency=dependency)
+                manager.append(dependent)
+                manager.append(dependency)
+                self.assertTrue(dependent.blocked)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertEquals([True], dependent.dependency_complete)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_searching_threads_wait_for_the_client_sources(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                with patch('pyccata.core.managers.project.ProjectManager.sources', new_callable=PropertyMock) as mock_sources:
+                    mock_config.return_value = DataProviders._get_config_for_test()
+                    mock_manager.return_value = 'jira'
+                    source = ViableTestThread()
+                    mock_sources.return_value = [source]
+
+                    manager = ThreadManager()
+                    searcher = SearchingTestThread()
+                    manager.append(searcher)
+                    self.assertEquals([source], searcher.dependencies)
+                    manager.append(source)
+                    manager.start()
+                    self.assertTrue(manager.completed)
+                    self.assertEquals([True], searcher.dependency_complete)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_fails_threads_whose_dependencies_never_run(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                # never handed to the manager
+                orphan = QuickTestThread()
+                dependent = DependentTestThread(dependency=orphan)
+                manager.append(dependent)
+                manager.start()
+                self.assertFalse(manager.completed)
+                self.assertIsNone(dependent.dependency_complete)
+                self.assertIsInstance(dependent.failure, ThreadFailedError)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_async_threads_run_concurrently_on_one_event_loop(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                threads = [AsyncTestThread(delay=0.2) for _ in range(50)]
+                for thread in threads:
+                    manager.append(thread)
+                start = time.time()
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertLess(time.time() - start, 0.2 * 10)
+                self.assertEquals(set(['async']), set([thread.worker for thread in threads]))
+                for thread in threads:
+                    self.assertTrue(thread.complete)
+                    self.assertIsNone(thread.ident)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_async_executor_limits_coroutines_in_flight(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.register_executor(Threadable.ASYNC, AsyncExecutor(3))
+                AsyncTestThread.max_in_flight = 0
+                threads = [AsyncTestThread(delay=0.01) for _ in range(12)]
+                for thread in threads:
+                    manager.append(thread)
+                manager.start()
+                self.assertTrue(manager.completed)
+                self.assertEquals(3, AsyncTestThread.max_in_flight)
+                manager.register_executor(Threadable.ASYNC, AsyncExecutor(ThreadManager.ASYNC_LIMIT))
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_records_and_saves_a_trace_of_each_thread(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.clear()
+                threads = [WorkerNameTestThread() for _ in range(3)]
+                for thread in threads:
+                    manager.append(thread)
+                path = os.path.join(tempfile.mkdtemp(), 'trace.json')
+                with patch('pyccata.core.log.Logger.log'):
+                    with patch('pyccata.core.managers.thread.ThreadManager._setting') as mock_setting:
+                        mock_setting.side_effect = lambda name, default: path if name == 'trace' else default
+                        manager.start()
+                self.assertTrue(manager.completed)
+                records = manager.trace.records
+                self.assertEquals([thread.thread_name for thread in threads], [record.name for record in records])
+                self.assertEquals([thread.worker for thread in threads], [record.worker for record in records])
+                self.assertEquals([False, False, False], [record.failed for record in records])
+                with open(path) as trace_file:
+                    self.assertEquals(3, len([event for event in json.load(trace_file)['traceEvents'] if event['ph'] == 'X']))
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_async_threads_are_not_bounded_by_pool_size(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                pool_size = ThreadManager.POOL_SIZE
+                ThreadManager.POOL_SIZE = 1
+                try:
+                    AsyncTestThread.max_in_flight = 0
+                    threads = [AsyncTestThread(delay=0.1) for _ in range(10)]
+                    for thread in threads:
+                        manager.append(thread)
+                    with patch.object(manager, '_controller', None):
+                        manager.start()
+                finally:
+                    ThreadManager.POOL_SIZE = pool_size
+                self.assertTrue(manager.completed)
+                self.assertEquals(10, AsyncTestThread.max_in_flight)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_defers_threads_beyond_the_limit_for_their_class(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                AsyncTestThread.max_in_flight = 0
+                threads = [AsyncTestThread(delay=0.01) for _ in range(6)]
+                for thread in threads:
+                    manager.append(thread)
+                with patch.object(manager, '_controller', ConcurrencyController(2, 2, 0.0)):
+                    manager.start()
+                self.assertTrue(manager.completed)
+                self.assertEquals(2, AsyncTestThread.max_in_flight)
+
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_cancels_threads_which_exceed_their_timeout(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                slow = CancellableTestThread(timeout=0.1)
+                quick = QuickTestThread()
+                manager.append(slow)
+                manager.append(quick)
+                start = time.perf_counter()
+                manager.start()
+                self.assertLess(time.perf_counter() - start, 2)
+                self.assertTrue(quick.complete)
+                self.assertIsInstance(slow.failure, ThreadTimeoutError)
+                self.assertEquals([slow], manager._failed_threads)
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_cancels_everything_when_the_execution_times_out(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                threads = [CancellableTestThread() for _ in range(2)]
+                blocked = DependentTestThread(dependency=threads[0])
+                for thread in threads + [blocked]:
+                    manager.append(thread)
+                with patch('pyccata.core.managers.thread.ThreadManager._setting') as mock_setting:
+                    mock_setting.side_effect = lambda name, default: 0.1 if name == 'timeout' else default
+                    start = time.perf_counter()
+                    manager.start()
+                self.assertLess(time.perf_counter() - start, 2)
+                for thread in threads + [blocked]:
+                    self.assertIsInstance(thread.failure, ThreadTimeoutError)
+                self.assertIsNone(blocked.dependency_complete)
+                self.assertEquals(3, len(manager._failed_threads))
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_stops_waiting_for_threads_which_ignore_cancellation(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                stubborn = StubbornTestThread(delay=1)
+                manager.append(stubborn)
+                with patch('pyccata.core.managers.thread.ThreadManager._setting') as mock_setting:
+                    mock_setting.side_effect = lambda name, default: {
+                        'thread_timeout': 0.05, 'cancel_grace': 0.05
+                    }.get(name, default)
+                    start = time.perf_counter()
+                    manager.start()
+                self.assertLess(time.perf_counter() - start, 0.8)
+                self.assertIsInstance(stubborn.failure, ThreadTimeoutError)
+                self.assertEquals([stubborn], manager._failed_threads)
+                while not stubborn.complete:
+                    time.sleep(0.05)
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_execute_aborts_on_first_failure_when_configured(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                failing = FlakyConnectionThread(failures=1, code=404)
+                waiting = CancellableTestThread()
+                manager.append(waiting)
+                manager.append(failing)
+                with patch('pyccata.core.managers.thread.ThreadManager._setting') as mock_setting:
+                    mock_setting.side_effect = lambda name, default: True if name == 'abort_on_failure' else default
+                    start = time.perf_counter()
+                    manager.start()
+                self.assertLess(time.perf_counter() - start, 2)
+                self.assertIsInstance(failing.failure, InvalidConnectionError)
+                self.assertIsInstance(waiting.failure, ThreadCancelledError)
+                self.assertFalse(waiting.complete)
+    @patch('pyccata.core.managers.clients.jira.Jira._client')
+    @patch('pyccata.core.configuration.Configuration._load')
+    @patch('pyccata.core.managers.query.QueryManager.append')
+    def test_threads_appended_after_cancellation_fail_without_running(self, mock_query, mock_load, mock_jira_client):
+        mock_query.side_effect = ArgumentValidationError('1st', 'append', 'pyccata.core.filter.Filter', 'object')
+        mock_jira_client.return_value = DataProviders._get_client()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = DataProviders._get_config_for_test()
+                mock_manager.return_value = 'jira'
+
+                manager = ThreadManager()
+                manager.cancel(ThreadCancelledError('Stopped'))
+                thread = QuickTestThread()
+                manager.append(thread)
+                manager.start()
+                self.assertFalse(thread.complete)
+                self.assertEquals('Stopped', str(thread.failure))
+    def test_pool_executor_does_not_run_cancelled_threads(self):
+        executor = PoolExecutor(1)
+        thread = QuickTestThread()
+        thread.cancel()
+        signalled = []
+        executor.submit(thread, signalled.append)
+        executor.executor.shutdown(wait=True)
+        self.assertEquals([thread], signalled)
+        self.assertFalse(thread.complete)
+        self.assertIsInstance(thread.failure, ThreadCancelledError)
+
+    def test_async_executor_runs_blocking_calls_on_its_own_pool(self):
+        executor = AsyncExecutor(2)
+        thread = BlockingAsyncTestThread()
+        signalled = Event()
+        executor.submit(thread, lambda thread: signalled.set())
+        self.assertTrue(signalled.wait(5))
+        executor.shutdown()
+        self.assertTrue(thread.complete)
+        self.assertTrue(thread.blocking_worker.startswith('async-blocking'))
+
+    @patch('pyccata.core.log.Logger.log')
+    def test_async_executor_records_uncaught_exceptions_against_thread(self, mock_log):
+        executor = AsyncExecutor(0)
+        thread = RaisingAsyncTestThread()
+        signalled = Event()
+        executor.submit(thread, lambda thread: signalled.set())
+        self.assertTrue(signalled.wait(5))
+        executor.shutdown()
+        self.assertIsInstance(thread.failure, RuntimeError)
+
+    def test_async_executor_rejects_synchronous_threads(self):
+        executor = AsyncExecutor(0)
+        with self.assertRaises(ArgumentValidationError):
+            executor.submit(QuickTestThread(), lambda thread: None)
+
+    @patch('pyccata.core.log.Logger.log')
+    def test_pool_executor_records_uncaught_exceptions_against_thread(self, mock_log):
+        executor = PoolExecutor(1)
+        thread = RaisingTestThread()
+        signalled = []
+        executor.submit(thread, signalled.append)
+        executor.executor.shutdown(wait=True)
+        self.assertEquals([thread], signalled)
+        self.assertIsInstance(thread.failure, RuntimeError)
+
+    @patch('threading.excepthook')
+    def test_thread_executor_records_uncaught_exceptions_against_thread(self, mock_hook):
+        executor = ThreadExecutor()
+        thread = RaisingTestThread()
+        signalled = []
+        executor.submit(thread, signalled.append)
+        thread.join()
+        self.assertEquals([thread], signalled)
+        self.assertIsInstance(thread.failure, RuntimeError)
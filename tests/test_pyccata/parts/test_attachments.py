@@ -1,6 +1,12 @@
 import os
+import shutil
+import asyncio
+import tempfile
+import threading
+import time
 from unittest import TestCase
 from mock import call
+from mock import MagicMock
 from mock import patch
 from mock import PropertyMock
 from ddt import ddt, data, unpack
@@ -21,6 +27,7 @@ class TestAttachments(TestCase):
 
     _report_manager = None
     _thread_manager = None
+    _downloads = None
 
     @patch('pyccata.core.log.Logger.log')
     @patch('argparse.ArgumentParser.parse_args')
@@ -40,8 +47,12 @@ class TestAttachments(TestCase):
         config.check = True
         self._report_manager = ReportManager()
         self._thread_manager = ThreadManager()
+        self._downloads = tempfile.mkdtemp()
 
     def tearDown(self):
+        if self._downloads is not None:
+            shutil.rmtree(self._downloads, ignore_errors=True)
+            self._downloads = None
         if ThreadManager._instance is not None:
             ThreadManager._instance = None
         if Configuration._instance is not None:
@@ -58,7 +69,6 @@ class TestAttachments(TestCase):
         ('sql', 1, '/tmp/28/Jul/2016/TestApplication.sql'),
         ('zip,sql', 2, ['/tmp/28/Jul/2016/AnotherTestApplication.zip', '/tmp/28/Jul/2016/TestApplication.sql'])
     )
-    @patch('builtins.open', create=True)
     @patch('jira.client.JIRA.__init__')
     @patch('jira.client.JIRA.search_issues')
     @patch('pyccata.core.configuration.Configuration._get_locations')
@@ -70,8 +80,7 @@ class TestAttachments(TestCase):
         result_filename,
         mock_config_list,
         mock_results,
-        mock_jira_client,
-        mock_open
+        mock_jira_client
     ):
         mock_jira_client.return_value = None
         mock_config_list.return_value = [self._path]
@@ -101,33 +110,21 @@ class TestAttachments(TestCase):
 
         self._thread_manager.append(attachments)
 
-        with patch('pycurl.Curl') as mock_curl:
-            with patch('pycurl.Curl.setopt') as mock_setopt:
-                with patch('pycurl.Curl.perform') as mock_perform:
-                    with patch('pycurl.Curl.close') as mock_close:
-                        Curl = namedtuple('Curl', 'URL WRITEDATA setopt perform close getinfo')
-                        mock_curl.return_value = Curl(
-                            URL=None,
-                            WRITEDATA=None,
-                            setopt=mock_setopt,
-                            perform=mock_perform,
-                            close=mock_close,
-                            getinfo=lambda x: 200
-                        )
-                        self._thread_manager.execute()
-
-                        self.assertEquals(result_count, len(attachments._content))
-                        self.assertEquals((3 * result_count), mock_setopt.call_count)
-                        self.assertEquals((1 * result_count), mock_perform.call_count)
-                        self.assertEquals((1 * result_count), mock_close.call_count)
-                        self.assertEquals((1 * result_count), mock_open.call_count)
-                        calls = []
-                        if isinstance(result_filename, list):
-                            for filename in result_filename:
-                                calls.append(call(filename, 'wb'))
-                        else:
-                            calls.append(call(result_filename, 'wb'))
-                        mock_open.assert_has_calls(calls, any_order=True)
+        attachments._output_path = self._downloads
+        with patch('pyccata.core.session.PooledSession.request') as mock_request:
+            response = MagicMock(status_code=200)
+            response.iter_content.return_value = [b'attachment']
+            mock_request.return_value = response
+            self._thread_manager.execute()
+
+            self.assertEquals(result_count, len(attachments._content))
+            self.assertEquals((1 * result_count), mock_request.call_count)
+            self.assertEquals((1 * result_count), response.close.call_count)
+            self.assertTrue(all(args[0] == 'GET' and kwargs['stream'] for args, kwargs in mock_request.call_args_list))
+            filenames = result_filename if isinstance(result_filename, list) else [result_filename]
+            for filename in filenames:
+                with open(os.path.join(self._downloads, os.path.basename(filename)), 'rb') as downloaded:
+                    self.assertEquals(b'attachment', downloaded.read())
 
         with patch('pyccata.core.managers.report.ReportManager.add_paragraph') as mock_paragraph:
             with patch('pyccata.core.managers.report.ReportManager.add_list') as mock_list:
@@ -140,7 +137,6 @@ class TestAttachments(TestCase):
         ('sql', 1, '/tmp/28/Jul/2016/TestApplication.sql'),
         ('zip,sql', 2, ['/tmp/28/Jul/2016/AnotherTestApplication.zip', '/tmp/28/Jul/2016/TestApplication.sql'])
     )
-    @patch('builtins.open', create=True)
     @patch('jira.client.JIRA.__init__')
     @patch('jira.client.JIRA.search_issues')
     @patch('pyccata.core.configuration.Configuration._get_locations')
@@ -152,8 +148,7 @@ class TestAttachments(TestCase):
         result_filename,
         mock_config_list,
         mock_results,
-        mock_jira_client,
-        mock_open
+        mock_jira_client
     ):
         mock_jira_client.return_value = None
         mock_config_list.return_value = [self._path]
@@ -183,33 +178,21 @@ class TestAttachments(TestCase):
 
         self._thread_manager.append(attachments)
 
-        with patch('pycurl.Curl') as mock_curl:
-            with patch('pycurl.Curl.setopt') as mock_setopt:
-                with patch('pycurl.Curl.perform') as mock_perform:
-                    with patch('pycurl.Curl.close') as mock_close:
-                        Curl = namedtuple('Curl', 'URL WRITEDATA setopt perform close getinfo')
-                        mock_curl.return_value = Curl(
-                            URL=None,
-                            WRITEDATA=None,
-                            setopt=mock_setopt,
-                            perform=mock_perform,
-                            close=mock_close,
-                            getinfo=lambda x: 200
-                        )
-                        self._thread_manager.execute()
-
-                        self.assertEquals(result_count, len(attachments._content))
-                        self.assertEquals((3 * result_count), mock_setopt.call_count)
-                        self.assertEquals((1 * result_count), mock_perform.call_count)
-                        self.assertEquals((1 * result_count), mock_close.call_count)
-                        self.assertEquals((1 * result_count), mock_open.call_count)
-                        calls = []
-                        if isinstance(result_filename, list):
-                            for filename in result_filename:
-                                calls.append(call(filename, 'wb'))
-                        else:
-                            calls.append(call(result_filename, 'wb'))
-                        mock_open.assert_has_calls(calls, any_order=True)
+        attachments._output_path = self._downloads
+        with patch('pyccata.core.session.PooledSession.request') as mock_request:
+            response = MagicMock(status_code=200)
+            response.iter_content.return_value = [b'attachment']
+            mock_request.return_value = response
+            self._thread_manager.execute()
+
+            self.assertEquals(result_count, len(attachments._content))
+            self.assertEquals((1 * result_count), mock_request.call_count)
+            self.assertEquals((1 * result_count), response.close.call_count)
+            self.assertTrue(all(args[0] == 'GET' and kwargs['stream'] for args, kwargs in mock_request.call_args_list))
+            filenames = result_filename if isinstance(result_filename, list) else [result_filename]
+            for filename in filenames:
+                with open(os.path.join(self._downloads, os.path.basename(filename)), 'rb') as downloaded:
+                    self.assertEquals(b'attachment', downloaded.read())
 
         with patch('pyccata.core.managers.report.ReportManager.add_paragraph') as mock_paragraph:
             with patch('pyccata.core.managers.report.ReportManager.add_list') as mock_list:
@@ -222,7 +205,6 @@ class TestAttachments(TestCase):
         ('sql', 1, '/tmp/28/Jul/2016/TestApplication.sql'),
         ('zip,sql', 2, ['/tmp/28/Jul/2016/AnotherTestApplication.zip', '/tmp/28/Jul/2016/TestApplication.sql'])
     )
-    @patch('builtins.open', create=True)
     @patch('jira.client.JIRA.__init__')
     @patch('jira.client.JIRA.search_issues')
     @patch('pyccata.core.configuration.Configuration._get_locations')
@@ -234,8 +216,7 @@ class TestAttachments(TestCase):
         result_filename,
         mock_config_list,
         mock_results,
-        mock_jira_client,
-        mock_open
+        mock_jira_client
     ):
         mock_jira_client.return_value = None
         mock_config_list.return_value = [self._path]
@@ -265,33 +246,21 @@ class TestAttachments(TestCase):
 
         self._thread_manager.append(attachments)
 
-        with patch('pycurl.Curl') as mock_curl:
-            with patch('pycurl.Curl.setopt') as mock_setopt:
-                with patch('pycurl.Curl.perform') as mock_perform:
-                    with patch('pycurl.Curl.close') as mock_close:
-                        Curl = namedtuple('Curl', 'URL WRITEDATA setopt perform close getinfo')
-                        mock_curl.return_value = Curl(
-                            URL=None,
-                            WRITEDATA=None,
-                            setopt=mock_setopt,
-                            perform=mock_perform,
-                            close=mock_close,
-                            getinfo=lambda x: 200
-                        )
-                        self._thread_manager.execute()
-
-                        self.assertEquals(result_count, len(attachments._content))
-                        self.assertEquals((3 * result_count), mock_setopt.call_count)
-                        self.assertEquals((1 * result_count), mock_perform.call_count)
-                        self.assertEquals((1 * result_count), mock_close.call_count)
-                        self.assertEquals((1 * result_count), mock_open.call_count)
-                        calls = []
-                        if isinstance(result_filename, list):
-                            for filename in result_filename:
-                                calls.append(call(filename, 'wb'))
-                        else:
-                            calls.append(call(result_filename, 'wb'))
-                        mock_open.assert_has_calls(calls, any_order=True)
+        attachments._output_path = self._downloads
+        with patch('pyccata.core.session.PooledSession.request') as mock_request:
+            response = MagicMock(status_code=200)
+            response.iter_content.return_value = [b'attachment']
+            mock_request.return_value = response
+            self._thread_manager.execute()
+
+            self.assertEquals(result_count, len(attachments._content))
+            self.assertEquals((1 * result_count), mock_request.call_count)
+            self.assertEquals((1 * result_count), response.close.call_count)
+            self.assertTrue(all(args[0] == 'GET' and kwargs['stream'] for args, kwargs in mock_request.call_args_list))
+            filenames = result_filename if isinstance(result_filename, list) else [result_filename]
+            for filename in filenames:
+                with open(os.path.join(self._downloads, os.path.basename(filename)), 'rb') as downloaded:
+                    self.assertEquals(b'attachment', downloaded.read())
 
         with patch('pyccata.core.managers.report.ReportManager.add_paragraph') as mock_paragraph:
             with patch('pyccata.core.managers.report.ReportManager.add_list') as mock_list:
@@ -380,7 +349,7 @@ class TestAttachments(TestCase):
             mock_os.assert_called_with('/tmp/28/Jul/2016')
 
         with patch('pyccata.core.filter.Filter.failed', return_value=True):
-            attachments.run()
+            asyncio.run(attachments.run())
             self.assertEquals(str(attachments._content.failure), 'The specified file does not exist')
 
     @patch('builtins.open', create=True)
@@ -428,23 +397,33 @@ class TestAttachments(TestCase):
 
         self._thread_manager.append(attachments)
 
-        with patch('pycurl.Curl') as mock_curl:
-            with patch('pycurl.Curl.setopt') as mock_setopt:
-                with patch('pycurl.Curl.perform') as mock_perform:
-                    with patch('pycurl.Curl.close') as mock_close:
-                        Curl = namedtuple('Curl', 'URL WRITEDATA setopt perform close getinfo')
-                        mock_curl.return_value = Curl(
-                            URL=None,
-                            WRITEDATA=None,
-                            setopt=mock_setopt,
-                            perform=mock_perform,
-                            close=mock_close,
-                            getinfo=lambda x: 200
-                        )
-                        with self.assertRaises(InvalidCallbackError):
-                            self._thread_manager.execute()
-                        self.assertIsInstance(attachments.failure, InvalidCallbackError)
-                        mock_setopt.assert_not_called()
-                        mock_perform.assert_not_called()
-                        mock_close.assert_not_called()
-                        mock_open.assert_not_called()
+        with patch('pyccata.core.session.PooledSession.request') as mock_request:
+            with self.assertRaises(InvalidCallbackError):
+                self._thread_manager.execute()
+            self.assertIsInstance(attachments.failure, InvalidCallbackError)
+            mock_request.assert_not_called()
+            mock_open.assert_not_called()
+
+    def test_downloads_are_limited_to_download_workers(self):
+        Server = namedtuple('Server', 'server_address attachments')
+        Manager = namedtuple('Manager', 'server')
+        attachments = Attachments.__new__(Attachments)
+        attachments.projectmanager = Manager(server=Server(server_address=None, attachments=lambda x, y: y))
+        attachments._content = [Attachment() for _ in range(6)]
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def download(function, item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(item)
+
+        with patch('pyccata.core.parts.attachments.Attachments._download_workers', return_value=2):
+            with patch.object(attachments, '_download', side_effect=download) as mock_download:
+                asyncio.run(attachments._download_attachments())
+        self.assertEquals(6, mock_download.call_count)
+        self.assertEquals(2, max(peak))
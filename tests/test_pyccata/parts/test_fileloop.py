@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from unittest import TestCase
+from mock import patch
+
+from pyccata.core.configuration import Configuration
+from pyccata.core.managers.thread import ThreadManager
+from pyccata.core.command import ThreadableCommand
+from pyccata.core.parts.fileloop import Fileloop
+from pyccata.core.log import Logger
+
+from tests.mocks.dataproviders import DependentTestThread
+
+class TestFileloop(TestCase):
+
+    Config = namedtuple(
+        'Config',
+        'name command input_directory output_directory input_pattern strip output_extension maxthreads wait_for'
+    )
+
+    @patch('pyccata.core.log.Logger.log')
+    @patch('argparse.ArgumentParser.parse_args')
+    @patch('pyccata.core.configuration.Configuration._get_locations')
+    def setUp(self, mock_config, mock_parser, mock_log):
+        path = os.path.dirname(os.path.realpath(__file__ + '../../../../'))
+        mock_config.return_value = [os.path.join(path, 'tests', 'conf')]
+        mock_parser.return_value = []
+        Logger._instance = mock_log
+        Configuration(filename='config_sections.json')
+        self._thread_manager = ThreadManager()
+        self._path = tempfile.mkdtemp()
+        patcher = patch('pyccata.core.command.ThreadableCommand.logdir', return_value=self._path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        Configuration._instance = None
+        Configuration.NAMESPACE = 'pyccata.core'
+        self._thread_manager.clear()
+        ThreadManager._instance = None
+        shutil.rmtree(self._path)
+
+    def _loop(self, name, input_directory, output_directory, wait_for=None):
+        return Fileloop(self._thread_manager, TestFileloop.Config(
+            name=name,
+            command='cp {filename} {output}',
+            input_directory=input_directory,
+            output_directory=output_directory,
+            input_pattern='*.txt',
+            strip=r'\.txt',
+            output_extension='',
+            maxthreads=2,
+            wait_for=wait_for
+        ))
+
+    def test_threads_waiting_for_the_loop_run_after_its_commands(self):
+        sequences, copies, backups = [os.path.join(self._path, name) for name in ('in', 'copies', 'backups')]
+        os.makedirs(sequences)
+        for index in range(5):
+            with open(os.path.join(sequences, '{0}.txt'.format(index)), 'w') as sequence:
+                sequence.write(str(index))
+
+        copy = self._loop('copy', sequences, copies)
+        self._loop('backup', copies, backups, wait_for='copy')
+        dependent = DependentTestThread(dependency=copy)
+        self._thread_manager.append(dependent)
+        self._thread_manager.execute()
+
+        self.assertEquals(6, len(dependent.dependency_complete))
+        self.assertTrue(all(dependent.dependency_complete))
+        self.assertEquals(5, len(os.listdir(copies)))
+        self.assertEquals(5, len(os.listdir(backups)))
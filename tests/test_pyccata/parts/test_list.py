@@ -50,6 +50,13 @@ class TestList(TestCase):
         with self.assertRaises(IndexError):
             item = unordered[0]
 
+    def test_list_reads_its_field_and_the_description_of_each_result(self):
+        list_contents = Filter('project=mssportal', max_results=5)
+        Config = namedtuple('Config', 'content style field prepend')
+        config = Config(content=list_contents, style='unordered', field='pipelines', prepend=None)
+        unordered = List(self._thread_manager, config)
+        self.assertEquals([(list_contents, ['pipelines', 'description'])], unordered.reads)
+
     def test_get_item_raises_error_if_content_is_list_and_results_is_none(self):
         list_contents = []
         Config = namedtuple('Config', 'content style field prepend')
@@ -344,17 +351,19 @@ class TestList(TestCase):
         with self.assertRaises(ArgumentValidationError):
             unordered = List(self._thread_manager, config)
 
-    def test_run_completes_if_filter_delays_in_completing(self):
+    def test_list_is_blocked_until_filter_completes(self):
         ListContents = namedtuple('ListContents', 'query fields')
         list_contents = ListContents('project=msportal', fields=['id', 'description' ,'priority'])
         Config = namedtuple('Config', 'content style field prepend')
         config = Config(content=list_contents, style='unordered', field='description', prepend=None)
 
-        with patch('pyccata.core.filter.Filter.complete', new_callable=PropertyMock) as mock_thread_complete:
-            unordered = List(self._thread_manager, config)
-            mock_thread_complete.side_effect = [False, False, True]
-            unordered.run()
-            self.assertTrue(unordered._complete)
+        unordered = List(self._thread_manager, config)
+        self.assertEquals([unordered._content], unordered.dependencies)
+        self.assertTrue(unordered.blocked)
+        self.assertFalse(unordered.ready)
+        unordered._content._complete = True
+        self.assertFalse(unordered.blocked)
+        self.assertTrue(unordered.ready)
 
     def test_run_completes_if_thread_fails(self):
         ListContents = namedtuple('ListContents', 'query fields')
@@ -387,8 +396,11 @@ class TestList(TestCase):
         config = Config(content=list_contents, style='unordered', field='description', prepend=None)
 
         with patch('pyccata.core.filter.Filter.complete', new_callable=PropertyMock) as mock_thread_complete:
-            mock_thread_complete.side_effect = [False, False, True]
+            mock_thread_complete.return_value = False
             unordered = List(self._thread_manager, config)
+            self.assertEquals([list_contents[1]], unordered.dependencies)
+            self.assertTrue(unordered.blocked)
+            mock_thread_complete.return_value = True
             unordered.run()
             self.assertTrue(unordered._complete)
 
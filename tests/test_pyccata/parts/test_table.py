@@ -90,15 +90,17 @@ class TestTable(TestCase):
         table.run()
         self.assertTrue(table._complete)
 
-    def test_run_completes_if_filter_delays_in_completing(self):
+    def test_table_is_blocked_until_cell_filters_complete(self):
         mock_filter = Filter('bob', max_results=5, fields=None, namespace='pyccata.core')
         Config = namedtuple('Config', 'rows columns style')
         config = Config(rows=[['My search', mock_filter]], columns=['Test column', 'Test Results'], style=None)
-        with patch('pyccata.core.threading.Threadable.complete', new_callable=PropertyMock) as mock_thread:
-            table = Table(self._thread_manager, config)
-            mock_thread.side_effect = [False, False, True]
-            table.run()
-            self.assertTrue(table._complete)
+        table = Table(self._thread_manager, config)
+        self.assertEquals([mock_filter], table.dependencies)
+        self.assertTrue(table.blocked)
+        mock_filter._complete = True
+        self.assertFalse(table.blocked)
+        table.run()
+        self.assertTrue(table._complete)
 
     @patch('pyccata.core.managers.report.ReportManager.add_table')
     @patch('pyccata.core.managers.report.ReportManager.add_heading')
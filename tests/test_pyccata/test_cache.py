@@ -0,0 +1,136 @@
+import os
+import time
+import shutil
+import tempfile
+from collections import namedtuple
+from unittest import TestCase
+from mock import patch, PropertyMock
+
+from tests.mocks.dataproviders import DataProviders
+from tests.mocks.dataproviders import PagedJiraClient
+from pyccata.core.cache import ResultCache
+from pyccata.core.cache import CachedResource
+from pyccata.core.log import Logger
+from pyccata.core.managers.project import ProjectManager
+from pyccata.core.resources import ResultList
+from pyccata.core.resources import Issue
+
+class RawResource(object):
+    """ Stands in for a jira resource, which cannot be pickled """
+    def __init__(self, raw):
+        self.raw = raw
+        self.session = lambda: None
+
+class TestResultCache(TestCase):
+
+    def setUp(self):
+        self._path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self._path)
+
+    def _results(self, count=2):
+        results = ResultList()
+        results.total = count
+        for index in range(count):
+            issue = Issue()
+            issue.key = 'TP-{0}'.format(index)
+            issue.summary = 'x' * 100
+            issue.assignee = RawResource({'name': 'bob123', 'avatarUrls': {'16x16': 'http://jira.local/a.png'}})
+            issue.pipelines = ['build', 'deploy']
+            results.append(issue)
+        return results
+
+    def test_normalize_collapses_whitespace_and_keyword_case_but_not_values(self):
+        self.assertEquals(
+            'project = TP AND status IN ( "In Progress" , Done ) ORDER BY key',
+            ResultCache.normalize('project=TP   and status in ("In Progress",Done)\norder by key')
+        )
+        self.assertNotEquals(ResultCache.normalize('summary ~ "abc"'), ResultCache.normalize('summary ~ "ABC"'))
+
+    def test_key_ignores_field_order_and_spelling_of_the_query(self):
+        self.assertEquals(
+            ResultCache.key('jira', 'project=TP', 50, ['summary', 'key'], None),
+            ResultCache.key('jira', 'project = TP', 50, ['key', 'summary'], None)
+        )
+        self.assertNotEquals(
+            ResultCache.key('jira', 'project = TP', 50, None, None),
+            ResultCache.key('jira', 'project = TP', False, None, None)
+        )
+        self.assertNotEquals(
+            ResultCache.key('jira:http://a', 'project = TP', 50, None, None),
+            ResultCache.key('jira:http://b', 'project = TP', 50, None, None)
+        )
+
+    def test_put_and_get_round_trip_detaching_resources(self):
+        cache = ResultCache(self._path, 60, 1024 * 1024)
+        cache.put('abc', self._results())
+        results = cache.get('abc')
+        self.assertEquals(2, results.total)
+        self.assertEquals(['TP-0', 'TP-1'], [issue.key for issue in results])
+        self.assertIsInstance(results[0], Issue)
+        self.assertIsInstance(results[0].assignee, CachedResource)
+        self.assertEquals('bob123', results[0].assignee.name)
+        self.assertEquals('http://jira.local/a.png', getattr(results[0].assignee.avatarUrls, '16x16'))
+        self.assertEquals(['build', 'deploy'], results[0].pipelines)
+
+    def test_get_returns_none_for_missing_and_expired_entries(self):
+        cache = ResultCache(self._path, 60, 1024 * 1024)
+        self.assertIsNone(cache.get('abc'))
+        cache.put('abc', self._results())
+        with patch('pyccata.core.cache.time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get('abc'))
+        self.assertEquals([], os.listdir(self._path))
+
+    def test_least_recently_used_entries_are_evicted_beyond_max_size(self):
+        cache = ResultCache(self._path, 60, 1024 * 1024)
+        cache.put('first', self._results())
+        size = os.path.getsize(os.path.join(self._path, 'first.cache'))
+        cache = ResultCache(self._path, 60, size * 2)
+        cache.put('second', self._results())
+        os.utime(os.path.join(self._path, 'first.cache'), (time.time() - 10, time.time()))
+        self.assertIsNotNone(cache.get('second'))
+        cache.put('third', self._results())
+        self.assertEquals(['second.cache', 'third.cache'], sorted(os.listdir(self._path)))
+
+    @patch('pyccata.core.log.Logger.log')
+    def test_unreadable_entries_are_discarded(self, mock_log):
+        Logger._instance = mock_log
+        cache = ResultCache(self._path, 60, 1024 * 1024)
+        with open(os.path.join(self._path, 'abc.cache'), 'wb') as entry:
+            entry.write(b'not a pickle')
+        self.assertIsNone(cache.get('abc'))
+        self.assertEquals([], os.listdir(self._path))
+
+class TestProjectManagerCache(TestCase):
+
+    @patch('argparse.ArgumentParser.parse_args')
+    @patch('pyccata.core.log.Logger.log')
+    def setUp(self, mock_log, mock_parser):
+        mock_log.return_value = None
+        mock_parser.return_value = []
+        Logger._instance = mock_log
+        self._path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        Logger._instance = None
+        shutil.rmtree(self._path)
+
+    @patch('pyccata.core.configuration.Configuration._load')
+    def test_repeated_searches_are_answered_from_the_cache(self, mock_load):
+        Cache = namedtuple('Cache', 'path ttl')
+        Config = namedtuple('Config', 'manager jira cache')
+        config = DataProviders._get_config_for_test()
+        with patch('pyccata.core.configuration.Configuration.manager', new_callable=PropertyMock) as mock_manager:
+            with patch('pyccata.core.configuration.Configuration._configuration', new_callable=PropertyMock) as mock_config:
+                mock_config.return_value = Config(manager='jira', jira=config.jira, cache=Cache(path=self._path, ttl=60))
+                mock_manager.return_value = 'jira'
+                manager = ProjectManager()
+                client = PagedJiraClient(10)
+                manager._client._client = client
+                first = manager.search_issues(search_query='project = TP', max_results=10, fields=['summary'])
+                second = manager.search_issues(search_query='project=TP', max_results=10, fields=['summary'])
+                self.assertEquals(1, len(client.requests))
+                self.assertEquals([issue.key for issue in first], [issue.key for issue in second])
+                manager.search_issues(search_query='project = TP', max_results=5, fields=['summary'])
+                self.assertEquals(2, len(client.requests))
@@ -1,4 +1,6 @@
 import os
+import time
+from threading import Timer
 from collections import namedtuple
 from unittest import TestCase
 from mock import patch
@@ -11,6 +13,7 @@ from pyccata.core.command import ThreadableCommand
 from pyccata.core.managers.project import ProjectManager
 from pyccata.core.log import Logger
 from pyccata.core.exceptions import ThreadFailedError
+from pyccata.core.exceptions import ThreadCancelledError
 
 from tests.mocks.dataproviders import DataProviders
 
@@ -209,6 +212,23 @@ class TestThreadableCommand(TestCase):
         with self.assertRaises(ThreadFailedError):
             self._thread_manager.execute()
 
+    def test_cancel_kills_the_process_group(self):
+        configuration = namedtuple('Config', 'name command input_directory output_directory wait_for')
+        config = configuration(
+            name='SleepInTheBackground',
+            command="sh -c 'sleep 30 & wait'",
+            input_directory=os.getcwd(),
+            output_directory='/tmp',
+            wait_for=None
+        )
+        thread = ThreadableCommand(self._thread_manager, config, append=False)
+        Timer(0.2, thread.cancel).start()
+        start = time.perf_counter()
+        thread.run()
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertFalse(thread.complete)
+        self.assertIsInstance(thread.failure, ThreadCancelledError)
+
     @patch('builtins.open', create=True)
     @data(
         "grep -rin --col 'def test_*' tests | sed 's/test/build/g' 1>/tmp/test",
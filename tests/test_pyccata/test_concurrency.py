@@ -0,0 +1,103 @@
+from collections import namedtuple
+from unittest import TestCase
+from mock import patch
+
+from tests.mocks.dataproviders import QuickTestThread
+from tests.mocks.dataproviders import WorkerNameTestThread
+from pyccata.core.concurrency import AdaptiveLimit
+from pyccata.core.concurrency import ConcurrencyController
+from pyccata.core.exceptions import InvalidConnectionError
+from pyccata.core.exceptions import InvalidQueryError
+
+Memory = namedtuple('Memory', 'total available')
+
+class TestAdaptiveLimit(TestCase):
+
+    def _round(self, limit, latency, failed=False):
+        """ Finish as many threads as the limit, keeping the limit in flight as the scheduler would """
+        for _ in range(limit.limit):
+            while limit.available:
+                limit.acquire()
+            limit.release(latency, failed)
+
+    def test_limit_starts_within_bounds(self):
+        self.assertEquals(4, AdaptiveLimit(4, 1, 10).limit)
+        self.assertEquals(10, AdaptiveLimit(40, 1, 10).limit)
+        self.assertEquals(1, AdaptiveLimit(0, 0, 10).limit)
+
+    def test_limit_doubles_each_round_until_the_first_back_off(self):
+        limit = AdaptiveLimit(2, 1, 100)
+        self._round(limit, 1.0)
+        self.assertEquals(4, limit.limit)
+        self._round(limit, 1.0)
+        self.assertEquals(8, limit.limit)
+
+    def test_limit_does_not_grow_unless_saturated(self):
+        limit = AdaptiveLimit(4, 1, 100)
+        limit.acquire()
+        limit.release(1.0, False)
+        self.assertEquals(4, limit.limit)
+
+    def test_failures_halve_the_limit_once_per_round(self):
+        limit = AdaptiveLimit(8, 1, 100)
+        for _ in range(4):
+            limit.acquire()
+            limit.release(None, True)
+        self.assertEquals(4, limit.limit)
+        limit.acquire()
+        limit.release(None, True)
+        self.assertEquals(2, limit.limit)
+
+    def test_growth_is_additive_after_a_back_off(self):
+        limit = AdaptiveLimit(8, 1, 100)
+        limit.acquire()
+        limit.release(None, True)
+        self.assertEquals(4, limit.limit)
+        self._round(limit, 1.0)
+        self._round(limit, 1.0)
+        self.assertEquals(5, limit.limit)
+
+    def test_slow_runs_reduce_the_limit(self):
+        limit = AdaptiveLimit(10, 1, 100)
+        for _ in range(10):
+            limit.acquire()
+            limit.release(0.1, False)
+        limit.acquire()
+        limit.release(10.0, False)
+        self.assertEquals(9, limit.limit)
+
+    def test_limit_never_falls_below_the_minimum(self):
+        limit = AdaptiveLimit(2, 2, 100)
+        for _ in range(5):
+            self._round(limit, None, failed=True)
+        self.assertEquals(2, limit.limit)
+
+class TestConcurrencyController(TestCase):
+
+    def test_each_class_has_its_own_limit(self):
+        controller = ConcurrencyController(1, 10, 0.0)
+        quick = QuickTestThread()
+        controller.started(quick)
+        self.assertFalse(controller.allow(QuickTestThread()))
+        self.assertTrue(controller.allow(WorkerNameTestThread()))
+        self.assertEquals({'QuickTestThread': 1, 'WorkerNameTestThread': 1}, controller.limits)
+
+    @patch('pyccata.core.concurrency.psutil.virtual_memory')
+    def test_nothing_new_starts_whilst_memory_is_low(self, mock_memory):
+        mock_memory.return_value = Memory(total=100, available=5)
+        controller = ConcurrencyController(8, 10, 0.1)
+        self.assertTrue(controller.allow(QuickTestThread()))
+        running = QuickTestThread()
+        controller.started(running)
+        self.assertFalse(controller.allow(QuickTestThread()))
+        controller.finished(running, 0.1)
+        self.assertTrue(controller.allow(QuickTestThread()))
+
+    def test_bad_queries_do_not_reduce_the_limit(self):
+        controller = ConcurrencyController(2, 10, 0.0)
+        for failure in [InvalidQueryError('bad'), InvalidConnectionError(503, 'http://jira.local', 'down')]:
+            thread = QuickTestThread()
+            thread.failure = failure
+            controller.started(thread)
+            controller.finished(thread, None)
+        self.assertEquals({'QuickTestThread': 1}, controller.limits)
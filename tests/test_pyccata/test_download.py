@@ -0,0 +1,103 @@
+import os
+import json
+import shutil
+import tempfile
+from unittest import TestCase
+from mock import patch
+
+from tests.mocks.dataproviders import DownloadSession
+from pyccata.core.download import Download
+from pyccata.core.log import Logger
+
+class TestDownload(TestCase):
+
+    CONTENT = b'0123456789' * 1000
+
+    @patch('pyccata.core.log.Logger.log')
+    def setUp(self, mock_log):
+        Logger._instance = mock_log
+        self._path = tempfile.mkdtemp()
+        self._file = os.path.join(self._path, 'release.zip')
+
+    def tearDown(self):
+        Logger._instance = None
+        shutil.rmtree(self._path)
+
+    def _read(self, path):
+        with open(path, 'rb') as read_file:
+            return read_file.read()
+
+    def test_download_moves_the_file_into_place_and_records_it(self):
+        download = Download('http://jira.local/a', self._file, size=len(TestDownload.CONTENT))
+        self.assertTrue(download.fetch(DownloadSession(TestDownload.CONTENT)))
+        self.assertEquals(TestDownload.CONTENT, self._read(self._file))
+        self.assertFalse(os.path.exists(download.partial))
+        with open(download.manifest) as manifest:
+            self.assertEquals(len(TestDownload.CONTENT), json.load(manifest)['size'])
+
+    def test_complete_files_are_not_fetched_again(self):
+        Download('http://jira.local/a', self._file).fetch(DownloadSession(TestDownload.CONTENT))
+        session = DownloadSession(TestDownload.CONTENT)
+        self.assertTrue(Download('http://jira.local/a', self._file, size=len(TestDownload.CONTENT)).fetch(session))
+        self.assertEquals([], session.requests)
+
+    def test_changed_files_are_fetched_again(self):
+        Download('http://jira.local/a', self._file).fetch(DownloadSession(TestDownload.CONTENT))
+        with open(self._file, 'r+b') as changed:
+            changed.write(b'X')
+        session = DownloadSession(TestDownload.CONTENT)
+        Download('http://jira.local/a', self._file).fetch(session)
+        self.assertEquals(1, len(session.requests))
+        self.assertEquals(TestDownload.CONTENT, self._read(self._file))
+
+    def test_failed_download_leaves_the_existing_file_alone(self):
+        with open(self._file, 'wb') as existing:
+            existing.write(b'previous release')
+        download = Download('http://jira.local/a', self._file)
+        self.assertFalse(download.fetch(DownloadSession(TestDownload.CONTENT, status_code=500)))
+        with self.assertRaises(ConnectionError):
+            download.fetch(DownloadSession(TestDownload.CONTENT, cut=4096))
+        self.assertEquals(b'previous release', self._read(self._file))
+
+    def test_interrupted_download_resumes_with_a_range_request(self):
+        download = Download('http://jira.local/a', self._file, size=len(TestDownload.CONTENT))
+        with self.assertRaises(ConnectionError):
+            download.fetch(DownloadSession(TestDownload.CONTENT, cut=4096))
+        self.assertEquals(4096, os.path.getsize(download.partial))
+        self.assertFalse(os.path.exists(self._file))
+
+        session = DownloadSession(TestDownload.CONTENT)
+        self.assertTrue(download.fetch(session))
+        self.assertEquals([{'Range': 'bytes=4096-'}], session.requests)
+        self.assertEquals(TestDownload.CONTENT, self._read(self._file))
+        self.assertTrue(download.complete)
+
+    def test_download_starts_again_if_the_server_ignores_the_range(self):
+        download = Download('http://jira.local/a', self._file, size=len(TestDownload.CONTENT))
+        with self.assertRaises(ConnectionError):
+            download.fetch(DownloadSession(TestDownload.CONTENT, cut=4096))
+        self.assertTrue(download.fetch(DownloadSession(TestDownload.CONTENT, ranges=False)))
+        self.assertEquals(TestDownload.CONTENT, self._read(self._file))
+
+    def test_part_file_with_every_byte_is_finished_without_a_body(self):
+        download = Download('http://jira.local/a', self._file, size=len(TestDownload.CONTENT))
+        with open(download.partial, 'wb') as part:
+            part.write(TestDownload.CONTENT)
+        self.assertTrue(download.fetch(DownloadSession(TestDownload.CONTENT)))
+        self.assertTrue(download.complete)
+
+    def test_download_starts_again_if_the_server_resumes_from_the_wrong_byte(self):
+        download = Download('http://jira.local/a', self._file, size=len(TestDownload.CONTENT))
+        with self.assertRaises(ConnectionError):
+            download.fetch(DownloadSession(TestDownload.CONTENT, cut=4096))
+        session = DownloadSession(TestDownload.CONTENT, shift=100)
+        self.assertTrue(download.fetch(session))
+        self.assertEquals([{'Range': 'bytes=4096-'}, {}], session.requests)
+        self.assertEquals(TestDownload.CONTENT, self._read(self._file))
+        self.assertTrue(download.complete)
+
+    def test_requests_wait_no_longer_than_the_timeout(self):
+        session = DownloadSession(TestDownload.CONTENT)
+        Download('http://jira.local/a', self._file).fetch(session)
+        Download('http://jira.local/b', self._file + '.b', timeout=2.5).fetch(session)
+        self.assertEquals([Download.TIMEOUT, 2.5], session.timeouts)
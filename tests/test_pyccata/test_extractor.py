@@ -0,0 +1,94 @@
+import os
+import tempfile
+from collections import namedtuple
+from unittest import TestCase
+from mock import patch
+import pandas
+import pyarrow
+
+from tests.mocks.dataproviders import QuickTestThread
+from pyccata.core.threading import Threadable
+from pyccata.core.extractor import SharedFrame
+from pyccata.core.extractor import DataThreader
+from pyccata.core.extractor import PartitionRunner
+from pyccata.core.exceptions import ThreadFailedError
+
+class TestSharedFrame(TestCase):
+
+    def _merge_table(self):
+        return pandas.DataFrame({
+            'chromosome': ['chr1', 'chr1', 'chr2'],
+            'start_A': [10, 20, 30],
+            'start_B': [15, 25, 35]
+        })
+
+    def test_shared_frame_round_trips_through_arrow(self):
+        shared = SharedFrame(self._merge_table())
+        try:
+            self.assertTrue(os.path.exists(shared.path))
+            pandas.testing.assert_frame_equal(self._merge_table(), SharedFrame.load(shared.path))
+        finally:
+            shared.release()
+        self.assertIsNone(shared.path)
+
+    def test_load_reuses_frame_for_the_same_file(self):
+        shared = SharedFrame(self._merge_table())
+        try:
+            self.assertIs(SharedFrame.load(shared.path), SharedFrame.load(shared.path))
+        finally:
+            shared.release()
+
+    def test_failed_conversion_removes_file(self):
+        handle, path = tempfile.mkstemp(prefix='pyccata-', suffix='.arrow')
+        mixed = pandas.DataFrame({'chromosome': ['chr1', 2, 'chr3']})
+        with patch('pyccata.core.extractor.tempfile.mkstemp') as mock_mkstemp:
+            mock_mkstemp.return_value = (handle, path)
+            with self.assertRaises(pyarrow.ArrowException):
+                SharedFrame(mixed)
+        self.assertFalse(os.path.exists(path))
+
+class TestDataThreader(TestCase):
+
+    def _query(self):
+        Query = namedtuple('Query', 'inclusive exclusive')
+        Extracted = namedtuple('Extracted', 'query in_sets')
+        return Extracted(query=Query(inclusive='start_A < 25', exclusive=None), in_sets=['A'])
+
+    @patch('pyccata.core.extractor.ThreadManager')
+    def test_task_queries_shared_frame_by_path(self, mock_manager):
+        merge_table = pandas.DataFrame({
+            'chromosome': ['chr1', 'chr1', 'chr2'],
+            'start_A': [10, 20, 30],
+            'start_B': [15, 25, 35]
+        })
+        shared = SharedFrame(merge_table)
+        try:
+            threader = DataThreader(shared, self._query(), 'chromosome')
+            self.assertEquals(Threadable.PROCESS, threader.EXECUTOR)
+            function, args = threader.task()
+            self.assertEquals(shared.path, args[0])
+            results = function(*args)
+            self.assertEquals(['chromosome', 'start_A'], list(results.columns))
+            self.assertEquals([10, 20], list(results['start_A']))
+        finally:
+            shared.release()
+
+    @patch('pyccata.core.extractor.ThreadManager')
+    def test_unshared_frame_is_queried_in_process(self, mock_manager):
+        merge_table = pandas.DataFrame({'chromosome': ['chr1'], 'start_A': [10]})
+        threader = DataThreader(merge_table, self._query(), 'chromosome')
+        self.assertEquals(Threadable.CPU, threader.EXECUTOR)
+        self.assertEquals(Threadable.PROCESS, DataThreader.EXECUTOR)
+
+class TestPartitionRunner(TestCase):
+
+    @patch('pyccata.core.extractor.ThreadManager')
+    def test_monitor_finishes_and_passes_failure_up_when_a_query_fails(self, mock_manager):
+        runner = PartitionRunner(None, 0, [], [], 'A', 'chromosome')
+        complete = QuickTestThread()
+        complete.run()
+        failed = QuickTestThread()
+        failed.failure = ThreadFailedError('query failed')
+        runner._running = [complete, failed]
+        runner.monitor()
+        self.assertIs(failed.failure, runner.failure)
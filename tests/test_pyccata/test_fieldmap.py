@@ -0,0 +1,104 @@
+import copy
+import pickle
+from unittest import TestCase
+from collections import namedtuple
+
+from pyccata.core.fieldmap import FieldMap
+from pyccata.core.fieldmap import RawResource
+from pyccata.core.resources import Issue
+from pyccata.core.resources import Attachment
+from pyccata.core.exceptions import InvalidFieldMapError
+
+class TestFieldMap(TestCase):
+
+    CustomField = namedtuple('CustomField', 'identifier name mapto transform')
+
+    def _raw_issues(self):
+        return [
+            {
+                'key': 'TP-1',
+                'fields': {
+                    'summary': 'First',
+                    'status': {'name': 'Done', 'id': '10001'},
+                    'fixVersions': [{'name': '1.0'}, {'name': '1.1'}],
+                    'attachment': [{'id': '7', 'filename': 'install.sql', 'mimeType': 'application/sql'}],
+                    'customfield_10900': [{'value': 'build'}, {'value': 'deploy'}],
+                    'customfield_10901': 'Roll out carefully'
+                }
+            },
+            {
+                'key': 'TP-2',
+                'fields': {'summary': 'Second', 'status': None}
+            }
+        ]
+
+    def _field_map(self):
+        return FieldMap([
+            TestFieldMap.CustomField(identifier='pipelines', name='Pipelines', mapto='customfield_10900', transform='value'),
+            TestFieldMap.CustomField(identifier='rollout_instructions', name='Rollout', mapto='customfield_10901', transform=None)
+        ])
+
+    def test_issues_are_converted_from_raw_json(self):
+        issues = self._field_map().issues(self._raw_issues())
+        self.assertEquals(['TP-1', 'TP-2'], [issue.key for issue in issues])
+        self.assertIsInstance(issues[0], Issue)
+        self.assertEquals('First', issues[0].summary)
+        self.assertEquals('Done', issues[0].status.name)
+        self.assertEquals('Done', str(issues[0].status))
+        self.assertEquals(['1.0', '1.1'], [version.name for version in issues[0].fixVersions])
+        self.assertEquals(['build', 'deploy'], issues[0].pipelines)
+        self.assertEquals('Roll out carefully', issues[0].rollout_instructions)
+        self.assertIsNone(issues[1].status)
+        self.assertIsNone(issues[1].pipelines)
+        self.assertIsNone(issues[1].release_text)
+        self.assertEquals([], issues[1].attachments)
+
+    def test_attachments_are_converted(self):
+        attachment = self._field_map().issues(self._raw_issues())[0].attachments[0]
+        self.assertIsInstance(attachment, Attachment)
+        self.assertEquals('install.sql', attachment.filename)
+        self.assertEquals('7', attachment.attachment_id)
+        self.assertEquals('application/sql', attachment.mime_type)
+        self.assertEquals('sql', attachment.extension)
+
+    def test_issues_built_as_objects_are_read_by_attribute(self):
+        Field = namedtuple('Field', 'summary customfield_10900')
+        Pipeline = namedtuple('Pipeline', 'value')
+        Resource = namedtuple('Issue', 'key fields')
+        issues = self._field_map().issues([
+            Resource(key='TP-3', fields=Field(summary='Third', customfield_10900=[Pipeline(value='test')]))
+        ])
+        self.assertEquals('TP-3', issues[0].key)
+        self.assertEquals('Third', issues[0].summary)
+        self.assertEquals(['test'], issues[0].pipelines)
+        self.assertIsNone(issues[0].priority)
+
+    def test_configured_entries_replace_standard_entries(self):
+        field_map = FieldMap([
+            TestFieldMap.CustomField(identifier='status', name='Status', mapto='status', transform='name')
+        ])
+        self.assertEquals('Done', field_map.issues(self._raw_issues())[0].status)
+        self.assertEquals(1, field_map.fields.count('status'))
+
+    def test_attributes_are_projected_onto_their_fields(self):
+        field_map = self._field_map()
+        self.assertEquals(['key', 'customfield_10901', 'fixVersions'], field_map.project(['Rollout Instructions', 'fixversions']))
+        self.assertEquals(['key', 'attachment'], field_map.project(['key', 'attachments', 'attachments']))
+        self.assertIsNone(field_map.project(['summary', 'business_representative']))
+
+    def test_unknown_transform_is_refused(self):
+        with self.assertRaises(InvalidFieldMapError):
+            FieldMap([TestFieldMap.CustomField(identifier='pipelines', name='', mapto='customfield_1', transform='nope')])
+
+    def test_frame_has_a_column_per_attribute(self):
+        frame = self._field_map().frame(self._raw_issues())
+        self.assertEquals(['TP-1', 'TP-2'], list(frame['key']))
+        self.assertEquals(['First', 'Second'], list(frame['summary']))
+        self.assertTrue('pipelines' in frame.columns)
+
+    def test_raw_resources_copy_and_pickle(self):
+        resource = RawResource({'name': 'Done', 'statusCategory': {'key': 'done'}})
+        for copied in (copy.deepcopy(resource), pickle.loads(pickle.dumps(resource))):
+            self.assertEquals('Done', copied.name)
+            self.assertEquals('done', copied.statusCategory.key)
+        self.assertFalse(hasattr(resource, 'missing'))
@@ -1,4 +1,5 @@
 import os
+import pickle
 import calendar
 from unittest import TestCase
 from mock import patch, PropertyMock
@@ -12,6 +13,7 @@ from pyccata.core.configuration import Configuration
 from pyccata.core.resources import Issue
 from pyccata.core.resources import CommandLineResultItem
 from pyccata.core.resources import ResultList
+from pyccata.core.resources import ResultRow
 from pyccata.core.resources import Replacements
 from pyccata.core.resources import ReplacementsValidator
 from pyccata.core.resources import Calendar
@@ -79,6 +81,53 @@ class TestResultList(TestCase):
 
         self.assertIsInstance(resultset.dataframe, pd.DataFrame)
 
+    def test_dataframe_rows_are_slotted_rows_of_the_mapping_item(self):
+        resultset = ResultList()
+        frame = pd.DataFrame({'peak_id': [1, 2], 'chromosome': ['chr1', 'chr2'], 'start': [10, 20]})
+        resultset.dataframe = (frame, BedFileItem())
+        with patch('copy.deepcopy') as mock_deepcopy:
+            row = resultset[1]
+            mock_deepcopy.assert_not_called()
+        self.assertIsInstance(row, BedFileItem)
+        self.assertIsInstance(row, ResultRow)
+        self.assertEquals(('peak_id', 'chromosome', 'start'), row.COLUMNS)
+        self.assertEquals(['chr2', 20, None], [row.chromosome, row.start, row.gene_name])
+        self.assertEquals({}, row.__dict__)
+        self.assertIs(type(row), type(resultset[0]))
+        self.assertEquals('chr2', pickle.loads(pickle.dumps(row)).chromosome)
+
+    def test_dataframe_rows_change_with_the_dataframe(self):
+        resultset = ResultList()
+        resultset.dataframe = (pd.DataFrame({'line': ['hello']}), CommandLineResultItem())
+        self.assertEquals('hello', resultset[0].line)
+        resultset.dataframe = pd.DataFrame({'line': ['world']})
+        self.assertEquals('world', resultset[-1].line)
+        self.assertFalse(hasattr(CommandLineResultItem(), '__dict__'))
+
+        resultset.dataframe = (pd.DataFrame({'key': ['TP-1'], 'not a name': [1]}), Issue())
+        self.assertEquals(1, getattr(resultset[0], 'not a name'))
+        self.assertNotIsInstance(resultset[0], ResultRow)
+
+    def test_dataframe_rows_follow_changes_made_in_place(self):
+        resultset = ResultList()
+        resultset.dataframe = (pd.DataFrame({'line': ['hello', 'there']}), CommandLineResultItem())
+        self.assertEquals('hello', resultset[0].line)
+        resultset.dataframe['line'] = ['world', 'again']
+        self.assertEquals('world', resultset[0].line)
+        resultset.dataframe.loc[1, 'line'] = 'changed'
+        self.assertEquals('changed', resultset[1].line)
+
+    def test_dataframe_rows_which_are_not_slotted_do_not_share_attributes(self):
+        issue = Issue()
+        issue.attachments = []
+        resultset = ResultList()
+        resultset.dataframe = (pd.DataFrame({'key': ['TP-1', 'TP-2'], 'not a name': [1, 2]}), issue)
+        first, second = resultset[0], resultset[1]
+        first.attachments.append('screenshot.png')
+        self.assertEquals(['screenshot.png'], first.attachments)
+        self.assertEquals([], second.attachments)
+        self.assertEquals([], issue.attachments)
+
 @ddt
 class TestReplacements(TestCase):
     _test_configuration_path = ''
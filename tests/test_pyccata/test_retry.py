@@ -0,0 +1,76 @@
+from unittest import TestCase
+from mock import patch
+
+from pyccata.core.retry import Backoff
+from pyccata.core.retry import CircuitBreaker
+from pyccata.core.exceptions import InvalidConnectionError
+
+class TestBackoff(TestCase):
+
+    @patch('pyccata.core.retry.random.uniform')
+    def test_delay_doubles_up_to_the_maximum(self, mock_uniform):
+        mock_uniform.side_effect = lambda low, high: high
+        backoff = Backoff(0.5, 3)
+        self.assertEquals([0.5, 1.0, 2.0, 3.0, 3.0], [backoff.delay(attempt) for attempt in range(1, 6)])
+
+    def test_delay_is_jittered_below_the_ceiling(self):
+        backoff = Backoff(1, 30)
+        delays = [backoff.delay(3) for _ in range(50)]
+        for delay in delays:
+            self.assertTrue(0 <= delay <= 4)
+        self.assertGreater(len(set(delays)), 1)
+
+class TestCircuitBreaker(TestCase):
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        breaker = CircuitBreaker(2, 60)
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertEquals(CircuitBreaker.OPEN, breaker.state)
+        self.assertFalse(breaker.allow())
+
+    def test_success_resets_the_failure_count(self):
+        breaker = CircuitBreaker(2, 60)
+        breaker.failure()
+        breaker.success()
+        breaker.failure()
+        self.assertEquals(CircuitBreaker.CLOSED, breaker.state)
+
+    @patch('pyccata.core.retry.monotonic')
+    def test_half_open_lets_a_single_probe_through(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(1, 10)
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+        mock_monotonic.return_value = 111
+        self.assertEquals(CircuitBreaker.HALF_OPEN, breaker.state)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.failure()
+        self.assertEquals(CircuitBreaker.OPEN, breaker.state)
+        mock_monotonic.return_value = 122
+        self.assertTrue(breaker.allow())
+        breaker.success()
+        self.assertEquals(CircuitBreaker.CLOSED, breaker.state)
+        self.assertTrue(breaker.allow())
+
+class TestInvalidConnectionError(TestCase):
+
+    def test_retry_after_reads_seconds(self):
+        exception = InvalidConnectionError(429, 'http://jira.local', 'Too many requests', {'Retry-After': '7'})
+        self.assertEquals(7.0, exception.retry_after)
+
+    def test_retry_after_reads_http_dates(self):
+        exception = InvalidConnectionError(503, 'http://jira.local', 'Down', {'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEquals(0.0, exception.retry_after)
+
+    def test_retry_after_is_none_when_missing_or_unreadable(self):
+        self.assertIsNone(InvalidConnectionError(503, 'http://jira.local', 'Down').retry_after)
+        self.assertIsNone(InvalidConnectionError(503, 'http://jira.local', 'Down', {'Retry-After': 'soon'}).retry_after)
+
+    def test_retryable_codes(self):
+        for code in [None, 408, 429, 500, 503]:
+            self.assertTrue(InvalidConnectionError(code, 'http://jira.local', 'failed').retryable)
+        for code in [400, 401, 403, 404]:
+            self.assertFalse(InvalidConnectionError(code, 'http://jira.local', 'failed').retryable)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+from mock import patch
+import requests
+
+from pyccata.core.session import PooledSession
+
+class TestPooledSession(TestCase):
+
+    def test_origin_includes_the_default_port(self):
+        self.assertEquals('https://jira.local:443', PooledSession.origin('https://JIRA.local/rest/api/2/search'))
+        self.assertEquals('http://jira.local:80', PooledSession.origin('http://jira.local'))
+        self.assertEquals('http://jira.local:8080', PooledSession.origin('http://jira.local:8080/secure'))
+
+    def test_credentials_are_only_sent_to_their_server(self):
+        session = PooledSession(2)
+        session.credentials('http://jira.local:8080', ('jira', 'secret'))
+        session.credentials('https://jenkins.local/job/deploy', ('jenkins', 'token'))
+        with patch('requests.Session.request') as mock_request:
+            session.get('http://jira.local:8080/secure/attachment/1/file.zip', stream=True)
+            session.post('https://jenkins.local/job/other/build')
+            session.get('http://elsewhere.local/')
+            session.get('http://jira.local:8080/rest', auth=('someone', 'else'))
+        auths = [kwargs['auth'] for _, kwargs in mock_request.call_args_list]
+        self.assertEquals([('jira', 'secret'), ('jenkins', 'token'), None, ('someone', 'else')], auths)
+        self.assertTrue(mock_request.call_args_list[0][1]['stream'])
+
+    def test_connections_to_each_host_are_limited(self):
+        session = PooledSession(3, hosts=4)
+        pool = session.adapter.poolmanager.connection_from_url('http://jira.local:8080')
+        self.assertEquals(3, pool.pool.maxsize)
+        self.assertTrue(pool.block)
+
+    def test_mounted_sessions_share_the_pools(self):
+        session = PooledSession(2)
+        other = requests.Session()
+        session.mount(other)
+        self.assertIs(session.adapter, other.get_adapter('https://jira.local/rest'))
+        self.assertIs(session.adapter, other.get_adapter('http://jenkins.local/job'))
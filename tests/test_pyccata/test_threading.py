@@ -0,0 +1,50 @@
+from threading import Thread
+from unittest import TestCase
+from mock import patch
+
+from tests.mocks.dataproviders import QuickTestThread
+from pyccata.core.threading import CancellationToken
+from pyccata.core.exceptions import ThreadCancelledError
+from pyccata.core.exceptions import ThreadTimeoutError
+
+class TestCancellationToken(TestCase):
+
+    def test_cancel_runs_callbacks_once_and_keeps_the_first_reason(self):
+        token = CancellationToken()
+        called = []
+        token.on_cancel(lambda: called.append(1))
+        first = ThreadTimeoutError('first')
+        token.cancel(first)
+        token.cancel(ThreadCancelledError('second'))
+        self.assertTrue(token.cancelled)
+        self.assertIs(first, token.reason)
+        self.assertEquals([1], called)
+
+    def test_callbacks_registered_after_cancellation_run_at_once(self):
+        token = CancellationToken()
+        token.cancel(ThreadCancelledError('stop'))
+        called = []
+        token.on_cancel(lambda: called.append(1))
+        self.assertEquals([1], called)
+
+    @patch('pyccata.core.log.Logger.log')
+    def test_failing_callback_does_not_stop_the_others(self, mock_log):
+        token = CancellationToken()
+        called = []
+        token.on_cancel(lambda: 1 / 0)
+        token.on_cancel(lambda: called.append(1))
+        token.cancel(ThreadCancelledError('stop'))
+        self.assertEquals([1], called)
+
+    def test_wait_returns_when_cancelled_from_another_thread(self):
+        token = CancellationToken()
+        Thread(target=token.cancel, args=(ThreadCancelledError('stop'),)).start()
+        self.assertTrue(token.wait(5))
+        self.assertFalse(CancellationToken().wait(0.01))
+
+    def test_abandon_records_the_reason_as_the_failure(self):
+        thread = QuickTestThread()
+        self.assertFalse(thread.abandon())
+        thread.cancel()
+        self.assertTrue(thread.abandon())
+        self.assertIsInstance(thread.failure, ThreadCancelledError)
@@ -0,0 +1,89 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+
+from tests.mocks.dataproviders import QuickTestThread
+from tests.mocks.dataproviders import RaisingTestThread
+from pyccata.core.trace import ExecutionTrace
+
+class TestExecutionTrace(TestCase):
+
+    def _run(self, trace, thread):
+        trace.queued(thread)
+        trace.ready(thread)
+        trace.dispatched(thread)
+        thread.mark_started()
+        try:
+            thread.run()
+        except RuntimeError as exception:
+            thread.failure = exception
+        trace.finished(thread)
+
+    def test_records_each_stage_in_order(self):
+        trace = ExecutionTrace()
+        thread = QuickTestThread()
+        self._run(trace, thread)
+        self.assertEquals(1, len(trace))
+        record = trace.records[0]
+        self.assertEquals('QuickTestThread', record.classname)
+        self.assertEquals(104, record.priority)
+        self.assertEquals('MainThread', record.worker)
+        self.assertTrue(record.queued <= record.ready <= record.dispatched <= record.started <= record.finished)
+        self.assertFalse(record.failed)
+        self.assertGreaterEqual(record.running, 0)
+
+    def test_queued_keeps_the_first_time_a_thread_was_seen(self):
+        trace = ExecutionTrace()
+        thread = QuickTestThread()
+        trace.queued(thread)
+        queued = trace.records[0].queued
+        trace.queued(thread)
+        self.assertEquals(queued, trace.records[0].queued)
+
+    def test_chrome_trace_has_a_complete_event_per_run_and_names_workers(self):
+        trace = ExecutionTrace()
+        threads = [QuickTestThread(), RaisingTestThread()]
+        for thread in threads:
+            self._run(trace, thread)
+        document = trace.to_chrome()
+        runs = [event for event in document['traceEvents'] if event['ph'] == 'X']
+        self.assertEquals([thread.thread_name for thread in threads], [event['name'] for event in runs])
+        self.assertEquals([False, True], [event['args']['failed'] for event in runs])
+        self.assertEquals(4, len([event for event in document['traceEvents'] if event.get('cat') == 'queued']))
+        names = [event['args']['name'] for event in document['traceEvents'] if event['ph'] == 'M']
+        self.assertEquals(['queue', 'MainThread'], names)
+
+    def test_save_writes_chrome_trace_json(self):
+        trace = ExecutionTrace()
+        self._run(trace, QuickTestThread())
+        handle, path = tempfile.mkstemp(suffix='.json')
+        os.close(handle)
+        try:
+            trace.save(path)
+            with open(path) as trace_file:
+                self.assertEquals(trace.to_chrome(), json.load(trace_file))
+        finally:
+            os.remove(path)
+
+    def test_summary_lists_threads_and_status(self):
+        trace = ExecutionTrace()
+        complete = QuickTestThread()
+        failed = RaisingTestThread()
+        waiting = QuickTestThread()
+        self._run(trace, complete)
+        self._run(trace, failed)
+        trace.queued(waiting)
+        lines = trace.summary().split(os.linesep)
+        self.assertTrue(lines[0].startswith('thread'))
+        self.assertTrue(lines[1].startswith(complete.thread_name))
+        self.assertTrue(lines[1].endswith('complete'))
+        self.assertTrue(lines[2].endswith('failed'))
+        self.assertTrue(lines[3].endswith('not run'))
+        self.assertTrue(lines[4].startswith('3 threads'))
+
+    def test_clear_forgets_records(self):
+        trace = ExecutionTrace()
+        self._run(trace, QuickTestThread())
+        trace.clear()
+        self.assertEquals(0, len(trace))